@@ -7,7 +7,12 @@ from prometheus_client import Counter, REGISTRY
  
 
 from .managers.config import Config
+from .managers.asset_management import AssetManager
+from .managers.cache_management import CacheManager
 from .managers.formatter_management import configure_logging
+from .managers.json_management import JSONManager
+from .managers.json_provider import FastJSONProvider
+from .managers.session_management import SessionManager
 
 
 def create_flask_app():
@@ -16,16 +21,31 @@ def create_flask_app():
         template_folder= os.path.join(os.path.dirname(__file__), 'templates'),
         static_folder= os.path.join(os.path.dirname(__file__), 'static')
     )
+    app.json = FastJSONProvider(app)
     app.config.from_object(Config)
     Config.init_app(app)
 
-    metrics = PrometheusMetrics(app, path='/metrics', registry=REGISTRY)
+    # The session heartbeat is polled by every open tab; keep it out of the metrics
+    metrics = PrometheusMetrics(
+        app,
+        path='/metrics',
+        registry=REGISTRY,
+        excluded_paths=["^/session/heartbeat$"],
+    )
+
+    # Redis-backed sessions, unless running in stateless signed-cookie mode
+    if not app.config["SESSION_STATELESS"]:
+        Session(app)
 
-    Session(app)
+    # Session-free routes (heartbeat) + signed session expiry cookie
+    SessionManager.init_app(app)
 
     # configure current_app.logger
     configure_logging(app)
 
+    # Fingerprint static files (url_for("static") + loaders use the hashes)
+    AssetManager.init_app(app)
+
     # Register Blueprints
     from .routes.site import site_bp
     from .routes.admin import admin_bp
@@ -36,13 +56,11 @@ def create_flask_app():
     app.register_blueprint(user_bp)
 
 
-    @app.after_request
-    def no_cache(response):
-        response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-        response.headers["Pragma"] = "no-cache"
-        response.headers["Expires"] = "0"
-        return response
-    
+    # Parse the JSON catalogs once; JSONManager hot-reloads them on mtime change
+    JSONManager.preload()
+
+    # Per-route Cache-Control (no-store unless a route declares otherwise)
+    CacheManager.init_app(app)
 
     # Login attempts counter
     app.login_metrics = Counter(
@@ -27,6 +27,10 @@ class MongoDBFilters:
         serial = int(serial)
         return {"serial": serial}
 
+    @staticmethod
+    def by_serials(serials: list):
+        return {"serial": {"$in": [int(serial) for serial in serials]}}
+
     class Case:
         active = {"status": "active"}
         archived = {"status": "archived"}
@@ -43,6 +47,19 @@ class MongoDBFilters:
         evidence = {"type": "evidence"}
         invoice = {"type": "invoice"}
 
+        @staticmethod
+        def by_case(case_serial: int):
+            return {"case_serial": int(case_serial)}
+
+        @staticmethod
+        def by_blob_key(blob_key: str):
+            return {"blob_key": blob_key}
+
+        @staticmethod
+        def stored_by_sha256(hashes: list):
+            """Uploaded, content-addressed files with one of these hashes."""
+            return {"sha256": {"$in": list(hashes)}, "status": "available", "blob_key": {"$exists": True}}
+
 
 class MongoDBSort:
     newest = ("serial", -1)
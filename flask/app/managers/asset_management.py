@@ -0,0 +1,72 @@
+# app/managers/asset_management.py
+import hashlib
+import json
+from pathlib import Path
+from flask import request
+from markupsafe import Markup
+
+
+class AssetManager:
+    """
+    Content-hashed static asset manifest.
+
+    At startup every file under static/ is fingerprinted. url_for("static", ...)
+    then emits "/static/<file>?v=<hash>", and the same manifest is handed to the
+    JS loaders (window.ASSET_MANIFEST), replacing the old ?v=Date.now() busting.
+    A request whose ?v= matches the current hash can be cached as immutable:
+    any content change produces a new URL.
+    """
+
+    HASH_LENGTH = 12
+    VERSION_ARG = "v"
+
+    _manifest = {}
+
+    # ---------------------- BUILD ----------------------
+
+    @classmethod
+    def build_manifest(cls, static_folder: str) -> dict:
+        """Return { "js/core/api.js": "<hash>", ... } for every static file."""
+        root = Path(static_folder)
+        manifest = {}
+        for file_path in sorted(root.rglob("*")):
+            if not file_path.is_file():
+                continue
+            digest = hashlib.sha256(file_path.read_bytes()).hexdigest()
+            manifest[file_path.relative_to(root).as_posix()] = digest[: cls.HASH_LENGTH]
+        return manifest
+
+    # ---------------------- LOOKUPS ----------------------
+
+    @classmethod
+    def get_version(cls, filename: str):
+        return cls._manifest.get((filename or "").lstrip("/"))
+
+    @classmethod
+    def is_fingerprinted_request(cls) -> bool:
+        """True if the current static request carries the file's current hash."""
+        version = request.args.get(cls.VERSION_ARG)
+        filename = (request.view_args or {}).get("filename")
+        return bool(version) and version == cls.get_version(filename)
+
+    @classmethod
+    def manifest_json(cls) -> Markup:
+        """Manifest for inline <script> use in templates."""
+        return Markup(json.dumps(cls._manifest, separators=(",", ":")))
+
+    # ---------------------- FLASK ----------------------
+
+    @classmethod
+    def init_app(cls, app):
+        cls._manifest = cls.build_manifest(app.static_folder)
+        app.logger.info(f"✅ Static asset manifest built ({len(cls._manifest)} files)")
+
+        @app.url_defaults
+        def fingerprint_static_urls(endpoint, values):
+            if endpoint != "static" or cls.VERSION_ARG in values:
+                return
+            version = cls.get_version(values.get("filename"))
+            if version:
+                values[cls.VERSION_ARG] = version
+
+        app.jinja_env.globals["asset_manifest_json"] = cls.manifest_json
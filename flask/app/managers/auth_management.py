@@ -1,3 +1,6 @@
+import hashlib
+import json
+from collections import namedtuple
 from functools import wraps
 from flask import session, redirect, url_for, flash, current_app
 from werkzeug.security import check_password_hash
@@ -7,6 +10,60 @@ from ..managers.response_management import ResponseManager
 from ..constants.constants_mongodb import MongoDBEntity, MongoDBFilters
 
 
+_LOGIN_CONTEXT_FIELDS = [
+    "version",
+    "session_id",
+    "user_serial",
+    "username",
+    "roles",
+    "office_serial",
+    "office_name",
+    "mfa_status",
+]
+
+
+class LoginContext(namedtuple("LoginContext", _LOGIN_CONTEXT_FIELDS)):
+    """
+    What the session keeps about a logged-in user - and nothing more.
+
+    Stored as a short positional list (msgpack/cookie friendly), so the
+    per-request session payload no longer grows with the user document
+    (MFA secret, recovery codes, favorites, ...). Bump VERSION whenever the
+    fields change: sessions in an older layout are treated as logged out.
+    """
+
+    __slots__ = ()
+
+    VERSION = 1
+
+    @classmethod
+    def from_login(cls, login_data: dict, session_id: str) -> "LoginContext":
+        """Build from the authenticate_login() result ({user, office})."""
+        user = login_data.get("user") or {}
+        office = login_data.get("office") or {}
+        return cls(
+            version=cls.VERSION,
+            session_id=session_id,
+            user_serial=user.get("serial"),
+            username=user.get("username"),
+            roles=list(user.get("roles") or []),
+            office_serial=office.get("serial"),
+            office_name=office.get("name"),
+            mfa_status=(user.get("mfa") or {}).get("status"),
+        )
+
+    @classmethod
+    def from_session(cls, raw):
+        if not isinstance(raw, (list, tuple)) or len(raw) != len(cls._fields):
+            return None
+        if raw[0] != cls.VERSION:
+            return None
+        return cls(*raw)
+
+    def to_session(self) -> list:
+        return list(self)
+
+
 class AuthenticationManager:
     @classmethod
     def _authenticate_admin(cls, password):
@@ -168,7 +225,7 @@ class AuthorizationManager:
 
     @classmethod
     def get_login_context(cls):
-        return session.get("login_context", None)
+        return LoginContext.from_session(session.get("login_context"))
 
     @classmethod
     def delete_login_context(cls):
@@ -183,28 +240,30 @@ class AuthorizationManager:
         return not cls.is_logged_in()
 
     @classmethod
-    def set_login_context(cls, ctx: dict = None):
+    def set_login_context(cls, ctx: LoginContext = None):
         if not ctx:
             cls.delete_login_context()
             return
-        session["login_context"] = ctx.copy()
+        session["login_context"] = ctx.to_session()
+        # only matters for the stateless cookie session; Flask-Session sets it itself
+        session.permanent = current_app.config.get("SESSION_PERMANENT", True)
 
     @classmethod
     def get_user_context(cls):
         ctx = cls.get_login_context()
-        return ctx.get("user", {}) if ctx else {}
+        if not ctx:
+            return {}
+        return {"serial": ctx.user_serial, "username": ctx.username, "roles": ctx.roles}
 
     @classmethod
     def get_office_context(cls):
         ctx = cls.get_login_context()
-        return ctx.get("office", {}) if ctx else {}
+        return {"serial": ctx.office_serial, "name": ctx.office_name} if ctx else {}
 
     @classmethod
     def get_roles(cls):
-        if user_ctx := cls.get_user_context():
-            return user_ctx.get("roles", [])
-        else:
-            return []
+        ctx = cls.get_login_context()
+        return ctx.roles if ctx else []
 
     @classmethod
     def is_admin(cls):
@@ -212,28 +271,66 @@ class AuthorizationManager:
 
     @classmethod
     def get_office_serial(cls):
-        if office_ctx := cls.get_office_context():
-            return office_ctx.get("serial", None)
-        else:
-            return None
+        ctx = cls.get_login_context()
+        return ctx.office_serial if ctx else None
 
     @classmethod
     def get_office_name(cls):
-        if office_ctx := cls.get_office_context():
-            return office_ctx.get("name", None)
-        else:
-            return None
+        ctx = cls.get_login_context()
+        return ctx.office_name if ctx else None
 
     @classmethod
     def get_user_serial(cls):
-        if user_ctx := cls.get_user_context():
-            return user_ctx.get("serial", None)
-        else:
-            return None
+        ctx = cls.get_login_context()
+        return ctx.user_serial if ctx else None
 
     @classmethod
     def get_username(cls):
-        if user_ctx := cls.get_user_context():
-            return user_ctx.get("username", None)
-        else:
-            return None
+        ctx = cls.get_login_context()
+        return ctx.username if ctx else None
+
+    @classmethod
+    def get_mfa_status(cls):
+        ctx = cls.get_login_context()
+        return ctx.mfa_status if ctx else None
+
+    @classmethod
+    def update_login_context(cls, **fields):
+        """
+        Keep the session context in sync after the user document changes
+        (e.g. MFA status), so /me does not serve stale data.
+        """
+        ctx = cls.get_login_context()
+        if not ctx:
+            return
+        cls.set_login_context(ctx=ctx._replace(**fields))
+
+    @classmethod
+    def get_dashboard_context(cls) -> dict:
+        """Slim view of the login context, everything the dashboard needs at once."""
+        return {
+            "user": {
+                "serial": cls.get_user_serial(),
+                "username": cls.get_username(),
+                "roles": cls.get_roles(),
+                "mfa_status": cls.get_mfa_status(),
+            },
+            "office": {
+                "serial": cls.get_office_serial(),
+                "name": cls.get_office_name(),
+            },
+        }
+
+    @classmethod
+    def get_dashboard_context_etag(cls, dashboard_ctx: dict) -> str:
+        """
+        Stable for the life of the session: it only changes on a new login
+        (new session_id) or when the context itself changes.
+        """
+        ctx = cls.get_login_context()
+        raw = json.dumps(
+            {"session_id": ctx.session_id if ctx else None, "context": dashboard_ctx},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
@@ -0,0 +1,132 @@
+# app/managers/cache_management.py
+from flask import current_app, request
+
+from .asset_management import AssetManager
+
+
+class CacheManager:
+    """
+    Route-aware HTTP cache policy.
+
+    Routes declare their cacheability with a decorator; everything that does
+    not declare one is treated as sensitive and sent with no-store.
+
+        @user_bp.route("/load_search_case")
+        @CacheManager.private()
+        @AuthorizationManager.login_required
+        def load_search_case(): ...
+
+    Policies:
+      - no_store:  never stored (default; session data, API responses)
+      - private:   browser-only, revalidated with ETag / Last-Modified (304)
+      - immutable: public, one year, never revalidated (fingerprinted assets)
+    """
+
+    NO_STORE = "no-store"
+    PRIVATE = "private"
+    PUBLIC = "public"
+    IMMUTABLE = "immutable"
+
+    IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+    # Unversioned /static files: cacheable by anyone, but always revalidated.
+    # Fingerprinted ones (?v=<current hash>, see AssetManager) are immutable.
+    STATIC_POLICY = (PUBLIC, 0)
+
+    _CACHEABLE_STATUSES = (200, 304)
+
+    # ---------------------- DECLARATIONS ----------------------
+
+    @staticmethod
+    def _declare(policy: str, max_age: int = 0):
+        def decorator(func):
+            func.cache_policy = (policy, int(max_age))
+            return func
+
+        return decorator
+
+    @classmethod
+    def no_store(cls, func):
+        """Explicitly mark a route as never cacheable."""
+        return cls._declare(cls.NO_STORE)(func)
+
+    @classmethod
+    def private(cls, max_age: int = 0):
+        """Browser-only caching; max_age=0 means revalidate on every use."""
+        return cls._declare(cls.PRIVATE, max_age)
+
+    @classmethod
+    def public(cls, max_age: int = 0):
+        """Shared caching (nginx/CDN); only for data identical for every user."""
+        return cls._declare(cls.PUBLIC, max_age)
+
+    @classmethod
+    def immutable(cls, func):
+        """Content never changes under this URL (e.g. hashed asset names)."""
+        return cls._declare(cls.IMMUTABLE, cls.IMMUTABLE_MAX_AGE)(func)
+
+    # ---------------------- RESOLUTION ----------------------
+
+    @classmethod
+    def _policy_for_request(cls):
+        if request.endpoint == "static":
+            if AssetManager.is_fingerprinted_request():
+                return (cls.IMMUTABLE, cls.IMMUTABLE_MAX_AGE)
+            return cls.STATIC_POLICY
+
+        view = current_app.view_functions.get(request.endpoint)
+        return getattr(view, "cache_policy", (cls.NO_STORE, 0))
+
+    # ---------------------- APPLY ----------------------
+
+    @staticmethod
+    def _set_no_store(response):
+        response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
+        response.headers["Pragma"] = "no-cache"
+        response.headers["Expires"] = "0"
+        return response
+
+    @classmethod
+    def apply(cls, response):
+        """after_request hook: stamp Cache-Control according to the route policy."""
+
+        # Views that stream/proxy content may set their own header explicitly
+        if request.endpoint != "static" and "Cache-Control" in response.headers:
+            return response
+
+        policy, max_age = cls._policy_for_request()
+
+        if policy == cls.NO_STORE or response.status_code not in cls._CACHEABLE_STATUSES:
+            return cls._set_no_store(response)
+
+        cache_control = response.cache_control
+        cache_control.no_store = False
+        if policy == cls.PRIVATE:
+            cache_control.private = True
+        else:
+            cache_control.public = True
+
+        if policy == cls.IMMUTABLE:
+            cache_control.no_cache = False
+            cache_control.max_age = max_age
+            cache_control.immutable = True
+            return response
+
+        if max_age:
+            cache_control.no_cache = False
+            cache_control.max_age = max_age
+        else:
+            cache_control.no_cache = True
+
+        # Files (static, send_file) already carry ETag/Last-Modified and are conditional
+        if response.direct_passthrough or response.is_streamed:
+            return response
+
+        # Revalidation support for generated bodies (fragments, JSON)
+        if response.status_code == 200 and not response.get_etag()[0]:
+            response.add_etag()
+        return response.make_conditional(request)
+
+    @classmethod
+    def init_app(cls, app):
+        app.after_request(cls.apply)
@@ -11,6 +11,10 @@ class Config:
     # Redis
     SESSION_TYPE = os.getenv("SESSION_TYPE", "redis")
     SESSION_PERMANENT = True
+    SESSION_SERIALIZATION_FORMAT = "msgpack"  # compact binary, see LoginContext
+    # Stateless mode: the (compact) session lives in Flask's signed cookie,
+    # no Redis lookup per request. Logout then only clears the cookie.
+    SESSION_STATELESS = os.getenv("SESSION_STATELESS", "false").lower() == "true"
     PERMANENT_SESSION_LIFETIME = timedelta(hours=1)
     REDIS_HOST = os.getenv("REDIS_HOST", "redis")
     REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
@@ -21,6 +25,16 @@ class Config:
     S3_SERVICE_URL = os.getenv("S3_SERVICE_URL")
     SES_SERVICE_URL = os.getenv("SES_SERVICE_URL")
 
+    # File downloads (view_file):
+    #   "stream"  - the gateway proxies the bytes from S3 itself
+    #   "x-accel" - the gateway only authorizes + presigns; nginx streams
+    #               the object (X-Accel-Redirect to the internal /_s3_proxy)
+    FILE_DELIVERY = os.getenv("FILE_DELIVERY", "stream")
+
+    # Content-addressed uploads: the browser sends each file's SHA-256 and an
+    # office stores identical documents once (blobs/{office}/{sha256}/{generation})
+    FILE_DEDUP = os.getenv("FILE_DEDUP", "false").lower() == "true"
+
     # reCAPTCHA v3
     RECAPTCHA_SITE_KEY = os.getenv("RECAPTCHA_SITE_KEY")
     RECAPTCHA_SECRET = os.getenv("RECAPTCHA_SECRET")
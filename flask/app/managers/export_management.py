@@ -0,0 +1,159 @@
+# app/managers/export_management.py
+import itertools
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from flask import current_app, Response, stream_with_context
+
+from .response_management import ResponseManager
+from ..services import s3_service
+
+
+class _ZipSink:
+    """
+    Write-only, unseekable target for ZipFile. The archive is drained after
+    every chunk, so only the bytes written since the last yield are held.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class CaseExportManager:
+    """
+    ZIP export of a case, streamed while it is built.
+
+    Each S3 object is read in CHUNK_SIZE pieces and written straight into a
+    stored (uncompressed, zip64) entry; the zip is written with data
+    descriptors, so nothing is seeked or buffered whole. While one file is
+    written, the next PREFETCH objects are already presigned and opened on
+    worker threads, each holding at most PREFETCH_BYTES.
+    Memory stays around PREFETCH * PREFETCH_BYTES regardless of case size.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+    PREFETCH = int(os.getenv("EXPORT_PREFETCH", "3"))
+    PREFETCH_BYTES = int(os.getenv("EXPORT_PREFETCH_MB", "4")) * 1024 * 1024
+    ERRORS_NAME = "EXPORT_ERRORS.txt"
+
+    @staticmethod
+    def archive_names(names):
+        """Unique archive names in order: a repeated 'scan.pdf' becomes 'scan (2).pdf'."""
+        seen, result = set(), []
+        for name in names:
+            stem, dot, ext = name.rpartition(".")
+            if not dot:
+                stem, ext = name, ""
+            candidate, n = name, 1
+            while candidate in seen:
+                n += 1
+                candidate = f"{stem} ({n}).{ext}" if dot else f"{stem} ({n})"
+            seen.add(candidate)
+            result.append(candidate)
+        return result
+
+    @classmethod
+    def _open(cls, app, key):
+        """Presign and open one object, reading its first PREFETCH_BYTES (worker thread)."""
+        with app.app_context():
+            s3_res = s3_service.generate_presigned_get(key, expires_in=3600)
+            if not ResponseManager.is_success(s3_res):
+                raise RuntimeError("presign failed")
+            url = ResponseManager.get_data(s3_res)
+
+        resp = requests.get(url, stream=True, timeout=30)
+        try:
+            resp.raise_for_status()
+            chunks = resp.iter_content(chunk_size=cls.CHUNK_SIZE)
+            head, size = [], 0
+            for chunk in chunks:
+                head.append(chunk)
+                size += len(chunk)
+                if size >= cls.PREFETCH_BYTES:
+                    break
+        except Exception:
+            resp.close()
+            raise
+        return resp, head, chunks
+
+    @staticmethod
+    def _discard(future):
+        """Close the connection of a prefetched object that will not be written."""
+        if future.cancel() or future.exception() is not None:
+            return
+        future.result()[0].close()
+
+    @classmethod
+    def stream(cls, entries):
+        """Yield the ZIP of [(archive_name, key), ...] chunk by chunk."""
+        app = current_app._get_current_object()
+        sink = _ZipSink()
+        failed = []
+        pool = ThreadPoolExecutor(max_workers=max(cls.PREFETCH, 1), thread_name_prefix="export")
+        futures = {}
+
+        def prefetch(index):
+            if index < len(entries):
+                futures[index] = pool.submit(cls._open, app, entries[index][1])
+
+        try:
+            for index in range(max(cls.PREFETCH, 1)):
+                prefetch(index)
+
+            with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+                for index, (name, key) in enumerate(entries):
+                    future = futures.pop(index)
+                    prefetch(index + max(cls.PREFETCH, 1))
+                    try:
+                        resp, head, rest = future.result()
+                    except Exception as e:
+                        current_app.logger.warning(f"⚠️ [export] {key} not available: {e}")
+                        failed.append(name)
+                        continue
+
+                    try:
+                        with resp, archive.open(name, "w", force_zip64=True) as entry:
+                            for chunk in itertools.chain(head, rest):
+                                entry.write(chunk)
+                                data = sink.drain()
+                                if data:
+                                    yield data
+                    except (requests.RequestException, OSError) as e:
+                        # the entry is closed truncated; say so in the archive
+                        current_app.logger.warning(f"⚠️ [export] {key} interrupted: {e}")
+                        failed.append(name)
+
+                if failed:
+                    archive.writestr(cls.ERRORS_NAME, "Files missing or incomplete:\n" + "\n".join(failed) + "\n")
+
+            yield sink.drain()
+            current_app.logger.info(f"📦 [export] {len(entries) - len(failed)}/{len(entries)} files streamed")
+        finally:
+            # client went away (or done): drop what was fetched ahead
+            for future in futures.values():
+                cls._discard(future)
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def response(cls, entries, filename: str):
+        """Streaming download response; the first bytes go out before any file is complete."""
+        headers = {
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "private, no-store",
+            "X-Accel-Buffering": "no",  # nginx: pass chunks through as they come
+        }
+        return Response(stream_with_context(cls.stream(entries)), mimetype="application/zip", headers=headers)
@@ -0,0 +1,84 @@
+# app/managers/fragment_management.py
+import hashlib
+import os
+import threading
+from flask import current_app, render_template, request, Response
+
+from .auth_management import AuthorizationManager
+
+
+class FragmentManager:
+    """
+    In-memory cache of the rendered load_* HTML fragments.
+
+    The component templates depend only on the user's role and static data,
+    so each is rendered once per (template, roles, locale, template mtime)
+    and then served from memory with an ETag. Editing a template changes its
+    mtime, which misses the cache and evicts the stale renders.
+    """
+
+    SUPPORTED_LOCALES = ("he",)
+    DEFAULT_LOCALE = "he"
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _locale(cls) -> str:
+        return (
+            request.accept_languages.best_match(cls.SUPPORTED_LOCALES)
+            or cls.DEFAULT_LOCALE
+        )
+
+    @classmethod
+    def _template_mtime(cls, template_name: str) -> float:
+        path = os.path.join(current_app.template_folder, template_name)
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            # let render_template raise the usual TemplateNotFound
+            return 0.0
+
+    @classmethod
+    def _get_or_render(cls, template_name: str) -> tuple[bytes, str]:
+        roles = tuple(sorted(AuthorizationManager.get_roles()))
+        mtime = cls._template_mtime(template_name)
+        key = (template_name, roles, cls._locale(), mtime)
+
+        entry = cls._cache.get(key)
+        if entry is not None:
+            return entry
+
+        with cls._lock:
+            # evict renders of older versions of this template
+            stale = [k for k in cls._cache if k[0] == template_name and k[3] != mtime]
+            for k in stale:
+                cls._cache.pop(k, None)
+
+        # Jinja keeps compiled templates too (no auto-reload outside debug)
+        if stale and current_app.jinja_env.cache is not None:
+            current_app.jinja_env.cache.clear()
+
+        body = render_template(template_name).encode("utf-8")
+        entry = (body, hashlib.sha256(body).hexdigest())
+
+        with cls._lock:
+            cls._cache[key] = entry
+        return entry
+
+    @classmethod
+    def render(cls, template_name: str):
+        """
+        Serve a fragment from the cache (rendering it on first use).
+        Conditional requests (If-None-Match) are answered with 304.
+        """
+        body, etag = cls._get_or_render(template_name)
+
+        resp = Response(body, mimetype="text/html")
+        resp.set_etag(etag)
+        return resp.make_conditional(request)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._cache.clear()
@@ -1,34 +1,90 @@
 # app/managers/json_management.py
+import copy
+import hashlib
 import json
+import threading
+from collections import namedtuple
 from pathlib import Path
-from flask import jsonify
+from types import MappingProxyType
+from flask import request, Response
+
+
+# One parsed catalog: data, its serialized bytes, content hash and source mtime
+CatalogEntry = namedtuple("CatalogEntry", ["data", "body", "etag", "mtime"])
 
 
 class JSONManager:
     """
     Utility class for loading predefined JSON data lists from data/jsons directory.
+
+    Catalogs are parsed once into an immutable in-memory store together with
+    their serialized bytes and content hash. A cheap mtime check on access
+    hot-reloads a catalog when its file changes on disk.
     """
 
     _base_path = Path(__file__).resolve().parent.parent / "data" / "jsons"
 
+    _catalogs = MappingProxyType({})
+    _lock = threading.Lock()
+
     @classmethod
-    def load(cls, filename: str):
+    def preload(cls):
         """
-        Load a JSON file by name (without path).
-        Example: JSONManager.load("roles.json")
+        Load every catalog under data/jsons once, at application startup.
+        """
+        for file_path in sorted(cls._base_path.glob("*.json")):
+            cls._get_entry(file_path.name)
+
+    @classmethod
+    def _read_entry(cls, file_path: Path, mtime: float) -> CatalogEntry:
+        with open(file_path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        etag = hashlib.sha256(body).hexdigest()
+        return CatalogEntry(data=data, body=body, etag=etag, mtime=mtime)
+
+    @classmethod
+    def _get_entry(cls, filename: str) -> CatalogEntry:
+        """
+        Return the cached catalog entry, re-reading the file only if its mtime changed.
         """
         file_path = cls._base_path / filename
 
-        if not file_path.exists():
+        try:
+            mtime = file_path.stat().st_mtime
+        except FileNotFoundError:
             raise FileNotFoundError(f"JSON file not found: {file_path}")
 
-        with open(file_path, encoding="utf-8") as f:
-            return json.load(f)
+        entry = cls._catalogs.get(filename)
+        if entry is not None and entry.mtime == mtime:
+            return entry
+
+        with cls._lock:
+            entry = cls._catalogs.get(filename)
+            if entry is None or entry.mtime != mtime:
+                entry = cls._read_entry(file_path, mtime)
+                # copy-on-write: readers never see a half-updated store
+                cls._catalogs = MappingProxyType({**cls._catalogs, filename: entry})
+        return entry
+
+    @classmethod
+    def load(cls, filename: str):
+        """
+        Load a JSON file by name (without path).
+        Example: JSONManager.load("roles.json")
+        Returns a copy, so callers can't mutate the shared catalog.
+        """
+        return copy.deepcopy(cls._get_entry(filename).data)
 
     @classmethod
     def jsonify(cls, filename: str):
         """
-        Load the file and return Flask `jsonify` response.
+        Return the catalog as a JSON response from its precomputed bytes.
+        Conditional requests (If-None-Match) are answered with 304.
         """
-        data = cls.load(filename)
-        return jsonify(data)
+        entry = cls._get_entry(filename)
+
+        resp = Response(entry.body, mimetype="application/json")
+        resp.set_etag(entry.etag)
+        return resp.make_conditional(request)
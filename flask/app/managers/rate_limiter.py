@@ -1,53 +1,183 @@
 # app/managers/rate_limiter.py
+import math
+import threading
 import time
+import uuid
 from functools import wraps
 from flask import request, current_app
 from .response_management import ResponseManager
 
 
+# Sliding-window log, several keys checked and recorded in one atomic call.
+# KEYS: one sorted set per scope (ip / username / office ...)
+# ARGV: now_ms, window_ms, limit, member
+# Returns {allowed (1/0), retry_after_ms}
+_SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+    if redis.call('ZCARD', key) >= limit then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        local wait = tonumber(oldest[2]) + window - now
+        if wait > retry_after then
+            retry_after = wait
+        end
+    end
+end
+
+if retry_after > 0 then
+    return {0, retry_after}
+end
+
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[4])
+    redis.call('PEXPIRE', key, window)
+end
+return {1, 0}
+"""
+
+
 class RateLimiter:
+    """
+    Sliding-window rate limiting backed by a single Redis Lua call per request.
+
+        @RateLimiter.limit(
+            limit=5,
+            window_seconds=60,
+            key_funcs=(RateLimiter.by_ip, RateLimiter.by_field("username")),
+        )
+
+    Every key function contributes one scope; the request is allowed only if
+    all scopes are under the limit, and is then counted in all of them.
+    Obvious floods from one IP are rejected by an in-process pre-filter
+    before Redis is touched. Rejections carry a Retry-After header.
+    """
+
+    # Local pre-filter: reject an IP once it made PREFILTER_FACTOR x limit
+    # attempts within one window in this process alone.
+    PREFILTER_FACTOR = 3
+    PREFILTER_MAX_ENTRIES = 10_000
+
+    _local_hits = {}
+    _local_lock = threading.Lock()
+
+    _script = None
+    _script_client = None
+
     @staticmethod
     def _redis():
         return current_app.config["SESSION_REDIS"]
 
+    @classmethod
+    def _sliding_window(cls):
+        client = cls._redis()
+        if cls._script is None or cls._script_client is not client:
+            # EVALSHA with automatic fallback to EVAL on NOSCRIPT
+            cls._script = client.register_script(_SLIDING_WINDOW_LUA)
+            cls._script_client = client
+        return cls._script
+
+    # ---------------------- KEY FUNCTIONS ----------------------
+
     @staticmethod
-    def hit(key_prefix: str, limit: int, window_seconds: int):
+    def by_ip(req):
+        return "ip", req.remote_addr or "unknown"
+
+    @staticmethod
+    def by_field(name: str, *aliases: str):
+        """Scope on a form/JSON field (username, office_code, email ...)."""
+
+        def key_func(req):
+            payload = (req.get_json(silent=True) if req.is_json else req.form) or {}
+            for field in (name, *aliases):
+                value = str(payload.get(field) or "").strip().lower()
+                if value:
+                    return name, value
+            return None
+
+        return key_func
+
+    # ---------------------- CHECKS ----------------------
+
+    @classmethod
+    def _prefilter(cls, key: str, limit: int, window_seconds: int):
         """
-        Increase attempts counter in Redis and return False if limit exceeded.
+        Count the attempt locally; return seconds to wait if this process
+        alone has already seen a flood from the key, else None.
         """
-        bucket = int(time.time() // window_seconds)
-        key = f"{key_prefix}:{bucket}"
+        now = time.monotonic()
+        threshold = limit * cls.PREFILTER_FACTOR
 
-        redis = RateLimiter._redis()
-        attempts = redis.incr(key)
+        with cls._local_lock:
+            if len(cls._local_hits) >= cls.PREFILTER_MAX_ENTRIES:
+                cls._local_hits = {
+                    k: v for k, v in cls._local_hits.items() if v[0] + window_seconds > now
+                }
 
-        if attempts == 1:
-            redis.expire(key, window_seconds)
+            started, count = cls._local_hits.get(key, (now, 0))
+            if started + window_seconds <= now:
+                started, count = now, 0
+            count += 1
+            cls._local_hits[key] = (started, count)
 
-        return attempts <= limit
+        if count > threshold:
+            return started + window_seconds - now
+        return None
+
+    @classmethod
+    def hit(cls, keys: list, limit: int, window_seconds: int):
+        """
+        Check and record one attempt against all keys atomically.
+        Returns (allowed, retry_after_seconds).
+        """
+        now_ms = int(time.time() * 1000)
+        allowed, retry_after_ms = cls._sliding_window()(
+            keys=keys,
+            args=[now_ms, window_seconds * 1000, limit, f"{now_ms}:{uuid.uuid4().hex}"],
+        )
+        return bool(allowed), int(retry_after_ms) / 1000
 
     @staticmethod
-    def limit(limit: int, window_seconds: int = 60, key_func=None):
+    def _too_many(retry_after: float):
+        resp, status = ResponseManager.error(
+            "Too many attempts. Try again later.", status=429
+        )
+        resp.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return resp, status
+
+    @classmethod
+    def limit(cls, limit: int, window_seconds: int = 60, key_funcs=None):
         """
         Decorator for Flask routes.
-        key_func = function that receives request and returns a key string.
+        key_funcs = functions that receive the request and return a
+        (scope, value) pair, or None to skip that scope. Default: IP only.
         """
+        key_funcs = tuple(key_funcs or (cls.by_ip,))
 
         def decorator(func):
             @wraps(func)
             def wrapper(*args, **kwargs):
-                # default key: IP address
-                key_prefix = (
-                    key_func(request)
-                    if key_func
-                    else f"rl:{request.remote_addr or 'unknown'}"
-                )
-
-                allowed = RateLimiter.hit(key_prefix, limit, window_seconds)
+                prefix = f"rl:{request.endpoint}"
+
+                ip = request.remote_addr or "unknown"
+                local_wait = cls._prefilter(f"{prefix}:{ip}", limit, window_seconds)
+                if local_wait is not None:
+                    current_app.logger.warning(f"🚫 Rate limit pre-filter: {ip} on {request.endpoint}")
+                    return cls._too_many(local_wait)
+
+                keys = [
+                    f"{prefix}:{scope[0]}:{scope[1]}"
+                    for scope in (key_func(request) for key_func in key_funcs)
+                    if scope
+                ]
+
+                allowed, retry_after = cls.hit(keys, limit, window_seconds)
                 if not allowed:
-                    return ResponseManager.error(
-                        "Too many attempts. Try again later.", status=429
-                    )
+                    return cls._too_many(retry_after)
 
                 return func(*args, **kwargs)
 
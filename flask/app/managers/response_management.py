@@ -1,7 +1,9 @@
 # app/managers/response_management.py
 from flask import jsonify, current_app
 from http import HTTPStatus
-import json
+
+
+_UNCLAIMED = object()
 
 
 class ResponseManager:
@@ -55,19 +57,28 @@ class ResponseManager:
             raise ValueError("Expected ResponseManager response format")
 
         resp, status = response
-        try:
-            payload = json.loads(resp.get_data(as_text=True))
-        except Exception as e:
-            raise ValueError(f"Invalid JSON in ResponseManager response: {e}")
+        # parsed once per response; the status getters (is_success, ...) reuse it
+        payload = getattr(resp, "parsed_payload", None)
+        if payload is None:
+            payload = ResponseManager._loads(resp)
+            # the data is handed to the first get_data() caller and never shared
+            resp.parsed_data = payload.pop("data", None)
+            resp.parsed_payload = payload
 
         return {
             "success": payload.get("success", False),
             "message": payload.get("message"),
             "error": payload.get("error"),
-            "data": payload.get("data"),
             "status": status,
         }
 
+    @staticmethod
+    def _loads(resp) -> dict:
+        try:
+            return current_app.json.loads(resp.get_data())
+        except Exception as e:
+            raise ValueError(f"Invalid JSON in ResponseManager response: {e}")
+
     # ---------------------- GETTERS ----------------------
 
     @staticmethod
@@ -84,7 +95,13 @@ class ResponseManager:
 
     @staticmethod
     def get_data(response: tuple):
-        return ResponseManager._parse(response).get("data")
+        """The response data; callers own it (every call returns a separate object)."""
+        ResponseManager._parse(response)
+        resp = response[0]
+        data = resp.__dict__.pop("parsed_data", _UNCLAIMED)
+        if data is _UNCLAIMED:
+            data = ResponseManager._loads(resp).get("data")
+        return data
 
     @staticmethod
     def get_status(response: tuple) -> int:
@@ -0,0 +1,164 @@
+# app/managers/session_management.py
+import time
+from flask import current_app, request
+from flask.sessions import SessionInterface
+from flask_session.redis import RedisSessionInterface
+from itsdangerous import BadSignature, Signer
+from werkzeug.exceptions import HTTPException
+
+
+class SessionManager:
+    """
+    Session heartbeat without a round-trip to the session store.
+
+    Every response that saves a logged-in session also stamps a small signed
+    cookie with the session's expiry time (the same lifetime Flask-Session
+    gives the Redis key). The heartbeat route is session-free: it only checks
+    that cookie, so it neither loads the session from Redis nor writes it back
+    (which would also keep an idle session alive forever). Health probes,
+    /metrics and static files are session-free as well.
+
+        @site_bp.route("/session/heartbeat")
+        @SessionManager.session_free
+        def session_heartbeat(): ...
+    """
+
+    EXPIRY_COOKIE_NAME = "session_expires"
+    EXPIRY_SALT = "session-expiry"
+
+    # Endpoints we don't own (so can't decorate) that never need a session
+    SESSION_FREE_ENDPOINTS = ("static", "prometheus_metrics")
+
+    # ---------------------- DECLARATIONS ----------------------
+
+    @staticmethod
+    def session_free(func):
+        """Route never opens or saves the session (flask.session is a NullSession)."""
+        func.session_free = True
+        return func
+
+    @staticmethod
+    def is_session_free(app, req) -> bool:
+        # Flask opens the session before routing, so match the URL here
+        try:
+            rule, _ = app.create_url_adapter(req).match(return_rule=True)
+        except HTTPException:
+            return False
+        if rule.endpoint in SessionManager.SESSION_FREE_ENDPOINTS:
+            return True
+        view = app.view_functions.get(rule.endpoint)
+        return getattr(view, "session_free", False)
+
+    # ---------------------- EXPIRY COOKIE ----------------------
+
+    @classmethod
+    def _signer(cls, app) -> Signer:
+        return Signer(app.secret_key, salt=cls.EXPIRY_SALT)
+
+    @classmethod
+    def stamp_expiry(cls, app, interface, session, response):
+        """Refresh (or drop, once logged out) the signed expiry cookie."""
+        path = interface.get_cookie_path(app)
+        domain = interface.get_cookie_domain(app)
+
+        if session.get("login_context") is None:
+            if cls.EXPIRY_COOKIE_NAME in request.cookies:
+                response.delete_cookie(cls.EXPIRY_COOKIE_NAME, path=path, domain=domain)
+            return
+
+        expires_at = int(time.time() + app.permanent_session_lifetime.total_seconds())
+        response.set_cookie(
+            cls.EXPIRY_COOKIE_NAME,
+            cls._signer(app).sign(str(expires_at)).decode("utf-8"),
+            expires=expires_at,
+            path=path,
+            domain=domain,
+            secure=interface.get_cookie_secure(app),
+            samesite=interface.get_cookie_samesite(app),
+            httponly=True,
+        )
+
+    @classmethod
+    def seconds_remaining(cls):
+        """Seconds until the current session expires; None if logged out or expired."""
+        value = request.cookies.get(cls.EXPIRY_COOKIE_NAME)
+        if not value:
+            return None
+
+        try:
+            expires_at = int(cls._signer(current_app).unsign(value))
+        except (BadSignature, ValueError):
+            return None
+
+        remaining = expires_at - int(time.time())
+        return remaining if remaining > 0 else None
+
+    # ---------------------- FLASK ----------------------
+
+    @classmethod
+    def init_app(cls, app):
+        """Wrap the configured session interface (call after Session(app))."""
+        app.session_interface = SessionFreeInterface(app.session_interface)
+
+
+class SessionFreeInterface(SessionInterface):
+    """
+    Delegates to the real session interface, except that:
+      - session-free routes get a NullSession, so no load/save at all
+      - an unmodified Redis session is never re-serialized and written back;
+        its sliding expiry is extended with a plain EXPIRE instead
+    """
+
+    def __init__(self, inner: SessionInterface):
+        self.inner = inner
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def open_session(self, app, request):
+        if SessionManager.is_session_free(app, request):
+            return self.make_null_session(app)
+        return self.inner.open_session(app, request)
+
+    def save_session(self, app, session, response):
+        if self._can_touch(app, session):
+            self._touch_session(app, session, response)
+        else:
+            self.inner.save_session(app, session, response)
+        SessionManager.stamp_expiry(app, self, session, response)
+
+    def _can_touch(self, app, session) -> bool:
+        return (
+            isinstance(self.inner, RedisSessionInterface)
+            and app.config["SESSION_REFRESH_EACH_REQUEST"]
+            and session.permanent
+            and not session.modified
+            and bool(session)
+        )
+
+    def _touch_session(self, app, session, response):
+        """
+        Extend the TTL of the stored session and its cookie, without rewriting it.
+        Uses RedisSessionInterface internals (client, _get_store_id, _sign,
+        use_signer) as of Flask-Session 0.8 - pinned to 0.8.x in requirements.
+        """
+        inner = self.inner
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        inner.client.expire(
+            inner._get_store_id(session.sid), app.permanent_session_lifetime
+        )
+
+        value = inner._sign(app, session.sid) if inner.use_signer else session.sid
+        response.set_cookie(
+            key=self.get_cookie_name(app),
+            value=value,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=self.get_cookie_domain(app),
+            path=self.get_cookie_path(app),
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+        response.vary.add("Cookie")
@@ -0,0 +1,155 @@
+# app/managers/usage_management.py
+import os
+from datetime import datetime, timezone
+from flask import current_app
+
+
+class UsageManager:
+    """
+    Per-office / per-case storage usage (bytes + objects), kept in Redis.
+
+        usage:office:{office}        -> hash {bytes, objects, reconciled_at}
+        usage:case:{office}:{case}   -> hash {bytes, objects}
+
+    Shared blobs (deduplicated uploads, blobs/{office}/{sha256}/{generation}) count once,
+    towards the office only.
+
+    Counters move incrementally with the upload/delete flows (HINCRBY, O(1)
+    to read). reconcile() recounts an office from the S3 listing and
+    overwrites the counters, correcting any drift from failed or racing
+    updates; scripts/reconcile_usage.py runs it for every due office.
+    """
+
+    # An office is "due" for reconciliation once its last recount is older than this
+    RECONCILE_INTERVAL = int(os.getenv("USAGE_RECONCILE_INTERVAL", str(24 * 60 * 60)))
+
+    @staticmethod
+    def _redis():
+        return current_app.config["SESSION_REDIS"]
+
+    @staticmethod
+    def _office_key(office_serial) -> str:
+        return f"usage:office:{int(office_serial)}"
+
+    @staticmethod
+    def _case_key(office_serial, case_serial) -> str:
+        return f"usage:case:{int(office_serial)}:{int(case_serial)}"
+
+    @staticmethod
+    def _as_usage(raw: dict) -> dict:
+        raw = {(k.decode() if isinstance(k, bytes) else k): v for k, v in (raw or {}).items()}
+        reconciled_at = raw.get("reconciled_at")
+        return {
+            "bytes": int(raw.get("bytes", 0)),
+            "objects": int(raw.get("objects", 0)),
+            "reconciled_at": reconciled_at.decode() if isinstance(reconciled_at, bytes) else reconciled_at,
+        }
+
+    # ---------------------- INCREMENTAL ----------------------
+
+    @classmethod
+    def record(cls, office_serial, case_serial, size: int, objects: int = 1):
+        """Add (or with negative values, remove) stored bytes/objects. Best-effort."""
+        keys = [cls._office_key(office_serial)]
+        if case_serial is not None:
+            keys.append(cls._case_key(office_serial, case_serial))
+        try:
+            pipe = cls._redis().pipeline(transaction=False)
+            for key in keys:
+                pipe.hincrby(key, "bytes", int(size))
+                pipe.hincrby(key, "objects", int(objects))
+            pipe.execute()
+        except Exception as e:
+            # the next reconciliation corrects the counters
+            current_app.logger.warning(f"⚠️ usage record failed for office {office_serial}: {e}")
+
+    @classmethod
+    def drop_case(cls, office_serial, case_serial):
+        """Case purged: take its totals off the office and forget the case."""
+        usage = cls.get_case(office_serial, case_serial)
+        try:
+            pipe = cls._redis().pipeline()
+            pipe.hincrby(cls._office_key(office_serial), "bytes", -usage["bytes"])
+            pipe.hincrby(cls._office_key(office_serial), "objects", -usage["objects"])
+            pipe.delete(cls._case_key(office_serial, case_serial))
+            pipe.execute()
+        except Exception as e:
+            current_app.logger.warning(f"⚠️ usage drop failed for case {case_serial}: {e}")
+
+    @classmethod
+    def drop_office(cls, office_serial):
+        """Office deleted: forget all of its counters."""
+        try:
+            client = cls._redis()
+            case_keys = list(client.scan_iter(match=f"usage:case:{int(office_serial)}:*", count=500))
+            client.delete(cls._office_key(office_serial), *case_keys)
+        except Exception as e:
+            current_app.logger.warning(f"⚠️ usage drop failed for office {office_serial}: {e}")
+
+    # ---------------------- READ (O(1)) ----------------------
+
+    @classmethod
+    def get_office(cls, office_serial) -> dict:
+        return cls._as_usage(cls._redis().hgetall(cls._office_key(office_serial)))
+
+    @classmethod
+    def get_case(cls, office_serial, case_serial) -> dict:
+        return cls._as_usage(cls._redis().hgetall(cls._case_key(office_serial, case_serial)))
+
+    @classmethod
+    def get_offices(cls, office_serials) -> dict:
+        """{serial: usage} for many offices in one round-trip (admin offices table)."""
+        pipe = cls._redis().pipeline(transaction=False)
+        for serial in office_serials:
+            pipe.hgetall(cls._office_key(serial))
+        return {serial: cls._as_usage(raw) for serial, raw in zip(office_serials, pipe.execute())}
+
+    # ---------------------- RECONCILIATION ----------------------
+
+    @classmethod
+    def reconcile(cls, office_serial, objects) -> dict:
+        """
+        Recount an office from its S3 listing and overwrite the counters.
+        objects = iterable of {"key", "size"} under uploads/{office}/ and
+        blobs/{office}/ (streamed); blobs count towards the office only.
+        """
+        cases, blobs = {}, [0, 0]
+        for obj in objects:
+            parts = obj["key"].split("/")
+            if parts[0] == "blobs":
+                totals = blobs
+            elif len(parts) < 3 or not parts[2].isdigit():
+                continue
+            else:
+                totals = cases.setdefault(int(parts[2]), [0, 0])
+            totals[0] += int(obj.get("size") or 0)
+            totals[1] += 1
+
+        client = cls._redis()
+        stale = set(client.scan_iter(match=f"usage:case:{int(office_serial)}:*", count=500))
+
+        office = {
+            "bytes": sum(t[0] for t in cases.values()) + blobs[0],
+            "objects": sum(t[1] for t in cases.values()) + blobs[1],
+            "reconciled_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+        pipe = client.pipeline()
+        pipe.delete(cls._office_key(office_serial), *stale)
+        pipe.hset(cls._office_key(office_serial), mapping=office)
+        for case_serial, (size, count) in cases.items():
+            pipe.hset(cls._case_key(office_serial, case_serial), mapping={"bytes": size, "objects": count})
+        pipe.execute()
+
+        current_app.logger.info(
+            f"🧮 usage reconciled for office {office_serial}: {office['bytes']} bytes, {office['objects']} objects"
+        )
+        return office
+
+    @classmethod
+    def is_due(cls, office_serial) -> bool:
+        reconciled_at = cls.get_office(office_serial)["reconciled_at"]
+        if not reconciled_at:
+            return True
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(reconciled_at)
+        return age.total_seconds() >= cls.RECONCILE_INTERVAL
@@ -1,4 +1,5 @@
 from datetime import datetime, timezone
+from itertools import chain
 from werkzeug.security import check_password_hash
 from flask import Blueprint, render_template, request, flash, current_app
 
@@ -6,9 +7,12 @@ from ..services import mongodb_service, s3_service
 from ..services.webrtc_service import webrtc_store, WebRTCStoreUnavailable
 
 from ..managers.response_management import ResponseManager
+from ..managers.cache_management import CacheManager
+from ..managers.fragment_management import FragmentManager
 from ..managers.json_management import JSONManager
 from ..managers.auth_management import AuthorizationManager
 from ..managers.mfa_manager import MFAManager
+from ..managers.usage_management import UsageManager
 
 from ..constants.constants_mongodb import MongoDBEntity, MongoDBFilters, MongoDBData
 
@@ -45,6 +49,13 @@ def search_offices():
     if not data:
         return ResponseManager.not_found(error="No offices found")
 
+    # storage usage per office, one Redis round-trip for the whole table
+    try:
+        usage = UsageManager.get_offices([office.get("serial") for office in data])
+        data = [{**office, "usage": usage.get(office.get("serial"))} for office in data]
+    except Exception as e:
+        current_app.logger.warning(f"⚠️ [search_offices] usage unavailable: {e}")
+
     current_app.logger.debug(f"Returning success with data={data}")
     return ResponseManager.success(data=data)
 
@@ -76,45 +87,130 @@ def create_office():
     return ResponseManager.success(data=data)
 
 
+@admin_bp.route("/delete_office", methods=["DELETE"])
+@AuthorizationManager.login_required
+@AuthorizationManager.admin_required
+def delete_office():
+    """
+    Delete an office: registry record + tenant DB (mongodb service), then
+    purge uploads/{office}/ from S3 in the background.
+    """
+    serial = request.args.get("serial")
+    if not serial or not str(serial).isdigit():
+        return ResponseManager.bad_request(error="serial is required")
+
+    current_app.logger.debug(f"🟦 [delete_office] deleting office {serial}")
+
+    delete_res = mongodb_service.delete_office(int(serial))
+    if not ResponseManager.is_success(response=delete_res):
+        return delete_res
+    if ResponseManager.is_no_content(response=delete_res):
+        return ResponseManager.not_found(error="Office not found")
+
+    UsageManager.drop_office(int(serial))
+    purge_res = s3_service.purge_prefix(f"uploads/{int(serial)}/")
+    if not ResponseManager.is_success(response=purge_res):
+        current_app.logger.error(f"❌ [delete_office] S3 purge not started for office {serial}")
+        return ResponseManager.success(
+            data={"purge_job": None}, message="Office deleted, files were not purged"
+        )
+
+    job = ResponseManager.get_data(response=purge_res)
+    return ResponseManager.success(data={"purge_job": job.get("job_id")}, message="Office deleted")
+
+
+@admin_bp.route("/admin/purge_status", methods=["GET"])
+@AuthorizationManager.login_required
+@AuthorizationManager.admin_required
+def admin_purge_status():
+    """Progress of an S3 purge job (pages, listed, deleted, errors, status)."""
+    job_id = request.args.get("job_id")
+    if not job_id:
+        return ResponseManager.bad_request(error="job_id is required")
+    return s3_service.purge_status(job_id)
+
+
+@admin_bp.route("/admin/usage", methods=["GET"])
+@AuthorizationManager.login_required
+@AuthorizationManager.admin_required
+def admin_usage():
+    """Storage usage of an office from the counters (O(1), no S3 listing)."""
+    serial = request.args.get("office_serial")
+    if not serial or not str(serial).isdigit():
+        return ResponseManager.bad_request(error="office_serial is required")
+
+    usage = UsageManager.get_office(int(serial))
+    case_serial = request.args.get("case_serial")
+    if case_serial and str(case_serial).isdigit():
+        usage["case"] = UsageManager.get_case(int(serial), int(case_serial))
+    return ResponseManager.success(data=usage)
+
+
+@admin_bp.route("/admin/usage/reconcile", methods=["POST"])
+@AuthorizationManager.login_required
+@AuthorizationManager.admin_required
+def admin_usage_reconcile():
+    """Recount an office from the S3 listing and fix the counters."""
+    serial = request.args.get("office_serial")
+    if not serial or not str(serial).isdigit():
+        return ResponseManager.bad_request(error="office_serial is required")
+
+    try:
+        objects = chain(
+            s3_service.iter_keys(f"uploads/{int(serial)}/"), s3_service.iter_keys(f"blobs/{int(serial)}/")
+        )
+        usage = UsageManager.reconcile(int(serial), objects)
+    except Exception as e:
+        current_app.logger.error(f"❌ [usage_reconcile] office {serial}: {e}")
+        return ResponseManager.bad_gateway(error="Failed to list office files")
+    return ResponseManager.success(data=usage)
+
+
 # ---------------- LOADERS ---------------- #
 
 
 @admin_bp.route("/load_birds_view_offices")
+@CacheManager.private()
 @AuthorizationManager.login_required
 @AuthorizationManager.admin_required
 def load_birds_view_offices():
-    return render_template("admin_components/birds_view_offices.html")
+    return FragmentManager.render("admin_components/birds_view_offices.html")
 
 
 @admin_bp.route("/load_search_office")
+@CacheManager.private()
 @AuthorizationManager.login_required
 @AuthorizationManager.admin_required
 def load_search_office():
-    return render_template("admin_components/search_office.html")
+    return FragmentManager.render("admin_components/search_office.html")
 
 
 @admin_bp.route("/load_new_office")
+@CacheManager.private()
 @AuthorizationManager.login_required
 @AuthorizationManager.admin_required
 def load_new_office():
-    return render_template("admin_components/new_office.html")
+    return FragmentManager.render("admin_components/new_office.html")
 
 
 @admin_bp.route("/load_view_office")
+@CacheManager.private()
 @AuthorizationManager.login_required
 @AuthorizationManager.admin_required
 def load_view_office():
-    return render_template("admin_components/view_office.html")
+    return FragmentManager.render("admin_components/view_office.html")
 
 
 @admin_bp.route("/load_admin_remote_control")
+@CacheManager.private()
 @AuthorizationManager.login_required
 @AuthorizationManager.admin_required
 def load_admin_remote_control():
-    return render_template("admin_components/admin_remote_control.html")
+    return FragmentManager.render("admin_components/admin_remote_control.html")
 
 
 @admin_bp.route("/get_roles_list")
+@CacheManager.private()
 @AuthorizationManager.login_required
 @AuthorizationManager.admin_required
 def get_roles_list():
@@ -17,9 +17,16 @@ import random
 
 from ..services import mongodb_service, ses_service
 from ..managers.response_management import ResponseManager
+from ..managers.cache_management import CacheManager
+from ..managers.fragment_management import FragmentManager
 from ..managers.mfa_manager import MFAManager
-from ..managers.auth_management import AuthenticationManager, AuthorizationManager
+from ..managers.auth_management import (
+    AuthenticationManager,
+    AuthorizationManager,
+    LoginContext,
+)
 from ..managers.rate_limiter import RateLimiter
+from ..managers.session_management import SessionManager
 from ..constants.constants_mongodb import MongoDBEntity, MongoDBFilters
 
 
@@ -30,6 +37,7 @@ site_bp = Blueprint("site", __name__)
 
 
 @site_bp.route("/healthz")
+@SessionManager.session_free
 def healthz():
     # current_app.logger.debug("Healthy")
     """
@@ -42,10 +50,24 @@ def healthz():
 
 
 @site_bp.route("/alb-health")
+@SessionManager.session_free
 def alb_health():
     return {"status": "ok"}, 200
 
 
+@site_bp.route("/session/heartbeat")
+@SessionManager.session_free
+def session_heartbeat():
+    """
+    Polled by session_monitor.js. Answers from the signed expiry cookie only,
+    without loading (or extending) the Redis session.
+    """
+    expires_in = SessionManager.seconds_remaining()
+    if expires_in is None:
+        return ResponseManager.unauthorized("Session expired")
+    return ResponseManager.success(data={"expires_in": expires_in})
+
+
 # ---------------- HELPERS ---------------- #
 
 """
@@ -78,14 +100,13 @@ def send_email():
     if not message:
         return ResponseManager.bad_request(error="Missing email message")
 
-    ses_service.send_email(
+    # 202 once queued; without Redis, whatever the direct send answered
+    return ses_service.enqueue_email(
         to_email=to_email,
         subject=subject,
         message=message,
     )
 
-    return ResponseManager.success(message="Email sent successfully")
-
 
 # ---------------- SITE PAGES ---------------- #
 
@@ -103,21 +124,24 @@ def home():
 
 
 @site_bp.route("/load_login")
+@CacheManager.private()
 def load_login():
     current_app.logger.debug("Login Page rendering")
-    return render_template("site_components/login.html")
+    return FragmentManager.render("site_components/login.html")
 
 
 @site_bp.route("/load_about")
+@CacheManager.private()
 def load_about():
     current_app.logger.debug("About Page rendering")
-    return render_template("site_components/about.html")
+    return FragmentManager.render("site_components/about.html")
 
 
 @site_bp.route("/load_home")
+@CacheManager.private()
 def load_home():
     current_app.logger.debug("Home Page rendering")
-    return render_template("site_components/home.html")
+    return FragmentManager.render("site_components/home.html")
 
 
 # ---------------- AUTH ROUTES ----------------
@@ -125,7 +149,14 @@ def load_home():
 
 @site_bp.route("/login", methods=["POST"])
 @AuthorizationManager.logout_required
-@RateLimiter.limit(limit=5, window_seconds=60)
+@RateLimiter.limit(
+    limit=5,
+    window_seconds=60,
+    key_funcs=(
+        RateLimiter.by_ip,
+        RateLimiter.by_field("username"),
+    ),
+)
 def login():
     """
     JSON-only login endpoint with inline MFA.
@@ -204,21 +235,14 @@ def login():
             current_app.login_metrics.labels(status='failure_mfa_code').inc()
             return ResponseManager.unauthorized("קוד MFA שגוי")
 
-    # 3) Success → establish login context + cookie and return redirect url
-    login_context["session_id"] = str(uuid.uuid4())
-    AuthorizationManager.set_login_context(ctx=login_context)
+    # 3) Success → establish login context and return redirect url
+    # (the signed session_expires cookie is stamped by SessionManager on save)
+    AuthorizationManager.set_login_context(
+        ctx=LoginContext.from_login(login_context, session_id=str(uuid.uuid4()))
+    )
 
-    expires_at = datetime.utcnow() + current_app.permanent_session_lifetime
     resp, status = ResponseManager.success(data={"redirect": url_for("site.dashboard")})
-    resp.set_cookie(
-        "session_expires",
-        str(int(expires_at.timestamp())),
-        max_age=int(current_app.permanent_session_lifetime.total_seconds()),
-        httponly=False,  # keep as in current app semantics
-        samesite="Lax",
-        path="/",
-    )
-    
+
     current_app.login_metrics.labels(status='success').inc()
     return resp, status
 
@@ -318,7 +342,15 @@ def _match_recovery_user_by_office_and_username(office_serial: int, username: st
 
 @site_bp.route("/password/recovery/verify-user", methods=["POST"])
 @AuthorizationManager.logout_required
-@RateLimiter.limit(limit=20, window_seconds=600)
+@RateLimiter.limit(
+    limit=20,
+    window_seconds=600,
+    key_funcs=(
+        RateLimiter.by_ip,
+        RateLimiter.by_field("office_code", "office_serial"),
+        RateLimiter.by_field("username"),
+    ),
+)
 def password_recovery_verify_user():
     """
     שלב 0 (אופציונלי בפרונט): אימות התאמה בין קוד משרד לשם משתמש.
@@ -362,7 +394,15 @@ def password_recovery_verify_user():
 
 @site_bp.route("/password/recovery/send-code", methods=["POST"])
 @AuthorizationManager.logout_required
-@RateLimiter.limit(limit=5, window_seconds=300)
+@RateLimiter.limit(
+    limit=5,
+    window_seconds=300,
+    key_funcs=(
+        RateLimiter.by_ip,
+        RateLimiter.by_field("office_code", "office_serial"),
+        RateLimiter.by_field("username"),
+    ),
+)
 def password_recovery_send_code():
     payload = request.get_json(silent=True) or {}
     office_serial, error_response = _get_office_serial_from_payload(payload)
@@ -424,7 +464,13 @@ def password_recovery_send_code():
         f"{code}\n"
         "הקוד תקף לזמן מוגבל, אנא אל תשתף אותו עם אחרים."
     )
-    ses_service.send_email(to_email=user_email, subject=subject, message=message)
+    email_res = ses_service.enqueue_email(to_email=user_email, subject=subject, message=message)
+    if not ResponseManager.is_success(email_res):
+        # the user still gets the generic answer; the failure must not go unnoticed
+        current_app.logger.error(
+            f"❌ password recovery: code email not sent to user='{username}' "
+            f"(office_serial={office_serial}): {ResponseManager.get_error(email_res)}"
+        )
 
     current_app.logger.debug(
         f"password recovery: generated code '{code}' for user='{username}' "
@@ -439,7 +485,15 @@ def password_recovery_send_code():
 
 @site_bp.route("/password/recovery/verify-code", methods=["POST"])
 @AuthorizationManager.logout_required
-@RateLimiter.limit(limit=10, window_seconds=600)
+@RateLimiter.limit(
+    limit=10,
+    window_seconds=600,
+    key_funcs=(
+        RateLimiter.by_ip,
+        RateLimiter.by_field("office_code", "office_serial"),
+        RateLimiter.by_field("username"),
+    ),
+)
 def password_recovery_verify_code():
     """
     שלב 2: אימות קוד האימות שהוזן ע"י המשתמש.
@@ -548,7 +602,15 @@ def password_recovery_reset():
 
 @site_bp.route("/username/recovery/send-username", methods=["POST"])
 @AuthorizationManager.logout_required
-@RateLimiter.limit(limit=5, window_seconds=300)
+@RateLimiter.limit(
+    limit=5,
+    window_seconds=300,
+    key_funcs=(
+        RateLimiter.by_ip,
+        RateLimiter.by_field("office_code", "office_serial"),
+        RateLimiter.by_field("email"),
+    ),
+)
 def username_recovery_send_username():
     payload = request.get_json(silent=True) or {}
 
@@ -598,12 +660,18 @@ def username_recovery_send_username():
 
     subject = "שחזור שם משתמש - Legi-Bit"
     message = f"שם המשתמש שלך למערכת הוא: {username}"
-    ses_service.send_email(to_email=user_email, subject=subject, message=message)
-
-    current_app.logger.info(
-        f"username recovery: sent username to '{user_email}' "
-        f"(office_serial={office_serial}, username='{username}')"
-    )
+    email_res = ses_service.enqueue_email(to_email=user_email, subject=subject, message=message)
+    if not ResponseManager.is_success(email_res):
+        # the user still gets the generic answer; the failure must not go unnoticed
+        current_app.logger.error(
+            f"❌ username recovery: email not sent to '{user_email}' "
+            f"(office_serial={office_serial}): {ResponseManager.get_error(email_res)}"
+        )
+    else:
+        current_app.logger.info(
+            f"username recovery: sent username to '{user_email}' "
+            f"(office_serial={office_serial}, username='{username}')"
+        )
     return ResponseManager.success(
         message=_GENERIC_USERNAME_RECOVERY_MSG,
         data={"sent": True},
@@ -2,18 +2,26 @@
 from datetime import datetime, timezone
 from urllib import response
 import os
+import re
+import uuid
 from werkzeug.security import check_password_hash
-from flask import Blueprint, render_template, request, flash, current_app, redirect, Response, stream_with_context
+from flask import Blueprint, render_template, request, flash, current_app, redirect, Response
+from redis.exceptions import RedisError
 
 from ..services import mongodb_service, s3_service
+from ..services.http_client import gather_service_requests
 from ..services.webrtc_service import webrtc_store, WebRTCStoreUnavailable
 
 from ..managers.response_management import ResponseManager
+from ..managers.cache_management import CacheManager
+from ..managers.fragment_management import FragmentManager
 from ..managers.json_management import JSONManager
 from ..managers.auth_management import AuthorizationManager
 from ..managers.mfa_manager import MFAManager
+from ..managers.usage_management import UsageManager
+from ..managers.export_management import CaseExportManager
 
-from ..constants.constants_mongodb import MongoDBEntity, MongoDBFilters, MongoDBData
+from ..constants.constants_mongodb import MongoDBEntity, MongoDBFilters, MongoDBData, MongoDBSort
 from ..utils.file_utils import sanitize_filename
 
 
@@ -28,6 +36,16 @@ def auth_debug():
 
 
 # ---------------- HELPERS ---------------- #
+def _office_upload_key(office_serial, key):
+    """
+    Upload keys come from the client: only this office's uploads/ or blobs/
+    prefix may be written, and no '..' segment may climb out of it.
+    """
+    if not isinstance(key, str) or ".." in key.split("/"):
+        return False
+    return key.startswith((f"uploads/{office_serial}/", f"blobs/{office_serial}/"))
+
+
 @user_bp.route("/presign/post", methods=["POST"])
 @AuthorizationManager.login_required
 def proxy_presign_post():
@@ -43,6 +61,8 @@ def proxy_presign_post():
 
     if not all([file_name, file_type, file_size, key]):
         return ResponseManager.bad_request("Missing required fields")
+    if not _office_upload_key(AuthorizationManager.get_office_serial(), key):
+        return ResponseManager.forbidden("Key outside of your office")
 
     s3_res = s3_service.generate_presigned_post(
         filename=file_name, filetype=file_type, filesize=file_size, key=key
@@ -51,6 +71,220 @@ def proxy_presign_post():
     return s3_res
 
 
+# Upper bound for one /presign/batch call (one drop of documents on a case)
+PRESIGN_BATCH_MAX_FILES = 50
+
+
+@user_bp.route("/presign/batch", methods=["POST"])
+@AuthorizationManager.login_required
+def proxy_presign_batch():
+    """
+    Batch presign for a multi-file drop on a case:
+      1. Validate every file (extension per upload_extensions.json, size in the S3 service)
+      2. Reserve all file serials ("pending" FILES records) in one call
+      3. Presign all POST policies in one call
+    Body JSON:
+      { "case_serial": <int>, "created_at": "...",
+        "files": [{ "file_name", "file_type", "file_size", "sha256",
+                    "client_serial", "technical_type", "content_type", "description" }, ...] }
+    Returns [{ "serial", "key", "presigned", "safe_name", "deduplicated" }, ...] in request order.
+    With FILE_DEDUP, files the office already stores come back deduplicated
+    (available, no presigned policy) and new hashed files upload to their blob key.
+    """
+    office_serial = AuthorizationManager.get_office_serial()
+    user_serial = AuthorizationManager.get_user_serial()
+    if not office_serial:
+        return ResponseManager.bad_request("Missing 'office_serial' in auth")
+    if not user_serial:
+        return ResponseManager.bad_request("Missing 'user_serial' in auth")
+
+    data = request.get_json(silent=True) or {}
+    case_serial = data.get("case_serial")
+    files = data.get("files")
+
+    if not case_serial:
+        return ResponseManager.bad_request("Missing 'case_serial'")
+    if not files or not isinstance(files, list):
+        return ResponseManager.bad_request("Missing 'files'")
+    if len(files) > PRESIGN_BATCH_MAX_FILES:
+        return ResponseManager.bad_request(f"Too many files (max {PRESIGN_BATCH_MAX_FILES})")
+
+    # 1) validate all entries before anything is created
+    allowed_extensions = set(JSONManager.load("upload_extensions.json")["allowed_extensions"])
+    errors = []
+    for index, f in enumerate(files):
+        f = f if isinstance(f, dict) else {}
+        file_name = sanitize_filename(f.get("file_name"))
+        ext = file_name.rsplit(".", 1)[-1].lower() if file_name and "." in file_name else ""
+        if not all([file_name, f.get("file_type"), f.get("file_size")]):
+            errors.append(f"#{index}: missing required fields")
+        elif ext not in allowed_extensions:
+            errors.append(f"#{index} {file_name}: file type '{ext}' is not allowed")
+    if errors:
+        return ResponseManager.bad_request("; ".join(errors))
+
+    # content hashes: which files are already stored (one lookup for the batch)
+    hashes = [_dedup_hash(f.get("sha256")) for f in files]
+    stored = _stored_blobs(office_serial, {h for h in hashes if h})
+    # one blob per content, also for duplicates within this batch
+    blob_keys = {h: stored.get(h) or _new_blob_key(office_serial, h) for h in hashes if h}
+
+    # 2) reserve serials: all "pending" file records in one insert
+    documents = [
+        {
+            "created_at": data.get("created_at"),
+            "user_serial": user_serial,
+            "case_serial": case_serial,
+            "client_serial": f.get("client_serial", data.get("client_serial")),
+            "name": sanitize_filename(f.get("file_name")),
+            "technical_type": f.get("technical_type") or f.get("file_type"),
+            "content_type": f.get("content_type"),
+            "description": f.get("description"),
+            "status": "available" if sha256 in stored else "pending",
+            **({"sha256": sha256, "blob_key": blob_keys[sha256]} if sha256 else {}),
+        }
+        for f, sha256 in zip(files, hashes)
+    ]
+    create_res = mongodb_service.create_entities(
+        entity=MongoDBEntity.FILES, office_serial=office_serial, documents=documents
+    )
+    if not ResponseManager.is_success(create_res):
+        current_app.logger.error(f"❌ [presign_batch] Failed to reserve {len(files)} file serials")
+        return ResponseManager.internal("Failed to create files")
+    serials = ResponseManager.get_data(create_res)
+
+    # attached while a blob was being released? those upload a fresh generation
+    released = _released_blobs({doc["blob_key"] for doc in documents if doc["status"] == "available"})
+    fresh_keys = {key: _new_blob_key(office_serial, key.split("/")[2]) for key in released}
+    for doc, serial in zip(documents, serials):
+        if doc["status"] == "available" and doc["blob_key"] in released:
+            doc.update(status="pending", blob_key=fresh_keys[doc["blob_key"]])
+            mongodb_service.update_entities(
+                entity=MongoDBEntity.FILES,
+                office_serial=office_serial,
+                filters=MongoDBFilters.by_serial(serial),
+                update_data={"status": "pending", "blob_key": doc["blob_key"]},
+            )
+
+    # deduplicated files are done already: no upload, just their thumbnails
+    for doc, serial in zip(documents, serials):
+        if doc["status"] == "available":
+            _queue_preview(office_serial, {**doc, "serial": serial})
+
+    # 3) presign everything else in one call to the S3 service
+    uploads = [
+        {
+            "file_name": doc["name"],
+            "file_type": f.get("file_type"),
+            "file_size": f.get("file_size"),
+            "key": doc.get("blob_key") or f"uploads/{office_serial}/{case_serial}/{serial}/{doc['name']}",
+        }
+        for f, doc, serial in zip(files, documents, serials)
+        if doc["status"] == "pending"
+    ]
+    s3_res = s3_service.generate_presigned_posts(uploads) if uploads else ResponseManager.success(data=[])
+    if not ResponseManager.is_success(s3_res):
+        # nothing was uploaded yet – drop the reserved records
+        mongodb_service.delete_entities(
+            entity=MongoDBEntity.FILES,
+            office_serial=office_serial,
+            filters=MongoDBFilters.by_serials(serials),
+        )
+        return s3_res
+
+    presigned = iter(ResponseManager.get_data(s3_res))
+    items = []
+    for doc, serial in zip(documents, serials):
+        if doc["status"] == "available":
+            items.append({
+                "serial": serial, "key": doc["blob_key"], "presigned": None,
+                "safe_name": doc["name"], "deduplicated": True,
+            })
+        else:
+            items.append({"serial": serial, **next(presigned), "deduplicated": False})
+    if stored:
+        current_app.logger.info(f"♻️ [presign_batch] {len(items) - len(uploads)} of {len(items)} files deduplicated")
+    return ResponseManager.success(data=items)
+
+
+@user_bp.route("/presign/multipart/start", methods=["POST"])
+@AuthorizationManager.login_required
+def proxy_multipart_start():
+    """
+    Proxy route – open a multipart upload for large files.
+    Returns upload_id, part_size and part_count.
+    """
+    data = request.get_json(silent=True) or {}
+    file_name = sanitize_filename(data.get("file_name"))
+    file_type = data.get("file_type")
+    file_size = data.get("file_size")
+    key = data.get("key")
+
+    if not all([file_name, file_type, file_size, key]):
+        return ResponseManager.bad_request("Missing required fields")
+    if not _office_upload_key(AuthorizationManager.get_office_serial(), key):
+        return ResponseManager.forbidden("Key outside of your office")
+
+    return s3_service.start_multipart_upload(
+        filename=file_name, filetype=file_type, filesize=file_size, key=key
+    )
+
+
+@user_bp.route("/presign/multipart/part", methods=["POST"])
+@AuthorizationManager.login_required
+def proxy_multipart_part():
+    """
+    Proxy route – presigned PUT URLs for a batch of parts (also used to retry a failed part).
+    """
+    data = request.get_json(silent=True) or {}
+    key = data.get("key")
+    upload_id = data.get("upload_id")
+    part_numbers = data.get("part_numbers")
+
+    if not all([key, upload_id, part_numbers]):
+        return ResponseManager.bad_request("Missing required fields")
+    if not _office_upload_key(AuthorizationManager.get_office_serial(), key):
+        return ResponseManager.forbidden("Key outside of your office")
+
+    return s3_service.presign_multipart_parts(key=key, upload_id=upload_id, part_numbers=part_numbers)
+
+
+@user_bp.route("/presign/multipart/complete", methods=["POST"])
+@AuthorizationManager.login_required
+def proxy_multipart_complete():
+    """
+    Proxy route – assemble the uploaded parts ([{part_number, etag}]).
+    """
+    data = request.get_json(silent=True) or {}
+    key = data.get("key")
+    upload_id = data.get("upload_id")
+
+    if not all([key, upload_id]):
+        return ResponseManager.bad_request("Missing required fields")
+    if not _office_upload_key(AuthorizationManager.get_office_serial(), key):
+        return ResponseManager.forbidden("Key outside of your office")
+
+    return s3_service.complete_multipart_upload(key=key, upload_id=upload_id, parts=data.get("parts"))
+
+
+@user_bp.route("/presign/multipart/abort", methods=["POST"])
+@AuthorizationManager.login_required
+def proxy_multipart_abort():
+    """
+    Proxy route – abort an unfinished multipart upload.
+    """
+    data = request.get_json(silent=True) or {}
+    key = data.get("key")
+    upload_id = data.get("upload_id")
+
+    if not all([key, upload_id]):
+        return ResponseManager.bad_request("Missing required fields")
+    if not _office_upload_key(AuthorizationManager.get_office_serial(), key):
+        return ResponseManager.forbidden("Key outside of your office")
+
+    return s3_service.abort_multipart_upload(key=key, upload_id=upload_id)
+
+
 # ---------------- BASE DASHBOARD ---------------- #
 
 
@@ -62,6 +296,33 @@ def base_user_dashboard():
     )
 
 
+# ---------------- SESSION CONTEXT ---------------- #
+
+
+@user_bp.route("/me", methods=["GET"])
+@CacheManager.private()
+@AuthorizationManager.login_required
+def me():
+    """
+    Return the slim login context (user, roles, office, MFA status)
+    in one call, replacing the get_username / get_office_* / get_user_serial
+    round-trips. Clients revalidate with If-None-Match and get 304 while the
+    session is unchanged.
+    """
+    ctx = AuthorizationManager.get_dashboard_context()
+    etag = AuthorizationManager.get_dashboard_context_etag(ctx)
+
+    # nginx gzip turns the ETag weak (W/"..."), so compare weakly
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        return resp
+
+    resp, status = ResponseManager.success(data=ctx)
+    resp.set_etag(etag)
+    return resp, status
+
+
 # ---------------- Office MANAGEMENT ---------------- #
 
 
@@ -509,6 +770,245 @@ def create_new_file():
     return ResponseManager.success(data=new_file_serial)
 
 
+def _find_file_key(office_serial, file_serial):
+    """
+    Load a file document of the office and build the S3 key of its bytes
+    (the shared blob for deduplicated files, else its own uploads/ key).
+    Returns (file_doc, key, None) or (None, None, error_response).
+    """
+    file_res = mongodb_service.search_entities(
+        entity=MongoDBEntity.FILES,
+        office_serial=office_serial,
+        filters=MongoDBFilters.by_serial(int(file_serial)),
+        limit=1
+    )
+
+    if not ResponseManager.is_success(response=file_res):
+        return None, None, file_res
+
+    if ResponseManager.is_no_content(response=file_res):
+        return None, None, ResponseManager.not_found("File not found")
+
+    file_doc = ResponseManager.get_data(response=file_res)[0]
+
+    case_serial = file_doc.get("case_serial")
+    file_name = file_doc.get("name")
+    if not case_serial or not file_name:
+        return None, None, ResponseManager.internal("File metadata incomplete (missing case or name)")
+
+    if file_doc.get("blob_key") and not _file_blob_key(office_serial, file_doc):
+        return None, None, ResponseManager.internal("File metadata invalid (blob key)")
+
+    key = file_doc.get("blob_key") or _upload_key(office_serial, file_doc)
+    return file_doc, key, None
+
+
+def _upload_key(office_serial, file_doc):
+    """The file's own uploads/ key (previews are always keyed by it)."""
+    return f"uploads/{office_serial}/{file_doc['case_serial']}/{file_doc['serial']}/{file_doc['name']}"
+
+
+def _queue_preview(office_serial, file_doc):
+    """Render the thumbnail in the background (best-effort)."""
+    preview_res = s3_service.generate_preview(
+        _upload_key(office_serial, file_doc), source=_file_blob_key(office_serial, file_doc)
+    )
+    if not ResponseManager.is_success(preview_res):
+        current_app.logger.warning(f"⚠️ Preview not queued for file {file_doc.get('serial')}")
+
+
+# ---------------- CONTENT-ADDRESSED FILES ---------------- #
+# With FILE_DEDUP on, identical documents of an office are stored once under
+# blobs/{office}/{sha256}/{generation}; every FILES record of that content
+# carries the blob_key, and those records are the blob's reference count.
+#
+# Releasing a blob and attaching a new record to it are ordered through a
+# tombstone (Redis, blob:released:{key}):
+#   release: write tombstone -> look up references -> delete if none
+#   attach:  write the record -> check tombstone -> on a tombstone, move the
+#            record to a fresh generation and upload instead
+# Whichever runs second sees the other's write, so no record is left on a
+# deleted object. A new generation never reuses a key that may be deleting.
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+BLOB_GENERATION_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+BLOB_TOMBSTONE_TTL = 300  # longer than any release (lookup + S3 delete)
+
+
+def _dedup_hash(value):
+    """Normalized SHA-256 hex digest, or None when dedup is off / the value isn't one."""
+    if not current_app.config.get("FILE_DEDUP") or not isinstance(value, str):
+        return None
+    value = value.lower()
+    return value if SHA256_PATTERN.match(value) else None
+
+
+def _new_blob_key(office_serial, sha256):
+    """A fresh blob generation for content about to be uploaded."""
+    return f"blobs/{office_serial}/{sha256}/{uuid.uuid4().hex}"
+
+
+def _file_blob_key(office_serial, file_doc):
+    """
+    The file's shared blob key, only if it is this office's blob for the
+    stored hash - a blob_key is never taken on trust as an S3 key.
+    """
+    blob_key, sha256 = file_doc.get("blob_key"), file_doc.get("sha256")
+    if not blob_key:
+        return None
+    prefix = f"blobs/{office_serial}/{sha256}/"
+    if (
+        not isinstance(sha256, str) or not SHA256_PATTERN.match(sha256)
+        or not isinstance(blob_key, str) or not blob_key.startswith(prefix)
+        or not BLOB_GENERATION_PATTERN.match(blob_key[len(prefix):])
+    ):
+        current_app.logger.warning(f"⚠️ Ignoring invalid blob_key on file {file_doc.get('serial')}: {blob_key!r}")
+        return None
+    return blob_key
+
+
+def _tombstone(blob_key):
+    return f"blob:released:{blob_key}"
+
+
+def _released_blobs(blob_keys):
+    """Blobs with a release in progress. Without Redis, assume all (never attach blindly)."""
+    blob_keys = list(blob_keys)
+    if not blob_keys:
+        return set()
+    try:
+        tombstones = current_app.config["SESSION_REDIS"].mget([_tombstone(k) for k in blob_keys])
+    except RedisError as e:
+        current_app.logger.warning(f"⚠️ Blob tombstones unavailable, not deduplicating: {e}")
+        return set(blob_keys)
+    return {key for key, tombstone in zip(blob_keys, tombstones) if tombstone}
+
+
+def _stored_blobs(office_serial, hashes):
+    """{sha256: blob_key} for hashes the office already stores as an uploaded blob."""
+    if not hashes:
+        return {}
+    res = mongodb_service.search_entities(
+        entity=MongoDBEntity.FILES,
+        office_serial=office_serial,
+        filters=MongoDBFilters.File.stored_by_sha256(hashes),
+        projection={"serial": 1, "sha256": 1, "blob_key": 1},
+    )
+    if not ResponseManager.is_success(res) or ResponseManager.is_no_content(res):
+        return {}
+
+    blobs = {}
+    for doc in ResponseManager.get_data(res):
+        blob_key = _file_blob_key(office_serial, doc)
+        if blob_key:
+            blobs[doc["sha256"]] = blob_key
+    released = _released_blobs(blobs.values())
+    return {sha256: key for sha256, key in blobs.items() if key not in released}
+
+
+def _release_blob(office_serial, blob_key):
+    """Delete a shared blob once no FILES record references it any more."""
+    # tombstone first: a record attached after the lookup below sees it and moves away
+    try:
+        current_app.config["SESSION_REDIS"].set(_tombstone(blob_key), 1, ex=BLOB_TOMBSTONE_TTL)
+    except RedisError as e:
+        current_app.logger.warning(f"⚠️ [release_blob] No tombstone, keeping {blob_key}: {e}")
+        return
+
+    refs_res = mongodb_service.search_entities(
+        entity=MongoDBEntity.FILES,
+        office_serial=office_serial,
+        filters=MongoDBFilters.File.by_blob_key(blob_key),
+        projection={"serial": 1},
+        limit=1,
+    )
+    if not ResponseManager.is_success(refs_res):
+        # keep the blob: a leftover object is cheaper than a broken file
+        current_app.logger.warning(f"⚠️ [release_blob] Reference lookup failed, keeping {blob_key}")
+        return
+    if not ResponseManager.is_no_content(refs_res):
+        return
+
+    size = s3_service.object_size(blob_key)
+    s3_res = s3_service.delete(blob_key)
+    if not ResponseManager.is_success(s3_res):
+        current_app.logger.error(f"❌ [release_blob] Failed to delete {blob_key} from S3")
+        return
+    if size is not None:
+        UsageManager.record(office_serial, None, -size, objects=-1)
+    current_app.logger.info(f"🗑️ [release_blob] Last reference gone, deleted {blob_key}")
+
+
+@user_bp.route("/files/dedup", methods=["POST"])
+@AuthorizationManager.login_required
+def dedup_file():
+    """
+    Content-hash step of a single upload, after create_new_file and before presigning.
+    Body JSON: { "file_serial": <int>, "sha256": "<hex>" }
+    Returns { "deduplicated", "key" }:
+      deduplicated=true  -> the office already stores these bytes; the file now
+                            points at that blob and is available, skip the upload
+      deduplicated=false -> upload to "key" (a new blob), or to the usual
+                            uploads/ key when "key" is null (dedup off / no hash)
+    """
+    office_serial = AuthorizationManager.get_office_serial()
+    if not office_serial:
+        return ResponseManager.bad_request("Missing 'office_serial' in auth")
+
+    data = request.get_json(silent=True) or {}
+    file_serial = data.get("file_serial")
+    if not file_serial or not str(file_serial).isdigit():
+        return ResponseManager.bad_request("Missing 'file_serial'")
+
+    sha256 = _dedup_hash(data.get("sha256"))
+    if not sha256:
+        return ResponseManager.success(data={"deduplicated": False, "key": None})
+
+    file_doc, _, error = _find_file_key(office_serial, file_serial)
+    if error:
+        return error
+    if file_doc.get("status") == "available":
+        return ResponseManager.conflict("File already uploaded")
+
+    blob_key = _stored_blobs(office_serial, [sha256]).get(sha256)
+    deduplicated = blob_key is not None
+
+    update_data = {"sha256": sha256, "blob_key": blob_key, "status": "available"}
+    if not deduplicated:
+        update_data = {"sha256": sha256, "blob_key": _new_blob_key(office_serial, sha256)}
+    update_res = mongodb_service.update_entities(
+        entity=MongoDBEntity.FILES,
+        office_serial=office_serial,
+        filters=MongoDBFilters.by_serial(int(file_serial)),
+        update_data=update_data,
+    )
+    if not ResponseManager.is_success(update_res):
+        return ResponseManager.internal("Failed to update file")
+
+    # attached while the blob was being released? upload a fresh generation instead
+    if deduplicated and _released_blobs([blob_key]):
+        deduplicated = False
+        update_data = {"sha256": sha256, "blob_key": _new_blob_key(office_serial, sha256), "status": "pending"}
+        update_res = mongodb_service.update_entities(
+            entity=MongoDBEntity.FILES,
+            office_serial=office_serial,
+            filters=MongoDBFilters.by_serial(int(file_serial)),
+            update_data=update_data,
+        )
+        if not ResponseManager.is_success(update_res):
+            return ResponseManager.internal("Failed to update file")
+
+    blob_key = update_data["blob_key"]
+    if deduplicated:
+        current_app.logger.info(f"♻️ [dedup_file] File {file_serial} reuses {blob_key}, upload skipped")
+        _queue_preview(office_serial, {**file_doc, **update_data})
+
+    return ResponseManager.success(data={"deduplicated": deduplicated, "key": blob_key})
+
+
+# What a client may change on its file record through update_file
+FILE_UPDATE_FIELDS = {"status", "description"}
+
+
 @user_bp.route("/update_file", methods=["PATCH"])
 @AuthorizationManager.login_required
 def update_file():
@@ -521,9 +1021,31 @@ def update_file():
         return ResponseManager.bad_request("Missing file serial")
 
     update_data = request.get_json(force=True) or {}
-    if not update_data:
+    if not update_data or not isinstance(update_data, dict):
         return ResponseManager.bad_request("Missing update payload")
 
+    # storage fields (blob_key, sha256, ...) are set by the server only
+    not_allowed = sorted(set(update_data) - FILE_UPDATE_FIELDS)
+    if not_allowed:
+        return ResponseManager.bad_request(f"Fields not updatable: {', '.join(not_allowed)}")
+    if "status" in update_data and update_data["status"] != "available":
+        return ResponseManager.bad_request("Only status 'available' can be set")
+
+    # Upload finished? read the file first, so a repeated PATCH isn't counted twice
+    upload_finished = update_data.get("status") == "available"
+    if upload_finished:
+        file_doc, key, error = _find_file_key(office_serial, file_serial)
+        new_blob = not error and bool(_file_blob_key(office_serial, file_doc)) and file_doc.get("status") != "available"
+
+        # a new shared blob must hold what its hash claims before other files reuse it
+        if new_blob:
+            verify_res = s3_service.verify_sha256(key, file_doc.get("sha256"))
+            if not ResponseManager.is_success(verify_res):
+                return verify_res
+            if not ResponseManager.get_data(verify_res).get("match"):
+                current_app.logger.warning(f"⚠️ [update_file] SHA-256 mismatch for {key}")
+                return ResponseManager.conflict("Uploaded content does not match its SHA-256")
+
     res = mongodb_service.update_entities(
         entity=MongoDBEntity.FILES,
         office_serial=office_serial,
@@ -534,14 +1056,66 @@ def update_file():
     if not ResponseManager.is_success(res):
         return ResponseManager.internal("Failed to update file")
 
+    if upload_finished:
+        if error:
+            current_app.logger.warning(f"⚠️ [update_file] Preview not queued for file {file_serial}")
+        else:
+            _queue_preview(office_serial, file_doc)
+
+        # storage usage counters (a shared blob counts towards the office only)
+        if not error and file_doc.get("status") != "available":
+            size = s3_service.object_size(key)
+            if size is not None:
+                UsageManager.record(office_serial, None if new_blob else file_doc["case_serial"], size)
+
     return ResponseManager.success()
 
 
+@user_bp.route("/upload_file_content", methods=["PUT"])
+@AuthorizationManager.login_required
+def upload_file_content():
+    """
+    Server-side upload of a pending file (clients that can't POST to S3).
+    The raw body (Content-Length required) is streamed through to the S3
+    service as it arrives - never parsed as a form or spooled here. The key
+    comes from the file record; finish with update_file(status=available).
+    """
+    office_serial = AuthorizationManager.get_office_serial()
+    if not office_serial:
+        return ResponseManager.bad_request("Missing 'office_serial' in auth")
+
+    file_serial = request.args.get("serial", "")
+    if not file_serial.isdigit():
+        return ResponseManager.bad_request("Missing file serial")
+    if request.content_length is None:
+        return ResponseManager.bad_request("Content-Length is required")
+
+    file_doc, key, error = _find_file_key(office_serial, file_serial)
+    if error:
+        return error
+    if file_doc.get("status") == "available":
+        return ResponseManager.conflict("File already uploaded")
+
+    s3_res = s3_service.create(
+        request.stream,
+        key,
+        content_type=request.mimetype or file_doc.get("content_type"),
+        content_length=request.content_length,
+    )
+    if not ResponseManager.is_success(s3_res):
+        current_app.logger.error(f"❌ [upload_file_content] Upload of file {file_serial} failed")
+        return s3_res
+
+    current_app.logger.info(f"📤 [upload_file_content] File {file_serial}: {request.content_length} bytes streamed")
+    return ResponseManager.created(data=key)
+
+
 @user_bp.route("/view_file", methods=["GET"])
 @AuthorizationManager.login_required
 def view_file():
     """
     Auth-gated proxy to stream file from S3 (hides S3 URL).
+    Supports byte ranges (206) and conditional GETs (304) for PDF viewers.
     """
     office_serial = AuthorizationManager.get_office_serial()
     file_serial = request.args.get("file_serial")
@@ -552,31 +1126,11 @@ def view_file():
         return ResponseManager.bad_request("Missing 'file_serial'")
 
     # Fetch file to verify permissions and get metadata
-    file_res = mongodb_service.search_entities(
-        entity=MongoDBEntity.FILES,
-        office_serial=office_serial,
-        filters=MongoDBFilters.by_serial(int(file_serial)),
-        limit=1
-    )
-
-    if not ResponseManager.is_success(response=file_res):
-        return file_res
-    
-    if ResponseManager.is_no_content(response=file_res):
-        return ResponseManager.not_found("File not found")
-    
-    file_list = ResponseManager.get_data(response=file_res)
-    file_doc = file_list[0]
-    
-    # Construct Key
-    case_serial = file_doc.get("case_serial")
+    file_doc, key, error = _find_file_key(office_serial, file_serial)
+    if error:
+        return error
     file_name = file_doc.get("name")
-    
-    if not case_serial or not file_name:
-         return ResponseManager.internal("File metadata incomplete (missing case or name)")
 
-    key = f"uploads/{office_serial}/{case_serial}/{file_serial}/{file_name}"
-    
     # Generate Presigned URL (internal use)
     s3_res = s3_service.generate_presigned_get(key, expires_in=60)
     
@@ -584,26 +1138,54 @@ def view_file():
         return s3_res
 
     url = ResponseManager.get_data(response=s3_res)
-    
-    # Stream from S3
-    upstream_res = s3_service.stream_download(url)
-    
-    if not upstream_res or upstream_res.status_code != 200:
-        current_app.logger.error("Failed to stream from S3")
-        return ResponseManager.internal("Failed to retrieve file content")
 
-    # Forward headers safely
     headers = {
-        "Content-Type": upstream_res.headers.get("Content-Type"),
-        "Content-Length": upstream_res.headers.get("Content-Length"),
         "Content-Disposition": f'inline; filename="{file_name}"',
         "Cache-Control": "private, max-age=3600"
     }
 
-    return Response(
-        stream_with_context(upstream_res.iter_content(chunk_size=8192)),
-        headers=headers
-    )
+    # Let nginx stream the object; no gateway worker held for the download
+    if current_app.config["FILE_DELIVERY"] == "x-accel":
+        return s3_service.x_accel_download(url, headers)
+
+    # Stream from S3 (Range / If-None-Match / If-Modified-Since passed through)
+    return s3_service.proxy_download(url, headers)
+
+
+@user_bp.route("/preview", methods=["GET"])
+@AuthorizationManager.login_required
+def view_preview():
+    """
+    Auth-gated WebP thumbnail of a file (first page for PDFs).
+    404 until the preview has been rendered (callers fall back to an icon).
+    """
+    office_serial = AuthorizationManager.get_office_serial()
+    file_serial = request.args.get("file_serial")
+
+    if not office_serial:
+        return ResponseManager.error("Missing 'office_serial' in auth")
+    if not file_serial:
+        return ResponseManager.bad_request("Missing 'file_serial'")
+
+    file_doc, _, error = _find_file_key(office_serial, file_serial)
+    if error:
+        return error
+
+    s3_res = s3_service.get_preview(_upload_key(office_serial, file_doc))
+    if not ResponseManager.is_success(response=s3_res):
+        return s3_res
+
+    url = ResponseManager.get_data(response=s3_res)
+
+    # Previews are immutable per file serial, so the browser may keep them
+    headers = {
+        "Content-Disposition": f'inline; filename="{file_serial}.webp"',
+        "Cache-Control": "private, max-age=86400",
+    }
+
+    if current_app.config["FILE_DELIVERY"] == "x-accel":
+        return s3_service.x_accel_download(url, headers)
+    return s3_service.proxy_download(url, headers)
 
 
 @user_bp.route("/delete_file", methods=["DELETE"])
@@ -614,6 +1196,7 @@ def delete_file():
       1. Validate auth + params
       2. Delete from S3
       3. Delete from MongoDB (FILES collection)
+      4. Deduplicated file: release the shared blob if this was its last reference
     """
 
     office_serial = AuthorizationManager.get_office_serial()
@@ -636,6 +1219,9 @@ def delete_file():
     file_serial = int(file_serial)
     case_serial = int(case_serial)
 
+    file_doc, _, _ = _find_file_key(office_serial, file_serial)
+    blob_key = _file_blob_key(office_serial, file_doc) if file_doc else None
+
     # ----------------------------------------------------
     # Build S3 key
     # ----------------------------------------------------
@@ -643,14 +1229,19 @@ def delete_file():
     current_app.logger.debug(f"🗑️ [delete_file] Deleting key: {key}")
 
     # ----------------------------------------------------
-    # Delete from S3
+    # Delete from S3 (size first, for the usage counters)
+    # A deduplicated file has no object of its own: this only
+    # removes its preview, the blob is released further down
     # ----------------------------------------------------
+    size = None if blob_key else s3_service.object_size(key)
     s3_res = s3_service.delete(key)
     if not ResponseManager.is_success(s3_res):
         current_app.logger.error(
             f"❌ [delete_file] Failed to delete from S3: {s3_res['error']}"
         )
         return s3_res
+    if size is not None:
+        UsageManager.record(office_serial, case_serial, -size, objects=-1)
 
     # ----------------------------------------------------
     # Delete from Mongo (FILES entity)
@@ -668,6 +1259,9 @@ def delete_file():
         # File already deleted from S3 — but object remains in DB
         return mongo_res
 
+    if blob_key:
+        _release_blob(office_serial, blob_key)
+
     # ----------------------------------------------------
     # Remove file_serial from CASE.files_serials
     # ----------------------------------------------------
@@ -690,6 +1284,48 @@ def delete_file():
     return ResponseManager.success(message="File deleted")
 
 
+@user_bp.route("/export_case_files", methods=["GET"])
+@AuthorizationManager.login_required
+def export_case_files():
+    """
+    Download every available file of a case as one ZIP, streamed while it is
+    built from the S3 objects (constant memory, first bytes right away).
+    """
+    office_serial = AuthorizationManager.get_office_serial()
+    case_serial = request.args.get("case_serial")
+
+    if not office_serial:
+        return ResponseManager.error("Missing 'office_serial' in auth")
+    if not case_serial or not str(case_serial).isdigit():
+        return ResponseManager.bad_request("Missing 'case_serial'")
+
+    files_res = mongodb_service.search_entities(
+        entity=MongoDBEntity.FILES,
+        office_serial=office_serial,
+        filters={**MongoDBFilters.File.by_case(case_serial), "status": "available"},
+        projection={"serial": 1, "case_serial": 1, "name": 1, "blob_key": 1, "sha256": 1},
+        sort=MongoDBSort.oldest,
+    )
+    if not ResponseManager.is_success(files_res):
+        return files_res
+    if ResponseManager.is_no_content(files_res):
+        return ResponseManager.not_found("No files in case")
+
+    # a record with a blob_key that isn't this office's blob is left out
+    file_docs = [
+        doc for doc in ResponseManager.get_data(files_res)
+        if doc.get("name") and (not doc.get("blob_key") or _file_blob_key(office_serial, doc))
+    ]
+    names = CaseExportManager.archive_names([doc["name"] for doc in file_docs])
+    entries = [
+        (name, doc.get("blob_key") or _upload_key(office_serial, doc))
+        for name, doc in zip(names, file_docs)
+    ]
+
+    current_app.logger.info(f"📦 [export_case_files] case {case_serial}: {len(entries)} files")
+    return CaseExportManager.response(entries, f"case_{int(case_serial)}.zip")
+
+
 @user_bp.route("/get_office_files", methods=["GET"])
 @AuthorizationManager.login_required
 def get_office_files():
@@ -791,6 +1427,80 @@ def get_case():
     return ResponseManager.success(data=data)
 
 
+@user_bp.route("/view_case_bootstrap")
+@AuthorizationManager.login_required
+def view_case_bootstrap():
+    """
+    Everything the view case page needs for its first render, in one call.
+    The upstream lookups (case, profiles, users) run concurrently, so the
+    response time is roughly that of the slowest one.
+    """
+    office_serial = AuthorizationManager.get_office_serial()
+    case_serial = request.args.get("serial")
+
+    if not office_serial:
+        return ResponseManager.error("Missing 'office_serial' in auth")
+    if not case_serial:
+        return ResponseManager.bad_request("Missing 'case_serial'")
+
+    case_serial = int(case_serial)
+    current_app.logger.debug(f"🟦 [view_case_bootstrap] Fetching case={case_serial}")
+
+    results = gather_service_requests(
+        {
+            "case": lambda: mongodb_service.search_entities(
+                entity=MongoDBEntity.CASES,
+                office_serial=office_serial,
+                filters=MongoDBFilters.by_serial(case_serial),
+                limit=1,
+                expand=True,
+            ),
+            "profiles": lambda: mongodb_service.search_entities(
+                entity=MongoDBEntity.PROFILES,
+                office_serial=office_serial,
+                filters={},
+            ),
+            "users": lambda: mongodb_service.search_entities(
+                entity=MongoDBEntity.USERS,
+                office_serial=office_serial,
+            ),
+        }
+    )
+
+    case_res = results["case"]
+    if not ResponseManager.is_success(response=case_res):
+        return case_res
+
+    cases = ResponseManager.get_data(response=case_res)
+    if not cases:
+        return ResponseManager.not_found(error="Case not found")
+
+    # secondary lookups degrade to empty lists, like the page did before
+    def _list_or_empty(name):
+        res = results[name]
+        if not ResponseManager.is_success(response=res):
+            current_app.logger.warning(f"⚠️ [view_case_bootstrap] '{name}' lookup failed")
+            return []
+        return ResponseManager.get_data(response=res) or []
+
+    try:
+        case_statuses = JSONManager.load("case_statuses.json")
+    except Exception as e:
+        current_app.logger.error(f"❌ view_case_bootstrap case_statuses error: {e}")
+        case_statuses = []
+
+    data = {
+        "case": cases[0],
+        "office_serial": office_serial,
+        "profiles": _list_or_empty("profiles"),
+        "users": _list_or_empty("users"),
+        "case_statuses": case_statuses,
+    }
+
+    current_app.logger.debug(f"✅ Returning bootstrap for case serial={case_serial}")
+    return ResponseManager.success(data=data)
+
+
 @user_bp.route("/get_office_cases")
 @AuthorizationManager.login_required
 def get_office_cases():
@@ -960,8 +1670,70 @@ def delete_case():
     current_app.logger.info(
         f"DELETE /delete_case | deleted case {case_serial} in office {office_serial}"
     )
+
+    # shared blobs live outside the case prefix: drop the case's references first
+    _release_case_blobs(office_serial, case_serial)
+
+    # remove the case's files from S3 in the background (batched deletes)
+    purge_job = None
+    purge_res = s3_service.purge_prefix(f"uploads/{office_serial}/{case_serial}/")
+    if ResponseManager.is_success(purge_res):
+        purge_job = ResponseManager.get_data(purge_res).get("job_id")
+        UsageManager.drop_case(office_serial, case_serial)
+    else:
+        current_app.logger.warning(
+            f"DELETE /delete_case | S3 purge not started for case {case_serial} in office {office_serial}"
+        )
+
     flash("case deleted", "success")
-    return ResponseManager.success(message=f"Case {case_serial} deleted successfully")
+    return ResponseManager.success(
+        data={"purge_job": purge_job}, message=f"Case {case_serial} deleted successfully"
+    )
+
+
+def _release_case_blobs(office_serial, case_serial):
+    """Delete the case's deduplicated FILES records and release the blobs they used."""
+    blob_filters = {**MongoDBFilters.File.by_case(case_serial), "blob_key": {"$exists": True}}
+    refs_res = mongodb_service.search_entities(
+        entity=MongoDBEntity.FILES,
+        office_serial=office_serial,
+        filters=blob_filters,
+        projection={"serial": 1, "blob_key": 1, "sha256": 1},
+    )
+    if not ResponseManager.is_success(refs_res) or ResponseManager.is_no_content(refs_res):
+        return
+
+    blob_keys = {_file_blob_key(office_serial, doc) for doc in ResponseManager.get_data(refs_res)} - {None}
+    delete_res = mongodb_service.delete_entities(
+        entity=MongoDBEntity.FILES, office_serial=office_serial, filters=blob_filters
+    )
+    if not ResponseManager.is_success(delete_res):
+        current_app.logger.warning(f"⚠️ [delete_case] Blob references of case {case_serial} not removed")
+        return
+    for blob_key in blob_keys:
+        _release_blob(office_serial, blob_key)
+
+
+@user_bp.route("/purge_status", methods=["GET"])
+@AuthorizationManager.login_required
+def purge_status():
+    """Progress of an S3 purge started by delete_case (own office only)."""
+    office_serial = AuthorizationManager.get_office_serial()
+    job_id = request.args.get("job_id")
+
+    if not office_serial:
+        return ResponseManager.error("Missing 'office_serial' in auth")
+    if not job_id:
+        return ResponseManager.bad_request("Missing 'job_id'")
+
+    status_res = s3_service.purge_status(job_id)
+    if not ResponseManager.is_success(status_res):
+        return status_res
+
+    job = ResponseManager.get_data(status_res)
+    if not job.get("prefix", "").startswith(f"uploads/{office_serial}/"):
+        return ResponseManager.not_found("Purge job not found")
+    return status_res
 
 
 @user_bp.route("/update_case", methods=["PATCH"])
@@ -1381,147 +2153,171 @@ def delete_task():
 
 
 @user_bp.route("/load_birds_view_office")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_birds_view_office():
-    return render_template("user_components/birds_view_office.html")
+    return FragmentManager.render("user_components/birds_view_office.html")
 
 
 @user_bp.route("/load_office_details")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_office_details():
-    return render_template("user_components/office_details.html")
+    return FragmentManager.render("user_components/office_details.html")
 
 
 @user_bp.route("/load_birds_view_user")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_birds_view_user():
-    return render_template("user_components/birds_view_user.html")
+    return FragmentManager.render("user_components/birds_view_user.html")
 
 
 @user_bp.route("/load_personal_details")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_personal_details():
-    return render_template("user_components/personal_details.html")
+    return FragmentManager.render("user_components/personal_details.html")
 
 
 @user_bp.route("/load_security_mfa")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_security_mfa():
-    return render_template("user_components/security_mfa.html")
+    return FragmentManager.render("user_components/security_mfa.html")
 
 
 @user_bp.route("/load_birds_view_cases")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_birds_view_cases():
-    return render_template("user_components/birds_view_cases.html")
+    return FragmentManager.render("user_components/birds_view_cases.html")
 
 
 @user_bp.route("/load_search_case")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_search_case():
-    return render_template("user_components/search_case.html")
+    return FragmentManager.render("user_components/search_case.html")
 
 
 @user_bp.route("/load_new_case")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_new_case():
-    return render_template("user_components/new_case.html")
+    return FragmentManager.render("user_components/new_case.html")
 
 
 @user_bp.route("/load_view_case")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_view_case():
-    return render_template("user_components/view_case.html")
+    return FragmentManager.render("user_components/view_case.html")
 
 
 @user_bp.route("/load_birds_view_clients")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_birds_view_clients():
-    return render_template("user_components/birds_view_clients.html")
+    return FragmentManager.render("user_components/birds_view_clients.html")
 
 
 @user_bp.route("/load_search_client")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_search_client():
-    return render_template("user_components/search_client.html")
+    return FragmentManager.render("user_components/search_client.html")
 
 
 @user_bp.route("/load_new_client")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_new_client():
-    return render_template("user_components/new_client.html")
+    return FragmentManager.render("user_components/new_client.html")
 
 
 @user_bp.route("/load_view_client")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_view_client():
-    return render_template("user_components/view_client.html")
+    return FragmentManager.render("user_components/view_client.html")
 
 
 @user_bp.route("/load_search_file")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_search_file():
-    return render_template("user_components/search_file.html")
+    return FragmentManager.render("user_components/search_file.html")
 
 
 @user_bp.route("/load_birds_view_attendance")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_birds_view_attendance():
-    return render_template("user_components/birds_view_attendance.html")
+    return FragmentManager.render("user_components/birds_view_attendance.html")
 
 
 @user_bp.route("/load_clock_in_out")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_clock_in_out():
-    return render_template("user_components/clock_in_out.html")
+    return FragmentManager.render("user_components/clock_in_out.html")
 
 
 @user_bp.route("/load_calendar_office")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_calendar_office():
-    return render_template("user_components/calendar_office.html")
+    return FragmentManager.render("user_components/calendar_office.html")
 
 
 @user_bp.route("/load_calendar_user")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_calendar_user():
-    return render_template("user_components/calendar_user.html")
+    return FragmentManager.render("user_components/calendar_user.html")
 
 
 @user_bp.route("/load_contact")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_contact():
-    return render_template("user_components/contact.html")
+    return FragmentManager.render("user_components/contact.html")
 
 
 @user_bp.route("/load_faq")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_faq():
-    return render_template("user_components/faq.html")
+    return FragmentManager.render("user_components/faq.html")
 
 
 @user_bp.route("/load_remote_control")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_remote_control():
-    return render_template("user_components/remote_control.html")
+    return FragmentManager.render("user_components/remote_control.html")
 
 
 @user_bp.route("/load_statement")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_statement():
-    return render_template("user_components/statement.html")
+    return FragmentManager.render("user_components/statement.html")
 
 
 @user_bp.route("/load_accessibility_statement")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def load_accessibility_statement():
-    return render_template("user_components/accessibility_statement.html")
+    return FragmentManager.render("user_components/accessibility_statement.html")
 
 
 #   --- helpers
 
 
 @user_bp.route("/get_document_types")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def get_document_types():
     try:
@@ -1532,6 +2328,7 @@ def get_document_types():
 
 
 @user_bp.route("/get_case_categories")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def get_case_categories():
     try:
@@ -1542,6 +2339,7 @@ def get_case_categories():
 
 
 @user_bp.route("/get_case_statuses")
+@CacheManager.private()
 @AuthorizationManager.login_required
 def get_case_statuses():
     try:
@@ -1672,6 +2470,7 @@ def user_mfa_verify_enroll():
     if not ResponseManager.is_success(response=final_res):
         return final_res
 
+    AuthorizationManager.update_login_context(mfa_status="enabled")
     return ResponseManager.success(message="MFA enabled")
 
 
@@ -1719,6 +2518,8 @@ def user_mfa_reset():
     if not ResponseManager.is_success(res):
         return res
 
+    AuthorizationManager.update_login_context(mfa_status=None)
+
     return ResponseManager.success(message="MFA reset")
 
 
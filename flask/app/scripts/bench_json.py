@@ -0,0 +1,95 @@
+# scripts/bench_json.py
+"""
+Microbenchmark: stdlib JSON provider vs FastJSONProvider (orjson).
+
+Simulates the JSON work of one get_office_cases / get_office_clients request
+as it crosses the stack:
+  1) mongodb service jsonify()            -> dumps
+  2) gateway safe_service_request          -> loads
+  3) gateway ResponseManager._build        -> dumps
+  4) gateway route ResponseManager getters -> loads
+
+Run from the flask/ directory:
+    python -m app.scripts.bench_json [n_docs]
+"""
+import sys
+import timeit
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.managers.json_provider import FastJSONProvider
+
+
+def make_case(serial: int) -> dict:
+    return {
+        "serial": serial,
+        "created_at": "2025-10-30T17:12:40.123456Z",
+        "user_serial": serial % 12 + 1,
+        "responsible_serial": serial % 7 + 1,
+        "status": "active" if serial % 5 else "archived",
+        "title": f"תביעה כספית נגד חברת ביטוח מספר {serial}",
+        "field": "נזיקין",
+        "facts": "תאונת דרכים בצומת, נזק לרכב ולנוסעים. " * 6,
+        "against": "הראל חברה לביטוח בע\"מ",
+        "against_type": "company",
+        "clients_serials_with_roles": [
+            [str(serial * 3 + i), "main" if i == 0 else "secondary", "תובע"] for i in range(3)
+        ],
+        "files_serials": list(range(serial, serial + 8)),
+        "tasks_serials": list(range(serial, serial + 4)),
+    }
+
+
+def make_client(serial: int) -> dict:
+    return {
+        "serial": serial,
+        "created_at": "2025-10-30T17:12:40.123456Z",
+        "user_serial": serial % 12 + 1,
+        "id_card_number": f"{300000000 + serial}",
+        "first_name": "ישראל",
+        "last_name": "ישראלי",
+        "phone": "050-1234567",
+        "email": f"client{serial}@example.com",
+        "city": "תל אביב",
+        "street": "רוטשילד",
+        "home_number": str(serial % 200),
+        "postal_code": "6688101",
+        "birth_date": "1980-01-01",
+        "status": "active",
+    }
+
+
+def one_request(provider, data):
+    envelope = {"success": True, "message": "OK", "error": None, "data": data, "status": 200}
+    body = provider.dumps(envelope)  # 1) service
+    payload = provider.loads(body)  # 2) gateway parses the service response
+    body = provider.dumps(payload)  # 3) gateway re-serializes for the client
+    provider.loads(body)  # 4) ResponseManager getters (now parsed once)
+
+
+def bench(name: str, data: list, repeat: int = 5, number: int = 20):
+    app = Flask(__name__)
+    providers = {
+        "stdlib": DefaultJSONProvider(app),
+        "orjson": FastJSONProvider(app),
+    }
+
+    results = {}
+    for label, provider in providers.items():
+        timings = timeit.repeat(lambda: one_request(provider, data), repeat=repeat, number=number)
+        results[label] = min(timings) / number * 1000
+
+    speedup = results["stdlib"] / results["orjson"]
+    print(
+        f"{name:<14} stdlib {results['stdlib']:8.2f} ms/req   "
+        f"orjson {results['orjson']:8.2f} ms/req   "
+        f"saved {results['stdlib'] - results['orjson']:8.2f} ms/req  (x{speedup:.1f})"
+    )
+
+
+if __name__ == "__main__":
+    n_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    print(f"JSON CPU per request, {n_docs} documents per list")
+    bench("cases", [make_case(i) for i in range(1, n_docs + 1)])
+    bench("clients", [make_client(i) for i in range(1, n_docs + 1)])
@@ -0,0 +1,45 @@
+# scripts/reconcile_usage.py
+"""
+Periodic storage usage reconciliation (cron / scheduled job).
+
+Recounts every office whose counters are older than
+USAGE_RECONCILE_INTERVAL from its S3 listing (streamed, one page in memory)
+and overwrites the Redis counters kept by UsageManager.
+
+Run from the flask/ directory:
+    python -m app.scripts.reconcile_usage [--all]
+"""
+import sys
+from itertools import chain
+
+from app import create_flask_app
+from app.managers.response_management import ResponseManager
+from app.managers.usage_management import UsageManager
+from app.services import mongodb_service, s3_service
+
+
+def reconcile_offices(force: bool = False):
+    offices_res = mongodb_service.search_offices()
+    if not ResponseManager.is_success(offices_res):
+        print("❌ could not load offices")
+        return 1
+
+    failed = 0
+    for office in ResponseManager.get_data(offices_res) or []:
+        serial = office.get("serial")
+        if not serial or not (force or UsageManager.is_due(serial)):
+            continue
+        try:
+            objects = chain(s3_service.iter_keys(f"uploads/{serial}/"), s3_service.iter_keys(f"blobs/{serial}/"))
+            usage = UsageManager.reconcile(serial, objects)
+            print(f"✅ office {serial}: {usage['bytes']} bytes, {usage['objects']} objects")
+        except Exception as e:
+            failed += 1
+            print(f"❌ office {serial}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    app = create_flask_app()
+    with app.app_context():
+        sys.exit(reconcile_offices(force="--all" in sys.argv[1:]))
@@ -1,11 +1,21 @@
 # app/services/http_client.py
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from flask import current_app
 
 from ..managers.response_management import ResponseManager
 
 
+# Shared pool for fanning out independent service calls from a single request
+_FANOUT_WORKERS = int(os.getenv("SERVICE_FANOUT_WORKERS", "16"))
+_fanout_executor = ThreadPoolExecutor(
+    max_workers=_FANOUT_WORKERS, thread_name_prefix="service-fanout"
+)
+
+
 def safe_service_request(
     service_url: str, method: str, path: str, timeout: int = 30, **kwargs
 ):
@@ -37,7 +47,7 @@ def safe_service_request(
     # Try JSON decode
     try:
         current_app.logger.debug(resp)
-        payload = resp.json()
+        payload = current_app.json.loads(resp.content)
     except ValueError:
         current_app.logger.error(f"❌ Non-JSON response from {url}: {resp.text[:2000]}")
         return ResponseManager.error("Invalid response from service", status=502)
@@ -60,3 +70,33 @@ def safe_service_request(
         error=payload.get("error"),
         data=payload.get("data"),
     )
+
+
+def gather_service_requests(calls: dict) -> dict:
+    """
+    Run independent service calls concurrently and collect their responses.
+
+    Expected input:
+        { "name": callable_returning_ResponseManager_tuple, ... }
+
+    Returns:
+        { "name": ResponseManager tuple, ... }
+
+    Each call runs inside the current app context, so the service helpers
+    (which read current_app.config / current_app.logger) work unchanged.
+    Session/request data must be resolved by the caller beforehand.
+    """
+    app = current_app._get_current_object()
+
+    def _run(name, func):
+        with app.app_context():
+            try:
+                return func()
+            except Exception as e:
+                app.logger.error(f"❌ Concurrent service call '{name}' failed: {e}")
+                return ResponseManager.bad_gateway(message=f"Service call failed - {name}")
+
+    futures = {
+        name: _fanout_executor.submit(_run, name, func) for name, func in calls.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
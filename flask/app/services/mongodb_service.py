@@ -84,6 +84,23 @@ def create_entity(
     )
 
 
+def create_entities(
+    entity: str,
+    office_serial: int,
+    documents: list
+) -> tuple:
+    """POST /entities/batch -> list of new serials (same order as documents)"""
+    return _safe_request(
+        "POST",
+        "/entities/batch",
+        json={
+            "entity": entity,
+            "office_serial": office_serial,
+            "documents": documents
+        },
+    )
+
+
 def update_entities(
     entity: str,
     office_serial: int = None,
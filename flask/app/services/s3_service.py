@@ -1,6 +1,8 @@
 # app/services/s3_service.py
+from urllib.parse import quote
+
 import requests
-from flask import current_app
+from flask import current_app, request, Response, stream_with_context
 
 from ..managers.response_management import ResponseManager
 from .http_client import safe_service_request
@@ -30,8 +32,46 @@ def _safe_request(method: str, path: str, **kwargs) -> tuple:
 
 
 # ------------------------ List Keys -------------------------
-def list_keys(prefix=""):
-    return _safe_request("GET", "/list_keys", params={"prefix": prefix})
+def list_keys(prefix="", max_keys=None, continuation_token=None):
+    """One page: {"keys": [{key, size, etag, last_modified}], "next_token": ...}"""
+    params = {"prefix": prefix}
+    if max_keys:
+        params["max_keys"] = max_keys
+    if continuation_token:
+        params["continuation_token"] = continuation_token
+    return _safe_request("GET", "/list_keys", params=params)
+
+
+def object_size(key):
+    """Size in bytes of one object (via a 1-key listing), or None if it doesn't exist."""
+    res = list_keys(prefix=key, max_keys=1)
+    if not ResponseManager.is_success(res):
+        return None
+    keys = (ResponseManager.get_data(res) or {}).get("keys") or []
+    if not keys or keys[0]["key"] != key:
+        return None
+    return keys[0]["size"]
+
+
+def iter_keys(prefix=""):
+    """
+    Every object under the prefix, read line by line from the NDJSON stream,
+    so a full scan never holds more than one line in memory.
+    """
+    with requests.get(
+        f"{get_s3_url()}/list_keys",
+        params={"prefix": prefix, "stream": "1"},
+        stream=True,
+        timeout=30,
+    ) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            info = current_app.json.loads(line)
+            if "error" in info:
+                raise RuntimeError(f"S3 key listing failed: {info['error']}")
+            yield info
 
 
 # ------------------------ Generate Presigned POST -------------------------
@@ -48,16 +88,95 @@ def generate_presigned_post(filename, filetype, filesize, key=None):
     )
 
 
+def generate_presigned_posts(files):
+    """files = [{file_name, file_type, file_size, key}, ...] -> presigned POSTs in the same order."""
+    return _safe_request("POST", "/presign/post/batch", json={"files": files})
+
+
+# ------------------------ Multipart Upload -------------------------
+def start_multipart_upload(filename, filetype, filesize, key):
+    return _safe_request(
+        "POST",
+        "/presign/multipart/start",
+        json={
+            "file_name": filename,
+            "file_type": filetype,
+            "file_size": filesize,
+            "key": key,
+        },
+    )
+
+
+def presign_multipart_parts(key, upload_id, part_numbers):
+    return _safe_request(
+        "POST",
+        "/presign/multipart/part",
+        json={"key": key, "upload_id": upload_id, "part_numbers": part_numbers},
+    )
+
+
+def complete_multipart_upload(key, upload_id, parts=None):
+    return _safe_request(
+        "POST",
+        "/presign/multipart/complete",
+        json={"key": key, "upload_id": upload_id, "parts": parts},
+    )
+
+
+def abort_multipart_upload(key, upload_id):
+    return _safe_request(
+        "POST",
+        "/presign/multipart/abort",
+        json={"key": key, "upload_id": upload_id},
+    )
+
+
 # ------------------------ Generate Presigned GET -------------------------
 def generate_presigned_get(key, expires_in=3600):
     return _safe_request("GET", "/presign/get", params={"key": key, "expires_in": expires_in})
 
 
 # ------------------------ Upload -------------------------
-def create(fileobj, key):
-    files = {"file": fileobj}
-    data = {"key": key}
-    return _safe_request("POST", "/create", files=files, data=data)
+# An upload may outlast the default timeout (the service answers once the last part is in)
+UPLOAD_TIMEOUT = 300
+
+
+class _SizedStream:
+    """
+    Read-only body of a known length. requests sends a plain file-like with
+    Content-Length and reads it in blocks; an unsized stream (e.g. the
+    incoming request.stream) would go out chunked, which the service refuses.
+    """
+
+    def __init__(self, stream, length: int):
+        self._stream = stream
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        return self._stream.read(size)
+
+
+def create(fileobj, key, content_type=None, content_length=None):
+    """
+    Upload through the S3 service, sending the file as the raw request body:
+    requests streams it and the service feeds it straight into a concurrent
+    multipart transfer (no form encoding, no temporary file on either side).
+    With content_length, fileobj may be a non-seekable stream (request.stream).
+    """
+    headers = {"Content-Type": content_type or getattr(fileobj, "mimetype", None) or "application/octet-stream"}
+    body = fileobj if content_length is None else _SizedStream(fileobj, int(content_length))
+    return _safe_request(
+        "POST", "/create", params={"key": key}, data=body, headers=headers, timeout=UPLOAD_TIMEOUT
+    )
+
+
+# ------------------------ Content Hash -------------------------
+def verify_sha256(key, sha256):
+    """Stream the object in the S3 service and compare its SHA-256: {match, sha256}."""
+    return _safe_request("POST", "/verify_sha256", json={"key": key, "sha256": sha256})
 
 
 # ------------------------ Delete -------------------------
@@ -65,15 +184,111 @@ def delete(key):
     return _safe_request("DELETE", "/delete", json={"key": key})
 
 
+def delete_batch(keys):
+    """Delete many keys at once (one S3 delete_objects call per 1000 keys)."""
+    return _safe_request("DELETE", "/delete_batch", json={"keys": keys})
+
+
+def purge_prefix(prefix):
+    """Start a background purge of uploads/{office}/[{case}/]; returns the job (202)."""
+    return _safe_request("POST", "/purge_prefix", json={"prefix": prefix})
+
+
+def purge_status(job_id):
+    return _safe_request("GET", f"/purge_prefix/{quote(str(job_id), safe='')}")
+
+
+# ------------------------ Previews -------------------------
+def generate_preview(key, source=None):
+    """
+    Queue thumbnail rendering for an uploaded file (202, runs in the background).
+    source: the shared blob holding the bytes of a deduplicated file.
+    """
+    payload = {"key": key, "source": source} if source else {"key": key}
+    return _safe_request("POST", "/previews/generate", json=payload)
+
+
+def get_preview(key):
+    """Presigned URL of a file's WebP preview; 404 until it has been rendered."""
+    return _safe_request("GET", "/preview", params={"key": key})
+
+
 # ------------------------ Stream Download -------------------------
-def stream_download(url):
+# Byte-range / conditional headers passed through to S3 and back
+RANGE_REQUEST_HEADERS = (
+    "Range",
+    "If-Range",
+    "If-None-Match",
+    "If-Modified-Since",
+    "If-Match",
+    "If-Unmodified-Since",
+)
+RANGE_RESPONSE_HEADERS = (
+    "Content-Type",
+    "Content-Length",
+    "Content-Range",
+    "Accept-Ranges",
+    "ETag",
+    "Last-Modified",
+)
+# 206 partial, 304 not modified, 412 precondition failed, 416 bad range
+DOWNLOAD_STATUSES = (200, 206, 304, 412, 416)
+
+
+def stream_download(url, headers=None):
     """
     Stream a file from a URL (e.g., presigned S3 URL).
     Returns a requests.Response object with stream=True.
     """
     try:
         # stream=True ensures we don't load the whole file into memory
-        return requests.get(url, stream=True, timeout=10)
+        return requests.get(url, headers=headers, stream=True, timeout=10)
     except requests.exceptions.RequestException as e:
         current_app.logger.error(f"Stream download failed: {e}")
         return None
+
+
+def proxy_download(url, headers: dict):
+    """
+    Stream a presigned object through the gateway, passing the client's
+    Range / If-* headers to S3 so seeks get 206 and reopened files get 304.
+    """
+    forwarded = {h: request.headers[h] for h in RANGE_REQUEST_HEADERS if h in request.headers}
+    upstream_res = stream_download(url, headers=forwarded)
+
+    if upstream_res is None or upstream_res.status_code not in DOWNLOAD_STATUSES:
+        current_app.logger.error("Failed to stream from S3")
+        return ResponseManager.internal("Failed to retrieve file content")
+
+    headers = dict(headers)
+    for h in RANGE_RESPONSE_HEADERS:
+        if h in upstream_res.headers:
+            headers[h] = upstream_res.headers[h]
+
+    # No body to relay for 304 / 412 / 416
+    if upstream_res.status_code in (304, 412, 416):
+        upstream_res.close()
+        headers.pop("Content-Length", None)
+        return Response(status=upstream_res.status_code, headers=headers)
+
+    return Response(
+        stream_with_context(upstream_res.iter_content(chunk_size=8192)),
+        status=upstream_res.status_code,
+        headers=headers,
+    )
+
+
+# ------------------------ X-Accel-Redirect -------------------------
+X_ACCEL_LOCATION = "/_s3_proxy"
+
+
+def x_accel_download(url, headers: dict):
+    """
+    Hand a presigned download over to nginx (see nginx/conf/default.conf.template, /_s3_proxy).
+    nginx keeps Content-Disposition / Cache-Control from this response and
+    proxies the URL from X-Accel-Url untouched, so the signature stays valid.
+    """
+    resp = Response(status=200, headers=headers)
+    resp.headers["X-Accel-Redirect"] = X_ACCEL_LOCATION
+    resp.headers["X-Accel-Url"] = url
+    return resp
@@ -1,6 +1,11 @@
 # app/services/s3_service.py
+import time
+import uuid
+from http import HTTPStatus
+
 import requests
 from flask import current_app
+from redis.exceptions import RedisError
 
 from ..managers.response_management import ResponseManager
 from .http_client import safe_service_request
@@ -33,8 +38,37 @@ def _safe_request(method: str, path: str, **kwargs) -> tuple:
 
 
 def send_email(to_email: str, subject: str, message: str):
+    """Synchronous send: waits for gateway -> ses service -> SES."""
     return _safe_request(
         "POST",
         "/send_email",
         json={"to": to_email, "subject": subject, "message": message},
     )
+
+
+# ------------------------ Outbox -------------------------
+# The ses service drains this Redis list with a worker pool
+# (retries with backoff, dead-letter list); see its OutboxManager.
+OUTBOX_KEY = "email:outbox"
+
+
+def enqueue_email(to_email: str, subject: str, message: str):
+    """
+    Queue an email and return at once (202). Falls back to a direct
+    send when Redis is unreachable, so the email is never dropped.
+    """
+    job = {
+        "id": uuid.uuid4().hex,
+        "to": to_email,
+        "subject": subject,
+        "message": message,
+        "attempts": 0,
+        "enqueued_at": time.time(),
+    }
+    try:
+        current_app.config["SESSION_REDIS"].lpush(OUTBOX_KEY, current_app.json.dumps(job))
+    except RedisError as e:
+        current_app.logger.warning(f"⚠️ email outbox unavailable, sending directly: {e}")
+        return send_email(to_email=to_email, subject=subject, message=message)
+
+    return ResponseManager.success(data=job["id"], message="Email queued", status=HTTPStatus.ACCEPTED)
@@ -613,12 +613,12 @@ function initCaseFormPreview() {
       // כעת נשלוף את מזהה המשרד
       let office_serial;
       try {
-        const parsed = await window.API.getJson("/get_office_serial");
+        const parsed = await window.API.getMe();
 
-        if (!parsed.success || !parsed.data?.office_serial) {
+        if (!parsed.success || !parsed.data?.office?.serial) {
           throw new Error("Office serial not found");
         }
-        office_serial = parsed.data.office_serial;
+        office_serial = parsed.data.office.serial;
       } catch {
         submitBtn.disabled = false;
         submitBtn.textContent = "פתח תיק";
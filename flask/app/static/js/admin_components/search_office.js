@@ -36,6 +36,13 @@
   async function apiPost(url, body) { return window.API.postJson(url, body); }
   async function apiDel(url) { return window.API.delete(url); }
 
+  function formatBytes(bytes) {
+    const units = ['B', 'KB', 'MB', 'GB', 'TB'];
+    let value = Math.max(0, Number(bytes) || 0), i = 0;
+    while (value >= 1024 && i < units.length - 1) { value /= 1024; i++; }
+    return `${value.toFixed(i ? 1 : 0)} ${units[i]}`;
+  }
+
   // ---- Offices ----
   async function loadOffices() {
     const res = await apiGet('/search_offices');
@@ -68,6 +75,7 @@
       t.textContent = o.name || `משרד #${o.serial}`;
       const s = document.createElement('div'); s.className = 'om-sub';
       s.textContent = `מס׳ משרד: ${o.serial}`;
+      if (o.usage) s.textContent += ` · ${formatBytes(o.usage.bytes)} · ${o.usage.objects} קבצים`;
       left.appendChild(t); left.appendChild(s);
 
       const actions = document.createElement('div');
@@ -105,21 +105,18 @@ function showSubMenu(type, force = false) {
 
 window.addEventListener('DOMContentLoaded', () => {
 
-  // Office name
-  fetch('/get_office_name')
-    .then(r => r.text())
-    .then(name => {
+  // Office name + user full name (single /me call, shared with the pages)
+  window.API.getMe()
+    .then(res => {
+      const me = res?.data || {};
+      const officeName = me.office?.name || 'Not Found';
+      const username = me.user?.username || 'Not Found';
+
       const officeEl = window.utils.qs('#office-name');
-      if (officeEl) officeEl.innerHTML = `<span><img src="/static/images/icons/OFFICE.svg" class="sidebar-icon"> ${name}</span>`;
-    })
-    .catch(() => { });
+      if (officeEl) officeEl.innerHTML = `<span><img src="/static/images/icons/OFFICE.svg" class="sidebar-icon"> ${officeName}</span>`;
 
-  // user full name
-  fetch('/get_username')
-    .then(r => r.text())
-    .then(name => {
       const el = window.utils.qs('#username');
-      if (el) el.innerHTML = `<img src="/static/images/icons/USER.svg" class="sidebar-icon"> ${name}`;
+      if (el) el.innerHTML = `<img src="/static/images/icons/USER.svg" class="sidebar-icon"> ${username}`;
     })
     .catch(() => { });
 
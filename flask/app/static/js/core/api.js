@@ -60,5 +60,145 @@
     API.putJson = (url, body) => request(url, { method: 'PUT', body });
     API.delete = (url) => request(url, { method: 'DELETE' });
 
+    // ---------- Session context (/me) ----------
+    // Fetched once per page and kept in sessionStorage with its ETag,
+    // so reloads only revalidate (304) instead of re-downloading.
+    const ME_KEY = 'api:me';
+    let mePromise = null;
+
+    function readMeCache() {
+        try { return JSON.parse(sessionStorage.getItem(ME_KEY) || 'null'); } catch (_) { return null; }
+    }
+
+    function writeMeCache(etag, data) {
+        try { sessionStorage.setItem(ME_KEY, JSON.stringify({ etag, data })); } catch (_) { }
+    }
+
+    async function fetchMe() {
+        const cached = readMeCache();
+        const headers = { 'Accept': 'application/json' };
+        if (cached?.etag) headers['If-None-Match'] = cached.etag;
+
+        const resp = await fetch('/me', { credentials: 'same-origin', headers });
+        if (resp.status === 304 && cached?.data) {
+            return { success: true, data: cached.data, error: null, message: '' };
+        }
+        const res = normalize(await parseJsonSafe(resp), resp);
+        if (res.success) writeMeCache(resp.headers.get('ETag'), res.data);
+        return res;
+    }
+
+    API.getMe = ({ refresh = false } = {}) => {
+        if (!mePromise || refresh) {
+            mePromise = fetchMe().catch((err) => {
+                mePromise = null;
+                return { success: false, data: null, error: String(err), message: '' };
+            });
+        }
+        return mePromise;
+    };
+
+    // ---------- Content hash (deduplicated uploads) ----------
+    // SHA-256 sent along with an upload, so an office stores identical documents
+    // once (server FILE_DEDUP). null for very large files or without WebCrypto.
+    API.DEDUP_MAX_BYTES = 100 * 1024 * 1024;
+
+    API.sha256Hex = async (file) => {
+        if (!window.crypto?.subtle || file.size > API.DEDUP_MAX_BYTES) return null;
+        try {
+            const digest = await window.crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+            return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+        } catch (_) {
+            return null;
+        }
+    };
+
+    // ---------- Multipart upload (large files) ----------
+    // Parts go straight to S3 in parallel; a failed part gets a fresh URL
+    // and is retried on its own instead of restarting the whole file.
+    API.MULTIPART_THRESHOLD = 8 * 1024 * 1024;
+    const PART_URL_BATCH = 20;
+
+    function putPart(url, blob, onProgress) {
+        return new Promise((resolve, reject) => {
+            const xhr = new XMLHttpRequest();
+            xhr.open('PUT', url, true);
+            xhr.upload.onprogress = (evt) => { if (evt.lengthComputable) onProgress(evt.loaded); };
+            xhr.onload = () => {
+                // ETag is null when the bucket CORS doesn't expose it; complete() then asks S3
+                if (xhr.status >= 200 && xhr.status < 300) resolve(xhr.getResponseHeader('ETag'));
+                else reject(new Error(`Part upload failed with status ${xhr.status}`));
+            };
+            xhr.onerror = () => reject(new Error('Network error during part upload'));
+            xhr.send(blob);
+        });
+    }
+
+    API.uploadMultipart = async (file, { key, fileType, concurrency = 4, retries = 3, onProgress } = {}) => {
+        const started = await API.postJson('/presign/multipart/start', {
+            file_name: file.name,
+            file_type: fileType || file.type || 'application/octet-stream',
+            file_size: file.size,
+            key
+        });
+        if (!started.success) throw new Error(started.error || 'Failed to start multipart upload');
+        const { upload_id, part_size, part_count } = started.data;
+
+        const urls = {};
+        const loaded = new Array(part_count).fill(0);
+        const report = () => onProgress?.(loaded.reduce((a, b) => a + b, 0), file.size);
+
+        async function urlFor(n, fresh) {
+            if (fresh || !urls[n]) {
+                const part_numbers = [];
+                for (let i = n; i < n + (fresh ? 1 : PART_URL_BATCH) && i <= part_count; i++) part_numbers.push(i);
+                const res = await API.postJson('/presign/multipart/part', { key, upload_id, part_numbers });
+                if (!res.success) throw new Error(res.error || 'Failed to presign upload parts');
+                Object.assign(urls, res.data);
+            }
+            return urls[n];
+        }
+
+        async function uploadPart(n) {
+            const start = (n - 1) * part_size;
+            const blob = file.slice(start, Math.min(start + part_size, file.size));
+            for (let attempt = 0; ; attempt++) {
+                try {
+                    const url = await urlFor(n, attempt > 0);
+                    return await putPart(url, blob, (bytes) => { loaded[n - 1] = bytes; report(); });
+                } catch (err) {
+                    loaded[n - 1] = 0;
+                    report();
+                    if (attempt >= retries) throw err;
+                    await new Promise((r) => setTimeout(r, 500 * 2 ** attempt));
+                }
+            }
+        }
+
+        const parts = [];
+        let next = 1;
+        async function worker() {
+            while (next <= part_count) {
+                const n = next++;
+                parts.push({ part_number: n, etag: await uploadPart(n) });
+            }
+        }
+
+        try {
+            await Promise.all(Array.from({ length: Math.min(concurrency, part_count) }, worker));
+        } catch (err) {
+            await API.postJson('/presign/multipart/abort', { key, upload_id }).catch(() => { });
+            throw err;
+        }
+
+        const done = await API.postJson('/presign/multipart/complete', {
+            key,
+            upload_id,
+            parts: parts.every((p) => p.etag) ? parts : null
+        });
+        if (!done.success) throw new Error(done.error || 'Failed to complete multipart upload');
+        return done.data;
+    };
+
     window.API = API;
 })();
@@ -40,7 +40,7 @@
             if (runtime.currentStyle?.parentNode) runtime.currentStyle.parentNode.removeChild(runtime.currentStyle);
             const link = document.createElement('link');
             link.rel = 'stylesheet';
-            link.href = `${path}?v=${Date.now()}`;
+            link.href = versioned(path);
             link.onload = () => resolve(true);
             link.onerror = () => resolve(false);
             document.head.appendChild(link);
@@ -54,7 +54,7 @@
             const s = document.createElement('script');
             s.type = 'text/javascript';
             s.async = true;
-            s.src = `${path}?v=${Date.now()}`;
+            s.src = versioned(path);
             s.onload = () => resolve(true);
             s.onerror = () => resolve(false);
             document.body.appendChild(s);
@@ -62,10 +62,22 @@
         });
     }
 
+    // Content-hashed URL from the server manifest (immutable, cached by the browser)
+    function versioned(path) {
+        const version = window.ASSET_MANIFEST?.[path.replace(/^\/static\//, '')];
+        return version ? `${path}?v=${version}` : path;
+    }
+
+    // Fragments are revalidated by the server (ETag); keep them for this page's lifetime
+    const htmlCache = new Map();
+
     async function fetchHtml(url) {
-        const resp = await fetch(`${url}?v=${Date.now()}`, { credentials: 'same-origin' });
+        if (htmlCache.has(url)) return htmlCache.get(url);
+        const resp = await fetch(url, { credentials: 'same-origin' });
         if (!resp.ok) throw new Error(`adminLoader HTML fetch failed: ${resp.status}`);
-        return await resp.text();
+        const html = await resp.text();
+        htmlCache.set(url, html);
+        return html;
     }
 
     async function loadInternal(page, force) {
@@ -1,21 +1,48 @@
 (function () {
-    async function pingSession() {
+    // The heartbeat reports how long the session has left, so instead of
+    // polling every second we check again right after that moment
+    // (capped, since activity in other tabs keeps extending the session).
+    const MAX_INTERVAL_SECONDS = 60;
+    let timer = null;
+
+    function schedule(seconds) {
+        clearTimeout(timer);
+        timer = setTimeout(checkSession, seconds * 1000);
+    }
+
+    function onExpired() {
+        console.log("Session expired, reloading...");
+        window.Toast.warning("⚠️ תוקף ההתחברות פג. אנא התחבר שוב.", { sticky: true });
+        setTimeout(() => location.reload(true), 2000);
+    }
+
+    async function checkSession() {
         try {
-            const res = await fetch("/healthz", {
+            const res = await fetch("/session/heartbeat", {
                 method: "GET",
-                credentials: "include"
+                credentials: "include",
+                cache: "no-store"
             });
 
             if (res.status === 401) {
-                console.log("Session expired, reloading...");
-                window.Toast.warning("⚠️ תוקף ההתחברות פג. אנא התחבר שוב.", { sticky: true });
-                setTimeout(() => location.reload(true), 2000);
+                onExpired();
+                return;
             }
 
+            const body = await res.json();
+            const expiresIn = body?.data?.expires_in ?? MAX_INTERVAL_SECONDS;
+            schedule(Math.min(expiresIn + 1, MAX_INTERVAL_SECONDS));
+
         } catch (err) {
-            console.log("Error pinging session:", err);
-            console.warn("Ping failed", err);
+            console.warn("Heartbeat failed", err);
+            schedule(MAX_INTERVAL_SECONDS);
         }
     }
-    setInterval(pingSession, 1000);
+
+    // Timers are throttled in background tabs; re-check when the tab returns
+    document.addEventListener("visibilitychange", () => {
+        if (!document.hidden) checkSession();
+    });
+
+    checkSession();
 })();
@@ -89,7 +89,40 @@ async function uploadAllFilesToS3(files, office_serial, case_serial) {
 
   const timestamp = window.utils.buildLocalTimestamp();
 
-  for (const fileEntry of toUpload) {
+  // SHA-256 לכל קובץ – קבצים שכבר שמורים במשרד לא יועלו שוב
+  await Promise.all(toUpload.map(async (f) => {
+    f.sha256 = f.sha256 || await window.API.sha256Hex(f.file);
+  }));
+
+  // 0️⃣ קבצים רגילים: כל הרשומות וכל ה-presign בקריאה אחת, ואז כל ההעלאות במקביל
+  const batchEntries = toUpload.filter(f => f.file.size <= window.API.MULTIPART_THRESHOLD);
+  if (batchEntries.length > 0) {
+    const parsedBatch = await window.API.postJson("/presign/batch", {
+      created_at: timestamp,
+      case_serial,
+      files: batchEntries.map(f => ({
+        file_name: f.file.name,
+        file_type: f.technical_type || f.file.type || "application/octet-stream",
+        file_size: f.file.size,
+        sha256: f.sha256,
+        client_serial: f.client_serial,
+        technical_type: f.technical_type,
+        content_type: f.content_type,
+        description: f.description,
+      })),
+    });
+    // אם ה-batch נכשל – כל קובץ עובר במסלול הרגיל (רשומה + presign בנפרד)
+    if (parsedBatch.success && Array.isArray(parsedBatch.data)) {
+      parsedBatch.data.forEach((item, i) => {
+        batchEntries[i].serial = item.serial;
+        batchEntries[i].key = item.key;
+        batchEntries[i].presigned = item.presigned;
+        batchEntries[i].deduplicated = !!item.deduplicated;
+      });
+    }
+  }
+
+  await Promise.all(toUpload.map(async (fileEntry) => {
     const {
       file,
       row,
@@ -109,88 +142,134 @@ async function uploadAllFilesToS3(files, office_serial, case_serial) {
       progressBar.classList.remove("bg-success", "bg-danger");
       progressBar.classList.add("bg-info");
 
-      // 1️⃣ צור רשומת קובץ במונגו
-      const parsedCreate = await window.API.postJson("/create_new_file", {
-        created_at: timestamp,
-        case_serial,
-        client_serial,
-        name: file.name,
-        technical_type,
-        content_type,
-        description,
-      });
-
-      if (!parsedCreate.success || !parsedCreate.data) {
-        throw new Error(parsedCreate.error || "Failed to create file record");
-      }
-
-      const file_serial = parsedCreate.data; // ✅ לפי איך שאתה מחזיר מהשרת
-      fileEntry.serial = file_serial;
-
-      // 2️⃣ צור key ייחודי הכולל office, case, file
-      const uploadKey = `uploads/${office_serial}/${case_serial}/${file_serial}/${file.name}`;
-      fileEntry.key = uploadKey;
-
-
-      // 3️⃣ בקשת presigned URL ל-S3
-      const parsedPresign = await window.API.postJson("/presign/post", {
-        file_name: file.name,
-        file_type: technical_type || file.type || "application/octet-stream",
-        file_size: file.size,
-        key: uploadKey
-      });
-      if (!parsedPresign.success || !parsedPresign.data?.presigned?.url) {
-        throw new Error(parsedPresign.error || "Failed to get presigned URL");
-      }
-      const { url, fields } = parsedPresign.data.presigned;
+      // 1️⃣ צור רשומת קובץ במונגו (אם לא נשמרה כבר ב-batch)
+      if (!fileEntry.presigned && !fileEntry.deduplicated) {
+        const parsedCreate = await window.API.postJson("/create_new_file", {
+          created_at: timestamp,
+          case_serial,
+          client_serial,
+          name: file.name,
+          technical_type,
+          content_type,
+          description,
+        });
 
+        if (!parsedCreate.success || !parsedCreate.data) {
+          throw new Error(parsedCreate.error || "Failed to create file record");
+        }
 
-      // 4️⃣ העלאה אמיתית ל-S3
-      fileEntry.status = "uploading";
-      const formData = new FormData();
-      Object.entries(fields).forEach(([k, v]) => formData.append(k, v));
-      formData.append("file", file);
+        fileEntry.serial = parsedCreate.data; // ✅ לפי איך שאתה מחזיר מהשרת
 
-      await new Promise((resolve, reject) => {
-        const xhr = new XMLHttpRequest();
-        xhr.open("POST", url, true);
+        // 2️⃣ צור key ייחודי הכולל office, case, file
+        fileEntry.key = `uploads/${office_serial}/${case_serial}/${fileEntry.serial}/${file.name}`;
 
-        xhr.upload.onprogress = (evt) => {
-          if (evt.lengthComputable) {
-            const percent = Math.round((evt.loaded / evt.total) * 100);
-            progressBar.style.width = `${percent}%`;
+        // ♻️ תוכן זהה כבר שמור במשרד? אין צורך להעלות (אחרת מעלים ל-key של ה-blob)
+        if (fileEntry.sha256) {
+          const parsedDedup = await window.API.postJson("/files/dedup", {
+            file_serial: fileEntry.serial,
+            sha256: fileEntry.sha256,
+          });
+          if (parsedDedup.success && parsedDedup.data) {
+            fileEntry.deduplicated = !!parsedDedup.data.deduplicated;
+            fileEntry.key = parsedDedup.data.key || fileEntry.key;
           }
-        };
-
-        xhr.onload = () => {
-          if (xhr.status === 204) {
-            progressBar.style.width = "100%";
-            progressBar.classList.remove("bg-info");
-            progressBar.classList.add("bg-success");
-            fileEntry.status = "done";
-            resolve();
-          } else {
-            reject(new Error(`Upload failed with status ${xhr.status}`));
-            window.Toast.danger(`העלאת "${file.name}" נכשלה`);
+        }
+      }
+      const uploadKey = fileEntry.key;
+
+
+      if (fileEntry.deduplicated) {
+        // 3️⃣ הקובץ כבר זמין – אין העלאה
+        progressBar.style.width = "100%";
+        progressBar.classList.remove("bg-info");
+        progressBar.classList.add("bg-success");
+        fileEntry.status = "done";
+      } else if (file.size > window.API.MULTIPART_THRESHOLD) {
+        // 3️⃣ קובץ גדול: העלאה בחלקים מקבילים (multipart)
+        fileEntry.status = "uploading";
+        await window.API.uploadMultipart(file, {
+          key: uploadKey,
+          fileType: technical_type,
+          onProgress: (loaded, total) => {
+            progressBar.style.width = `${Math.round((loaded / total) * 100)}%`;
+          },
+        });
+        progressBar.style.width = "100%";
+        progressBar.classList.remove("bg-info");
+        progressBar.classList.add("bg-success");
+        fileEntry.status = "done";
+      } else {
+        // 3️⃣ בקשת presigned URL ל-S3 (אם לא התקבל כבר ב-batch)
+        if (!fileEntry.presigned) {
+          const parsedPresign = await window.API.postJson("/presign/post", {
+            file_name: file.name,
+            file_type: technical_type || file.type || "application/octet-stream",
+            file_size: file.size,
+            key: uploadKey
+          });
+          if (!parsedPresign.success || !parsedPresign.data?.presigned?.url) {
+            throw new Error(parsedPresign.error || "Failed to get presigned URL");
           }
-        };
-
-        xhr.onerror = () => reject(new Error("Network error during upload"));
-        xhr.send(formData);
-      });
+          fileEntry.presigned = parsedPresign.data.presigned;
+        }
+        const { url, fields } = fileEntry.presigned;
+
+
+        // 4️⃣ העלאה אמיתית ל-S3
+        fileEntry.status = "uploading";
+        const formData = new FormData();
+        Object.entries(fields).forEach(([k, v]) => formData.append(k, v));
+        formData.append("file", file);
+
+        await new Promise((resolve, reject) => {
+          const xhr = new XMLHttpRequest();
+          xhr.open("POST", url, true);
+
+          xhr.upload.onprogress = (evt) => {
+            if (evt.lengthComputable) {
+              const percent = Math.round((evt.loaded / evt.total) * 100);
+              progressBar.style.width = `${percent}%`;
+            }
+          };
+
+          xhr.onload = () => {
+            if (xhr.status === 204) {
+              progressBar.style.width = "100%";
+              progressBar.classList.remove("bg-info");
+              progressBar.classList.add("bg-success");
+              fileEntry.status = "done";
+              resolve();
+            } else {
+              reject(new Error(`Upload failed with status ${xhr.status}`));
+              window.Toast.danger(`העלאת "${file.name}" נכשלה`);
+            }
+          };
+
+          xhr.onerror = () => reject(new Error("Network error during upload"));
+          xhr.send(formData);
+        });
+      }
 
       console.log(`Uploaded ${file.name} to S3 (${uploadKey})`);
 
-      await window.API.apiRequest(`/update_file?serial=${Number(fileEntry.serial)}`, {
-        method: "PATCH",
-        body: { status: "available" }
-      });
+      if (!fileEntry.deduplicated) {
+        const parsedUpdate = await window.API.apiRequest(`/update_file?serial=${Number(fileEntry.serial)}`, {
+          method: "PATCH",
+          body: { status: "available" }
+        });
+        // 409: התוכן שהועלה לא תואם ל-SHA-256 שנשלח
+        if (!parsedUpdate.success) {
+          throw new Error(parsedUpdate.error || "Failed to finalize file");
+        }
+      }
     } catch (err) {
 
       progressBar.classList.remove("bg-info");
       progressBar.classList.add("bg-danger");
       progressBar.style.width = "100%";
       fileEntry.status = "failed";
+      fileEntry.presigned = null; // ניסיון חוזר מקבל רשומה ו-presign חדשים
+      fileEntry.deduplicated = false;
 
       // 💣 חדש! מוחק את הרשומה שלא מועילה
       // 🗑️ ניקוי רשומה שבורה במונגו (אם נוצר serial)
@@ -213,7 +292,7 @@ async function uploadAllFilesToS3(files, office_serial, case_serial) {
       console.error("Upload failed for:", file.name, err);
       window.Toast.danger(`העלאת ${file.name} נכשלה`);
     }
-  }
+  }));
 
   const uploadedEntries = files.filter(f => f.status === "done");
   const failedEntries = files.filter(f => f.status === "failed");
@@ -618,12 +697,12 @@ function initCaseFormPreview() {
       // כעת נשלוף את מזהה המשרד
       let office_serial;
       try {
-        const parsed = await window.API.getJson("/get_office_serial");
+        const parsed = await window.API.getMe();
 
-        if (!parsed.success || !parsed.data?.office_serial) {
+        if (!parsed.success || !parsed.data?.office?.serial) {
           throw new Error("Office serial not found");
         }
-        office_serial = parsed.data.office_serial;
+        office_serial = parsed.data.office.serial;
         console.log(office_serial)
       } catch {
         submitBtn.disabled = false;
@@ -13,6 +13,7 @@
   let SELECTED = [];             // _ids נבחרים לאיחוד (UI בלבד)
   let USERS = [];                // לבחירת "בטיפול"
   let STATUSES = [];             // לבחירת סטטוס
+  let OFFICE_SERIAL = null;      // מגיע מה־bootstrap (לבניית מפתחות העלאה)
 
   // DOM refs
   const $ = (sel) => document.querySelector(sel);
@@ -35,15 +36,14 @@
       return;
     }
 
-    // 2) טען סטטוסים/משתמשים ברקע (ל־dropdownים)
-    await Promise.all([loadStatuses(), loadUsers()]).catch(() => { });
-
-    // 3) טען את התיק
-    await loadCase(CASE_SERIAL);
+    // 2+3) טען את התיק + סטטוסים/משתמשים (ל־dropdownים) בקריאה אחת
+    await loadBootstrap(CASE_SERIAL);
+    if (!CASE) return;
 
     // 4) חבר מאזינים קבועים
     bindNoteBar();
     bindSorter();
+    bindExport();
     bindUploaders(); // העלאה מיידית
 
     console.log('rendering case view for case serial:', CASE_SERIAL);
@@ -55,42 +55,33 @@
     renderRecords();
   }
 
-  async function loadStatuses() {
-    // ניסוי ראשון: פרופילים של המשרד (אם קיים route כזה), אחרת נשתמש בקובץ הסטטי
-    try {
-      const p1 = await window.API.getJson('/get_office_profiles');
-      if (p1?.success && Array.isArray(p1.data)) {
-        // חפש פרופיל סטטוסים, או הפק רשימה מכל פרופילי status
-        STATUSES = uniqueStrings(
-          p1.data.flatMap(pr => Array.isArray(pr?.case_statuses) ? pr.case_statuses : [])
-        );
-        if (STATUSES.length) return;
-      }
-    } catch (e) { }
-    try {
-      const p2 = await window.API.getJson('/get_case_statuses');
-      if (p2?.success && Array.isArray(p2.data)) STATUSES = p2.data;
-    } catch (e) { }
-    if (!STATUSES.length) STATUSES = ['active', 'archived', 'pending', 'on-hold'];
-  }
-  async function loadUsers() {
-    try {
-      const res = await window.API.getJson('/get_office_users');
-      if (res?.success && Array.isArray(res.data)) USERS = res.data;
-    } catch (e) { }
-  }
-  function uniqueStrings(arr) { return Array.from(new Set((arr || []).filter(Boolean))); }
-
-  async function loadCase(serial) {
-    const res = await window.API.getJson(`/get_case?serial=${encodeURIComponent(serial)}&expand=true`);
-    if (!res?.success || !Array.isArray(res.data) || !res.data[0]) {
+  async function loadBootstrap(serial) {
+    // השרת מביא במקביל: תיק מורחב, פרופילים, משתמשי משרד, סטטוסים וקוד משרד
+    const res = await window.API.getJson(`/view_case_bootstrap?serial=${encodeURIComponent(serial)}`);
+    if (!res?.success || !res.data?.case) {
       return window.Toast.danger(res?.error || 'שגיאה בטעינת התיק');
     }
-    CASE = res.data[0]; // case מורחב
+    const data = res.data;
+
+    CASE = data.case; // case מורחב
+    OFFICE_SERIAL = data.office_serial || null;
+    USERS = Array.isArray(data.users) ? data.users : [];
+    applyStatuses(data.profiles, data.case_statuses);
     console.log('Loaded case:', CASE);
-    console.log("Loaded case: " + JSON.stringify(CASE));
+  }
 
+  function applyStatuses(profiles, caseStatuses) {
+    // עדיפות לפרופילים של המשרד, אחרת הקובץ הסטטי
+    if (Array.isArray(profiles)) {
+      STATUSES = uniqueStrings(
+        profiles.flatMap(pr => Array.isArray(pr?.case_statuses) ? pr.case_statuses : [])
+      );
+      if (STATUSES.length) return;
+    }
+    if (Array.isArray(caseStatuses)) STATUSES = caseStatuses;
+    if (!STATUSES.length) STATUSES = ['active', 'archived', 'pending', 'on-hold'];
   }
+  function uniqueStrings(arr) { return Array.from(new Set((arr || []).filter(Boolean))); }
 
   // ---------- Render: Header ----------
   function renderHeader() {
@@ -391,6 +382,15 @@
     });
   }
 
+  function bindExport() {
+    const btn = $('#exportBtn');
+    if (!btn) return;
+    // the browser downloads the streamed ZIP itself (no fetch / blob in memory)
+    btn.addEventListener('click', () => {
+      window.location.href = `/export_case_files?case_serial=${encodeURIComponent(CASE.serial)}`;
+    });
+  }
+
   function renderRecords() {
     const listEl = $('#list');
     const chipsEl = $('#chips');
@@ -780,9 +780,10 @@
     }
 
     async function getOfficeSerial() {
-      const res = await window.API.getJson('/get_office_serial');
-      if (!res?.success || !res.data?.office_serial) throw new Error('office_serial לא נמצא');
-      return res.data.office_serial;
+      if (OFFICE_SERIAL) return OFFICE_SERIAL;
+      const res = await window.API.getMe();
+      if (!res?.success || !res.data?.office?.serial) throw new Error('office_serial לא נמצא');
+      return res.data.office.serial;
     }
 
     async function uploadSingle(file) {
@@ -803,27 +804,47 @@
       if (!file_serial) { window.Toast.danger('חסר file_serial מהשרת'); return; }
 
       // 2) presign POST
-      const key = `uploads/${office_serial}/${CASE.serial}/${file_serial}/${file.name}`;
+      let key = `uploads/${office_serial}/${CASE.serial}/${file_serial}/${file.name}`;
+
+      // content already stored in the office? then there is nothing to upload
+      let deduplicated = false;
+      const sha256 = await window.API.sha256Hex(file);
+      if (sha256) {
+        const dedup = await window.API.postJson('/files/dedup', { file_serial, sha256 });
+        if (dedup?.success && dedup.data) {
+          deduplicated = !!dedup.data.deduplicated;
+          key = dedup.data.key || key;
+        }
+      }
 
-      const ps = await window.API.postJson('/presign/post', {
-        file_name: file.name,
-        file_type: file.type || 'application/octet-stream',
-        file_size: file.size,
-        key: key
-      });
+      if (deduplicated) {
+        // already available, skip 3) and 4)
+      } else if (file.size > window.API.MULTIPART_THRESHOLD) {
+        // 3) large file: parallel multipart upload
+        await window.API.uploadMultipart(file, { key, fileType: file.type });
+      } else {
+        const ps = await window.API.postJson('/presign/post', {
+          file_name: file.name,
+          file_type: file.type || 'application/octet-stream',
+          file_size: file.size,
+          key: key
+        });
 
-      if (!ps?.success || !ps.data?.presigned?.url) {
-        window.Toast.danger(ps?.error || 'קבלת presign POST נכשלה');
-        return;
-      }
+        if (!ps?.success || !ps.data?.presigned?.url) {
+          window.Toast.danger(ps?.error || 'קבלת presign POST נכשלה');
+          return;
+        }
 
-      const { url, fields } = ps.data.presigned;
+        const { url, fields } = ps.data.presigned;
 
-      // 3) upload to S3
-      await uploadViaPresignedPost(url, fields, file);
+        // 3) upload to S3
+        await uploadViaPresignedPost(url, fields, file);
+      }
 
       // 4) mark file available
-      await window.API.patchJson(`/update_file?serial=${file_serial}`, { status: 'available' }).catch(() => { });
+      if (!deduplicated) {
+        await window.API.patchJson(`/update_file?serial=${file_serial}`, { status: 'available' }).catch(() => { });
+      }
 
       // 5) add to case.files
       await window.API.patchJson(`/update_case?serial=${CASE.serial}`, { _operator: '$addToSet', files_serials: Number(file_serial) }).catch(() => { });
@@ -41,3 +41,1082 @@ def test_home_page_status(client):
 
     # Check if the status code is 200 (OK)
     assert response.status_code == 200
+
+
+def test_gather_service_requests_runs_concurrently():
+    """
+    Test: Independent service calls fan out in parallel and keep their names,
+    so a composite endpoint costs about as much as its slowest call.
+    """
+    import time
+    from flask import Flask
+    from app.managers.response_management import ResponseManager
+    from app.services.http_client import gather_service_requests
+
+    app = Flask(__name__)
+
+    def slow(value):
+        def call():
+            time.sleep(0.2)
+            return ResponseManager.success(data=value)
+
+        return call
+
+    with app.app_context():
+        started = time.monotonic()
+        results = gather_service_requests({"a": slow(1), "b": slow(2), "c": slow(3)})
+        elapsed = time.monotonic() - started
+
+        assert elapsed < 0.5
+        assert {k: ResponseManager.get_data(v) for k, v in results.items()} == {
+            "a": 1,
+            "b": 2,
+            "c": 3,
+        }
+
+
+def test_json_catalog_is_cached_and_hot_reloaded(tmp_path, monkeypatch):
+    """
+    Test: Catalogs are served from memory with a content ETag, answer
+    If-None-Match with 304, and pick up file changes by mtime.
+    """
+    import os
+    from flask import Flask
+    from app.managers.json_management import JSONManager
+
+    catalog = tmp_path / "statuses.json"
+    catalog.write_text('[{"value": "active"}]', encoding="utf-8")
+    monkeypatch.setattr(JSONManager, "_base_path", tmp_path)
+    monkeypatch.setattr(JSONManager, "_catalogs", {})
+
+    app = Flask(__name__)
+
+    with app.test_request_context("/"):
+        first = JSONManager.jsonify("statuses.json")
+        assert first.status_code == 200
+        assert first.get_json() == [{"value": "active"}]
+        etag = first.get_etag()[0]
+
+    with app.test_request_context("/", headers={"If-None-Match": f'"{etag}"'}):
+        assert JSONManager.jsonify("statuses.json").status_code == 304
+
+    catalog.write_text('[{"value": "archived"}]', encoding="utf-8")
+    stat = catalog.stat()
+    os.utime(catalog, (stat.st_atime, stat.st_mtime + 5))
+
+    assert JSONManager.load("statuses.json") == [{"value": "archived"}]
+
+
+def test_cache_policy_per_route():
+    """
+    Test: Undeclared routes are no-store, declared private routes get an ETag
+    and answer revalidation with 304.
+    """
+    from flask import Flask
+    from app.managers.cache_management import CacheManager
+
+    app = Flask(__name__)
+    CacheManager.init_app(app)
+
+    @app.route("/secret")
+    def secret():
+        return "data"
+
+    @app.route("/fragment")
+    @CacheManager.private()
+    def fragment():
+        return "<div>fragment</div>"
+
+    client = app.test_client()
+
+    assert "no-store" in client.get("/secret").headers["Cache-Control"]
+
+    first = client.get("/fragment")
+    assert "private" in first.headers["Cache-Control"]
+    assert "no-store" not in first.headers["Cache-Control"]
+    etag = first.headers["ETag"]
+
+    assert client.get("/fragment", headers={"If-None-Match": etag}).status_code == 304
+
+    # catalogs change on disk without a new URL: revalidated (ETag), never reused blindly
+    from app.routes import admin, user
+    for view in (user.get_document_types, user.get_case_categories, user.get_case_statuses, admin.get_roles_list):
+        assert view.cache_policy == (CacheManager.PRIVATE, 0)
+
+
+def test_static_urls_are_fingerprinted_and_immutable(tmp_path):
+    """
+    Test: url_for('static') carries the content hash, and only a request with
+    the current hash is served as immutable.
+    """
+    from flask import Flask, url_for
+    from app.managers.asset_management import AssetManager
+    from app.managers.cache_management import CacheManager
+
+    (tmp_path / "app.js").write_text("console.log(1);", encoding="utf-8")
+    app = Flask(__name__, static_folder=str(tmp_path))
+    AssetManager.init_app(app)
+    CacheManager.init_app(app)
+
+    with app.test_request_context("/"):
+        url = url_for("static", filename="app.js")
+    assert "?v=" in url
+
+    client = app.test_client()
+    assert "immutable" in client.get(url).headers["Cache-Control"]
+    assert "immutable" not in client.get("/static/app.js?v=old").headers["Cache-Control"]
+
+
+def test_fragment_cache_renders_once_per_template_version(tmp_path, monkeypatch):
+    """
+    Test: A load_* fragment is rendered once, served from memory with an ETag,
+    and re-rendered when the template file changes.
+    """
+    import os
+    from flask import Flask
+    from app.managers.fragment_management import FragmentManager
+
+    template = tmp_path / "fragment.html"
+    template.write_text("<div>v1</div>", encoding="utf-8")
+    app = Flask(__name__, template_folder=str(tmp_path))
+    monkeypatch.setattr(FragmentManager, "_cache", {})
+
+    renders = []
+    import app.managers.fragment_management as fragment_module
+
+    real_render = fragment_module.render_template
+    monkeypatch.setattr(
+        fragment_module,
+        "render_template",
+        lambda name: renders.append(name) or real_render(name),
+    )
+
+    with app.test_request_context("/"):
+        first = FragmentManager.render("fragment.html")
+        second = FragmentManager.render("fragment.html")
+        assert first.get_data() == second.get_data() == b"<div>v1</div>"
+        assert len(renders) == 1
+
+    with app.test_request_context("/", headers={"If-None-Match": first.headers["ETag"]}):
+        assert FragmentManager.render("fragment.html").status_code == 304
+
+    template.write_text("<div>v2</div>", encoding="utf-8")
+    stat = template.stat()
+    os.utime(template, (stat.st_atime, stat.st_mtime + 5))
+
+    with app.test_request_context("/"):
+        assert FragmentManager.render("fragment.html").get_data() == b"<div>v2</div>"
+        assert len(renders) == 2
+
+
+def test_session_heartbeat_skips_session_store():
+    """
+    Test: The heartbeat answers from the signed expiry cookie without opening
+    the session, and reports 401 once the user is logged out.
+    """
+    from flask import Flask, session
+    from app.managers.response_management import ResponseManager
+    from app.managers.session_management import SessionManager
+
+    app = Flask(__name__)
+    app.secret_key = "test"
+    SessionManager.init_app(app)
+
+    opened = []
+    inner_open = app.session_interface.inner.open_session
+
+    def counting_open(*args):
+        opened.append(1)
+        return inner_open(*args)
+
+    app.session_interface.inner.open_session = counting_open
+
+    @app.route("/login")
+    def login():
+        session["login_context"] = {"user": {"serial": 1}}
+        return "ok"
+
+    @app.route("/logout")
+    def logout():
+        session.clear()
+        return "ok"
+
+    @app.route("/heartbeat")
+    @SessionManager.session_free
+    def heartbeat():
+        expires_in = SessionManager.seconds_remaining()
+        if expires_in is None:
+            return ResponseManager.unauthorized("Session expired")
+        return ResponseManager.success(data={"expires_in": expires_in})
+
+    client = app.test_client()
+    assert client.get("/heartbeat").status_code == 401
+
+    client.get("/login")
+    opened.clear()
+    resp = client.get("/heartbeat")
+    assert resp.status_code == 200
+    assert 0 < resp.json["data"]["expires_in"] <= app.permanent_session_lifetime.total_seconds()
+    assert opened == []
+
+    # tampered cookie is rejected
+    client.set_cookie(SessionManager.EXPIRY_COOKIE_NAME, "9999999999.bad")
+    assert client.get("/heartbeat").status_code == 401
+
+    client.get("/login")
+    client.get("/logout")
+    assert client.get("/heartbeat").status_code == 401
+
+
+def test_unmodified_sessions_are_touched_not_rewritten():
+    """
+    Test: Static/health routes never reach Redis, and an unmodified session
+    only gets its TTL extended instead of being serialized and SET again.
+    """
+    from flask import Flask, session
+    from flask_session.redis import RedisSessionInterface
+    from redis import Redis
+    from app.managers.session_management import SessionManager
+
+    class FakeRedis:
+        def __init__(self):
+            self.data, self.calls = {}, []
+
+        def get(self, key):
+            self.calls.append("get")
+            return self.data.get(key)
+
+        def set(self, name, value, ex=None):
+            self.calls.append("set")
+            self.data[name] = value
+
+        def expire(self, key, ttl):
+            self.calls.append("expire")
+
+        def delete(self, key):
+            self.data.pop(key, None)
+
+    app = Flask(__name__)
+    app.secret_key = "test"
+    redis = FakeRedis()
+    app.session_interface = RedisSessionInterface(app, client=Redis())
+    app.session_interface.client = redis
+    SessionManager.init_app(app)
+
+    @app.route("/write")
+    def write():
+        session["login_context"] = {"user": {"serial": 1}}
+        return "ok"
+
+    @app.route("/read")
+    def read():
+        return str(session.get("login_context"))
+
+    @app.route("/probe")
+    @SessionManager.session_free
+    def probe():
+        return "ok"
+
+    client = app.test_client()
+    client.get("/write")
+    assert redis.calls == ["set"]
+
+    redis.calls.clear()
+    resp = client.get("/read")
+    assert "serial" in resp.get_data(as_text=True)
+    assert redis.calls == ["get", "expire"]
+    assert "session=" in resp.headers.get("Set-Cookie", "")
+
+    redis.calls.clear()
+    client.get("/probe")
+    client.get("/static/missing.js")
+    assert redis.calls == []
+
+
+def test_login_context_is_compact_and_versioned():
+    """
+    Test: Only the minimal context reaches the session (no MFA secret,
+    recovery codes or favorites), it works with the stateless signed-cookie
+    session, and sessions in an older layout count as logged out.
+    """
+    from flask import Flask, session
+    from app.managers.auth_management import AuthorizationManager, LoginContext
+
+    login_data = {
+        "user": {
+            "serial": 7,
+            "username": "dana",
+            "roles": ["user"],
+            "mfa": {"status": "enabled", "method": "totp", "secret": "S3CR3T"},
+            "password_recovery": {"code": "123456"},
+            "favorite_cases": list(range(500)),
+        },
+        "office": {"serial": 3, "name": "Office"},
+    }
+
+    app = Flask(__name__)
+    app.secret_key = "test"
+
+    @app.route("/login")
+    def login():
+        AuthorizationManager.set_login_context(
+            ctx=LoginContext.from_login(login_data, session_id="sid")
+        )
+        return "ok"
+
+    @app.route("/whoami")
+    def whoami():
+        return {
+            "raw": session.get("login_context"),
+            "dashboard": AuthorizationManager.get_dashboard_context(),
+        }
+
+    @app.route("/legacy")
+    def legacy():
+        session["login_context"] = {"user": login_data["user"], "office": {}}
+        return str(AuthorizationManager.is_logged_in())
+
+    client = app.test_client()
+    client.get("/login")
+    body = client.get("/whoami").json
+
+    assert body["raw"] == [LoginContext.VERSION, "sid", 7, "dana", ["user"], 3, "Office", "enabled"]
+    assert body["dashboard"]["user"]["username"] == "dana"
+    assert body["dashboard"]["office"] == {"serial": 3, "name": "Office"}
+    assert client.get("/legacy").get_data(as_text=True) == "False"
+
+
+def test_rate_limiter_single_script_call_and_prefilter():
+    """
+    Test: All scopes (IP + username) go to Redis in one script call, a
+    rejection carries Retry-After, and a flood from one IP is cut off by the
+    in-process pre-filter without reaching Redis.
+    """
+    from flask import Flask
+    from app.managers.rate_limiter import RateLimiter
+
+    calls = []
+
+    class FakeScript:
+        def __call__(self, keys, args):
+            calls.append(keys)
+            # allow the first two attempts, then report a 30s wait
+            return [1, 0] if len(calls) <= 2 else [0, 30000]
+
+    class FakeRedis:
+        def register_script(self, lua):
+            return FakeScript()
+
+    app = Flask(__name__)
+    app.config["SESSION_REDIS"] = FakeRedis()
+
+    @app.route("/login", methods=["POST"])
+    @RateLimiter.limit(
+        limit=2,
+        window_seconds=60,
+        key_funcs=(RateLimiter.by_ip, RateLimiter.by_field("username")),
+    )
+    def login():
+        return "ok"
+
+    RateLimiter._local_hits.clear()
+    client = app.test_client()
+
+    for _ in range(2):
+        assert client.post("/login", data={"username": "Dana"}).status_code == 200
+    assert calls[0] == ["rl:login:ip:127.0.0.1", "rl:login:username:dana"]
+
+    resp = client.post("/login", data={"username": "Dana"})
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "30"
+
+    # PREFILTER_FACTOR x limit attempts reached Redis; the rest are local
+    for _ in range(10):
+        assert client.post("/login", data={"username": "Dana"}).status_code == 429
+    assert len(calls) == 2 * RateLimiter.PREFILTER_FACTOR
+
+
+def test_fast_json_provider_matches_default_and_parses_once(monkeypatch):
+    """
+    Test: FastJSONProvider produces the same JSON as Flask's default
+    (including dates/Decimal and the >64-bit fallback), and ResponseManager
+    getters parse a response body only once.
+    """
+    import datetime
+    import decimal
+    import json
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+    from app.managers.json_provider import FastJSONProvider
+    from app.managers.response_management import ResponseManager
+
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    default = DefaultJSONProvider(app)
+
+    doc = {
+        "title": "תיק",
+        "created": datetime.datetime(2025, 1, 2, 3, 4, 5),
+        "fee": decimal.Decimal("10.50"),
+        "serials": [1, 2, 3],
+        "huge": 2**70,
+    }
+    assert json.loads(app.json.dumps(doc)) == json.loads(default.dumps(doc))
+
+    with app.app_context():
+        res = ResponseManager.success(data={"serials": [1, 2, 3]})
+        loads = []
+        real_loads = app.json.loads
+        monkeypatch.setattr(app.json, "loads", lambda s: loads.append(1) or real_loads(s))
+
+        assert ResponseManager.is_success(res)
+        assert ResponseManager.get_data(res) == {"serials": [1, 2, 3]}
+        assert ResponseManager.get_status(res) == 200
+        assert len(loads) == 1
+
+
+def test_view_file_x_accel_response_keeps_headers():
+    """
+    Test: In x-accel mode the gateway returns an empty body with the internal
+    redirect, the untouched presigned URL and the viewer headers, and the
+    cache policy keeps the route's own Cache-Control.
+    """
+    from flask import Flask
+    from app.managers.cache_management import CacheManager
+    from app.services import s3_service
+
+    presigned = "https://bucket.s3.amazonaws.com/uploads/1/2/3/%D7%A7%D7%95%D7%91%D7%A5.pdf?X-Amz-Signature=abc%2F"
+
+    app = Flask(__name__)
+    CacheManager.init_app(app)
+
+    @app.route("/view_file")
+    def view_file():
+        return s3_service.x_accel_download(
+            presigned,
+            {
+                "Content-Disposition": 'inline; filename="a.pdf"',
+                "Cache-Control": "private, max-age=3600",
+            },
+        )
+
+    resp = app.test_client().get("/view_file")
+    assert resp.status_code == 200
+    assert resp.data == b""
+    assert resp.headers["X-Accel-Redirect"] == s3_service.X_ACCEL_LOCATION
+    assert resp.headers["X-Accel-Url"] == presigned
+    assert resp.headers["Content-Disposition"] == 'inline; filename="a.pdf"'
+    assert resp.headers["Cache-Control"] == "private, max-age=3600"
+
+
+def test_proxy_download_passes_ranges_and_conditionals(monkeypatch):
+    """
+    Test: Range / If-None-Match reach S3, and 206 / 304 answers come back with
+    Content-Range, ETag and Last-Modified (no body for 304).
+    """
+    from flask import Flask
+    from app.services import s3_service
+
+    seen = {}
+
+    class FakeUpstream:
+        def __init__(self, status, headers, body=b""):
+            self.status_code, self.headers, self.body = status, headers, body
+
+        def iter_content(self, chunk_size):
+            yield self.body
+
+        def close(self):
+            pass
+
+    def fake_get(url, headers=None, stream=False, timeout=None):
+        seen.update(headers or {})
+        if headers.get("If-None-Match") == '"v1"':
+            return FakeUpstream(304, {"ETag": '"v1"'})
+        return FakeUpstream(
+            206,
+            {
+                "Content-Type": "application/pdf",
+                "Content-Length": "4",
+                "Content-Range": "bytes 0-3/100",
+                "Accept-Ranges": "bytes",
+                "ETag": '"v1"',
+                "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT",
+            },
+            b"%PDF",
+        )
+
+    monkeypatch.setattr(s3_service.requests, "get", fake_get)
+
+    app = Flask(__name__)
+
+    @app.route("/view_file")
+    def view_file():
+        return s3_service.proxy_download("https://s3/obj", {"Cache-Control": "private, max-age=3600"})
+
+    client = app.test_client()
+    resp = client.get("/view_file", headers={"Range": "bytes=0-3", "Cookie": "session=x"})
+    assert resp.status_code == 206
+    assert resp.data == b"%PDF"
+    assert resp.headers["Content-Range"] == "bytes 0-3/100"
+    assert resp.headers["ETag"] == '"v1"'
+    assert seen == {"Range": "bytes=0-3"}
+
+    resp = client.get("/view_file", headers={"If-None-Match": '"v1"'})
+    assert resp.status_code == 304
+    assert resp.data == b""
+
+
+def test_preview_key_and_service_calls(monkeypatch):
+    """
+    Test: the gateway builds the upload key from the file document and asks
+    the s3 service to render / serve its preview.
+    """
+    from flask import Flask
+    from app.managers.response_management import ResponseManager
+    from app.routes import user
+    from app.services import s3_service
+
+    calls = []
+
+    def fake_search(**kwargs):
+        return ResponseManager.success(data=[{"serial": 7, "case_serial": 3, "name": "scan.pdf"}])
+
+    def fake_request(service_url, method, path, **kwargs):
+        calls.append((method, path, kwargs))
+        return ResponseManager.success(data="https://s3/previews/1/3/7.webp", status=202)
+
+    monkeypatch.setattr(user.mongodb_service, "search_entities", fake_search)
+    monkeypatch.setattr(s3_service, "safe_service_request", fake_request)
+
+    app = Flask(__name__)
+    app.config["S3_SERVICE_URL"] = "http://s3"
+    with app.app_context():
+        file_doc, key, error = user._find_file_key(1, "7")
+        assert error is None
+        assert key == "uploads/1/3/7/scan.pdf"
+
+        assert ResponseManager.is_success(s3_service.generate_preview(key))
+        s3_service.get_preview(key)
+
+    assert calls == [
+        ("POST", "/previews/generate", {"json": {"key": key}}),
+        ("GET", "/preview", {"params": {"key": key}}),
+    ]
+
+
+def test_presign_batch_reserves_serials_and_presigns_in_one_call(monkeypatch):
+    """
+    Test: one /presign/batch call = one mongodb batch insert + one s3 batch
+    presign; a disallowed extension rejects the whole batch up front.
+    """
+    from flask import Flask
+    from app.managers.response_management import ResponseManager
+    from app.routes import user
+
+    calls = []
+
+    def fake_create_entities(entity, office_serial, documents):
+        calls.append(("mongo", [d["name"] for d in documents]))
+        return ResponseManager.created(data=[41, 42])
+
+    def fake_presign(files):
+        calls.append(("s3", [f["key"] for f in files]))
+        return ResponseManager.success(data=[{"key": f["key"], "presigned": {"url": "u"}} for f in files])
+
+    monkeypatch.setattr(user.AuthorizationManager, "get_office_serial", classmethod(lambda cls: 1))
+    monkeypatch.setattr(user.AuthorizationManager, "get_user_serial", classmethod(lambda cls: 9))
+    monkeypatch.setattr(user.mongodb_service, "create_entities", fake_create_entities)
+    monkeypatch.setattr(user.s3_service, "generate_presigned_posts", fake_presign)
+
+    view = user.proxy_presign_batch.__wrapped__
+    app = Flask(__name__)
+    files = [
+        {"file_name": "a.pdf", "file_type": "application/pdf", "file_size": 10},
+        {"file_name": "b b.png", "file_type": "image/png", "file_size": 20},
+    ]
+
+    with app.test_request_context(json={"case_serial": 3, "files": files}):
+        resp = view()
+        assert ResponseManager.is_success(resp)
+        assert [item["serial"] for item in ResponseManager.get_data(resp)] == [41, 42]
+    assert calls == [
+        ("mongo", ["a.pdf", "b_b.png"]),
+        ("s3", ["uploads/1/3/41/a.pdf", "uploads/1/3/42/b_b.png"]),
+    ]
+
+    calls.clear()
+    with app.test_request_context(json={"case_serial": 3, "files": files + [{"file_name": "x.exe", "file_type": "x", "file_size": 1}]}):
+        resp = view()
+        assert ResponseManager.is_bad_request(resp)
+    assert calls == []
+
+
+def test_iter_keys_reads_ndjson_stream(monkeypatch):
+    """
+    Test: full scans come from the NDJSON stream line by line, and an error
+    line written after the headers were sent is raised, not swallowed.
+    """
+    from flask import Flask
+    from app.services import s3_service
+
+    lines = [
+        b'{"key":"uploads/1/2/3/a.pdf","size":10,"etag":"\\"e1\\"","last_modified":null}',
+        b"",
+        b'{"key":"uploads/1/2/4/b.pdf","size":20,"etag":"\\"e2\\"","last_modified":null}',
+    ]
+
+    class FakeStream:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def raise_for_status(self):
+            pass
+
+        def iter_lines(self):
+            return iter(lines)
+
+    seen = {}
+
+    def fake_get(url, params=None, stream=False, timeout=None):
+        seen.update(url=url, params=params, stream=stream)
+        return FakeStream()
+
+    monkeypatch.setattr(s3_service.requests, "get", fake_get)
+
+    app = Flask(__name__)
+    app.config["S3_SERVICE_URL"] = "http://s3"
+    with app.app_context():
+        keys = list(s3_service.iter_keys("uploads/1/"))
+        assert [k["key"] for k in keys] == ["uploads/1/2/3/a.pdf", "uploads/1/2/4/b.pdf"]
+        assert keys[1]["size"] == 20
+        assert seen == {"url": "http://s3/list_keys", "params": {"prefix": "uploads/1/", "stream": "1"}, "stream": True}
+
+        lines.append(b'{"error":"Failed to list S3 keys"}')
+        with pytest.raises(RuntimeError):
+            list(s3_service.iter_keys("uploads/1/"))
+
+
+def test_usage_counters_incremental_and_reconciled():
+    """
+    Test: uploads/deletes move the office and case counters; reconciliation
+    from a listing overwrites drift and drops cases that no longer exist.
+    """
+    import fnmatch
+    from flask import Flask
+    from app.managers.usage_management import UsageManager
+
+    class FakeRedis:
+        def __init__(self):
+            self.hashes = {}
+
+        def pipeline(self, transaction=True):
+            redis, ops = self, []
+
+            class Pipe:
+                def __getattr__(self, name):
+                    return lambda *a, **kw: ops.append((name, a, kw))
+
+                def execute(self):
+                    return [getattr(redis, name)(*a, **kw) for name, a, kw in ops]
+
+            return Pipe()
+
+        def hincrby(self, key, field, amount):
+            h = self.hashes.setdefault(key, {})
+            h[field] = int(h.get(field, 0)) + amount
+            return h[field]
+
+        def hset(self, key, mapping):
+            self.hashes.setdefault(key, {}).update(mapping)
+
+        def hgetall(self, key):
+            return dict(self.hashes.get(key, {}))
+
+        def delete(self, *keys):
+            for key in keys:
+                self.hashes.pop(key, None)
+
+        def scan_iter(self, match, count=None):
+            return [k for k in list(self.hashes) if fnmatch.fnmatch(k, match)]
+
+    app = Flask(__name__)
+    app.config["SESSION_REDIS"] = FakeRedis()
+
+    with app.app_context():
+        UsageManager.record(1, 10, 100)
+        UsageManager.record(1, 10, 50)
+        UsageManager.record(1, 11, 7)
+        UsageManager.record(1, 10, -50, objects=-1)
+        assert UsageManager.get_office(1)["bytes"] == 107
+        assert UsageManager.get_case(1, 10) == {"bytes": 100, "objects": 1, "reconciled_at": None}
+        assert UsageManager.is_due(1)
+
+        listing = [
+            {"key": "uploads/1/10/5/a.pdf", "size": 120},
+            {"key": "uploads/1/12/6/b.pdf", "size": 30},
+        ]
+        UsageManager.reconcile(1, iter(listing))
+
+        usage = UsageManager.get_offices([1, 2])
+        assert (usage[1]["bytes"], usage[1]["objects"]) == (150, 2)
+        assert usage[2]["bytes"] == 0
+        assert UsageManager.get_case(1, 11)["objects"] == 0
+        assert not UsageManager.is_due(1)
+
+        UsageManager.drop_case(1, 12)
+        assert UsageManager.get_office(1)["bytes"] == 120
+
+
+def test_dedup_batch_skips_stored_content_and_releases_last_reference(monkeypatch):
+    """
+    Test: with FILE_DEDUP a file whose SHA-256 the office already stores is
+    created available (no presign), a new hash uploads to a fresh blob
+    generation, and a blob is deleted only once no FILES record references
+    it. A record attached while the blob is being released (tombstone seen
+    after the insert) moves to a fresh generation and uploads instead.
+    """
+    from flask import Flask
+    from app.managers.response_management import ResponseManager
+    from app.routes import user
+
+    stored, new = "a" * 64, "b" * 64
+    stored_key = f"blobs/1/{stored}/" + "1" * 32
+    calls, refs, tombstones = [], {stored_key: [{"serial": 7}]}, {}
+
+    class FakeRedis:
+        def set(self, key, value, ex=None):
+            tombstones[key] = value
+
+        def mget(self, keys):
+            return [tombstones.get(k) for k in keys]
+
+    def fake_search(entity, office_serial=None, filters=None, projection=None, limit=0, **kwargs):
+        if "sha256" in filters:
+            return ResponseManager.success(data=[{"serial": 7, "sha256": stored, "blob_key": stored_key}])
+        docs = refs.get(filters["blob_key"])
+        return ResponseManager.success(data=docs) if docs else ResponseManager.no_content()
+
+    def fake_create_entities(entity, office_serial, documents):
+        calls.append(("mongo", [(d["status"], d.get("blob_key")) for d in documents]))
+        if race:
+            user._release_blob(1, stored_key)  # concurrent delete of the last other reference
+        return ResponseManager.created(data=[41, 42])
+
+    def fake_presign(files):
+        calls.append(("s3", [f["key"] for f in files]))
+        return ResponseManager.success(data=[{"key": f["key"], "presigned": {"url": "u"}} for f in files])
+
+    monkeypatch.setattr(user.AuthorizationManager, "get_office_serial", classmethod(lambda cls: 1))
+    monkeypatch.setattr(user.AuthorizationManager, "get_user_serial", classmethod(lambda cls: 9))
+    monkeypatch.setattr(user.mongodb_service, "search_entities", fake_search)
+    monkeypatch.setattr(user.mongodb_service, "create_entities", fake_create_entities)
+    monkeypatch.setattr(user.s3_service, "generate_presigned_posts", fake_presign)
+    monkeypatch.setattr(
+        user.mongodb_service, "update_entities",
+        lambda **kw: calls.append(("update", kw["update_data"])) or ResponseManager.success(),
+    )
+    monkeypatch.setattr(user, "_new_blob_key", lambda office, sha256: f"blobs/{office}/{sha256}/" + "2" * 32)
+    monkeypatch.setattr(
+        user.s3_service, "generate_preview",
+        lambda key, source=None: calls.append(("preview", key, source)) or ResponseManager.success(),
+    )
+    monkeypatch.setattr(user.s3_service, "object_size", lambda key: 10)
+    monkeypatch.setattr(user.s3_service, "delete", lambda key: calls.append(("delete", key)) or ResponseManager.success())
+    monkeypatch.setattr(user.UsageManager, "record", classmethod(lambda cls, *args, **kw: calls.append(("usage", args))))
+
+    app = Flask(__name__)
+    app.config.update(FILE_DEDUP=True, SESSION_REDIS=FakeRedis())
+    new_key, race = f"blobs/1/{new}/" + "2" * 32, False
+    files = [
+        {"file_name": "a.pdf", "file_type": "application/pdf", "file_size": 10, "sha256": stored.upper()},
+        {"file_name": "b.pdf", "file_type": "application/pdf", "file_size": 20, "sha256": new},
+    ]
+
+    with app.test_request_context(json={"case_serial": 3, "files": files}):
+        resp = user.proxy_presign_batch.__wrapped__()
+        items = ResponseManager.get_data(resp)
+        assert [(i["serial"], i["deduplicated"], i["presigned"]) for i in items] == [
+            (41, True, None), (42, False, {"url": "u"}),
+        ]
+
+        # still referenced by another file: kept; last reference gone: deleted
+        user._release_blob(1, stored_key)
+        refs.clear()
+        user._release_blob(1, stored_key)
+
+    assert calls == [
+        ("mongo", [("available", stored_key), ("pending", new_key)]),
+        ("preview", "uploads/1/3/41/a.pdf", stored_key),
+        ("s3", [new_key]),
+        ("delete", stored_key),
+        ("usage", (1, None, -10)),
+    ]
+
+    # the release starts after the lookup but before the tombstone check
+    calls.clear(), tombstones.clear()
+    refs[stored_key], race = [{"serial": 7}], True
+    with app.test_request_context(json={"case_serial": 3, "files": files[:1]}):
+        items = ResponseManager.get_data(user.proxy_presign_batch.__wrapped__())
+    fresh_key = f"blobs/1/{stored}/" + "2" * 32
+    assert calls == [
+        ("mongo", [("available", stored_key)]),
+        ("update", {"status": "pending", "blob_key": fresh_key}),
+        ("s3", [fresh_key]),
+    ]
+    assert items[0]["deduplicated"] is False
+
+
+def test_case_export_streams_zip_with_prefetch(monkeypatch):
+    """
+    Test: the case ZIP is produced chunk by chunk from the object streams,
+    duplicate names stay distinct, and a missing object is listed in the
+    archive instead of breaking the download.
+    """
+    import io
+    import zipfile
+    from flask import Flask
+    from app.managers import export_management
+    from app.managers.export_management import CaseExportManager
+    from app.managers.response_management import ResponseManager
+
+    objects = {"k1": b"a" * 2500, "k2": b"b" * 10}
+
+    class FakeObject:
+        def __init__(self, data):
+            self.data = data
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def raise_for_status(self):
+            if self.data is None:
+                raise export_management.requests.HTTPError("404")
+
+        def iter_content(self, chunk_size):
+            return (self.data[i:i + chunk_size] for i in range(0, len(self.data), chunk_size))
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(
+        export_management.s3_service, "generate_presigned_get",
+        lambda key, expires_in=3600: ResponseManager.success(data=key),
+    )
+    monkeypatch.setattr(export_management.requests, "get", lambda url, **kw: FakeObject(objects.get(url)))
+    monkeypatch.setattr(CaseExportManager, "CHUNK_SIZE", 1000)
+    monkeypatch.setattr(CaseExportManager, "PREFETCH_BYTES", 1000)
+
+    names = CaseExportManager.archive_names(["scan.pdf", "scan.pdf", "notes"])
+    assert names == ["scan.pdf", "scan (2).pdf", "notes"]
+
+    app = Flask(__name__)
+    with app.app_context():
+        chunks = list(CaseExportManager.stream(list(zip(names, ["k1", "k2", "missing"]))))
+
+    assert len([c for c in chunks if c]) > 3  # streamed, not one blob
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.read("scan.pdf") == objects["k1"]
+    assert archive.read("scan (2).pdf") == objects["k2"]
+    assert "notes" in archive.read(CaseExportManager.ERRORS_NAME).decode()
+
+
+def test_enqueue_email_returns_without_calling_ses(monkeypatch):
+    """
+    Test: recovery emails go to the Redis outbox (202, no call to the ses
+    service); only when Redis is down does the gateway send directly.
+    """
+    import json
+    from flask import Flask
+    from redis.exceptions import ConnectionError as RedisConnectionError
+    from app.managers.response_management import ResponseManager
+    from app.services import ses_service
+
+    class FakeRedis:
+        def __init__(self):
+            self.lists = {}
+            self.down = False
+
+        def lpush(self, key, value):
+            if self.down:
+                raise RedisConnectionError("redis down")
+            self.lists.setdefault(key, []).insert(0, value)
+
+    sent = []
+    monkeypatch.setattr(
+        ses_service, "send_email",
+        lambda **kw: sent.append(kw) or ResponseManager.success(),
+    )
+
+    app = Flask(__name__)
+    app.config["SESSION_REDIS"] = redis = FakeRedis()
+    with app.app_context():
+        res = ses_service.enqueue_email(to_email="a@b.c", subject="s", message="m")
+        assert ResponseManager.get_status(res) == 202
+        job = json.loads(redis.lists[ses_service.OUTBOX_KEY][0])
+        assert (job["to"], job["subject"], job["message"], job["attempts"]) == ("a@b.c", "s", "m", 0)
+        assert job["id"] == ResponseManager.get_data(res)
+        assert sent == []
+
+        redis.down = True
+        assert ResponseManager.is_success(ses_service.enqueue_email(to_email="a@b.c", subject="s", message="m"))
+        assert sent == [{"to_email": "a@b.c", "subject": "s", "message": "m"}]
+
+    # /send_email answers with the outcome, never a blanket success
+    from app.routes import site
+
+    body = {"to": "a@b.c", "subject": "s", "message": "m"}
+    redis.down = False
+    with app.test_request_context(json=body):
+        assert ResponseManager.get_status(site.send_email()) == 202
+
+    redis.down = True
+    monkeypatch.setattr(ses_service, "send_email", lambda **kw: ResponseManager.bad_gateway(message="ses down"))
+    with app.test_request_context(json=body):
+        assert not ResponseManager.is_success(site.send_email())
+
+
+def test_file_storage_fields_are_server_side_only(monkeypatch):
+    """
+    Test: update_file only accepts whitelisted fields, and a blob_key that
+    isn't the office's blob for the stored hash is never used as an S3 key.
+    """
+    from flask import Flask
+    from app.managers.response_management import ResponseManager
+    from app.routes import user
+
+    sha256 = "c" * 64
+    doc = {"serial": 7, "case_serial": 3, "name": "a.pdf", "sha256": sha256}
+    updates = []
+
+    monkeypatch.setattr(user.AuthorizationManager, "get_office_serial", classmethod(lambda cls: 1))
+    monkeypatch.setattr(user.mongodb_service, "search_entities", lambda **kw: ResponseManager.success(data=[dict(doc)]))
+    monkeypatch.setattr(user.mongodb_service, "update_entities", lambda **kw: updates.append(kw) or ResponseManager.success())
+
+    app = Flask(__name__)
+    with app.test_request_context("/update_file?serial=7", method="PATCH", json={"blob_key": "uploads/2/1/1/x.pdf"}):
+        assert ResponseManager.is_bad_request(user.update_file.__wrapped__())
+    with app.test_request_context("/update_file?serial=7", method="PATCH", json={"status": "available", "sha256": sha256}):
+        assert ResponseManager.is_bad_request(user.update_file.__wrapped__())
+    with app.test_request_context("/update_file?serial=7", method="PATCH", json={"description": "x"}):
+        assert ResponseManager.is_success(user.update_file.__wrapped__())
+    assert [u["update_data"] for u in updates] == [{"description": "x"}]
+
+    with app.app_context():
+        doc["blob_key"] = f"blobs/2/{sha256}/" + "0" * 32  # another office's blob
+        assert user._find_file_key(1, 7)[2] is not None
+        doc["blob_key"] = f"blobs/1/{sha256}/../../2/x"
+        assert user._find_file_key(1, 7)[2] is not None
+        doc["blob_key"] = f"blobs/1/{sha256}/" + "0" * 32
+        assert user._find_file_key(1, 7)[1] == f"blobs/1/{sha256}/" + "0" * 32
+
+
+def test_multipart_routes_reject_keys_outside_the_office(monkeypatch):
+    """
+    Test: the multipart proxy routes only pass keys under this office's
+    uploads/ or blobs/ prefix on to the S3 service.
+    """
+    from flask import Flask
+    from app.managers.response_management import ResponseManager
+    from app.routes import user
+
+    forwarded = []
+    monkeypatch.setattr(user.AuthorizationManager, "get_office_serial", classmethod(lambda cls: 1))
+    for name in ("start_multipart_upload", "presign_multipart_parts", "complete_multipart_upload", "abort_multipart_upload"):
+        monkeypatch.setattr(
+            user.s3_service, name,
+            lambda name=name, **kw: forwarded.append((name, kw["key"])) or ResponseManager.success(),
+        )
+
+    routes = [
+        (user.proxy_multipart_start, {"file_name": "a.pdf", "file_type": "application/pdf", "file_size": 10}),
+        (user.proxy_multipart_part, {"upload_id": "u", "part_numbers": [1]}),
+        (user.proxy_multipart_complete, {"upload_id": "u"}),
+        (user.proxy_multipart_abort, {"upload_id": "u"}),
+    ]
+    app = Flask(__name__)
+    for view, body in routes:
+        for key in ("uploads/2/3/4/a.pdf", "uploads/1/../2/a.pdf", "previews/1/3/4.webp", "uploads/10/3/4/a.pdf"):
+            with app.test_request_context(json={**body, "key": key}):
+                assert ResponseManager.get_status(view.__wrapped__()) == 403
+        for key in ("uploads/1/3/4/a.pdf", f"blobs/1/{'a' * 64}/" + "0" * 32):
+            with app.test_request_context(json={**body, "key": key}):
+                assert ResponseManager.is_success(view.__wrapped__())
+
+    assert len(forwarded) == 8
+    assert {key for _, key in forwarded} == {"uploads/1/3/4/a.pdf", f"blobs/1/{'a' * 64}/" + "0" * 32}
+
+
+def test_response_data_is_not_shared_between_callers():
+    """
+    Test: the parsed payload is cached per response, but every get_data()
+    caller gets its own object - mutating it (e.g. popping a field) does not
+    leak into later reads of the same response.
+    """
+    from flask import Flask
+    from app.managers.response_management import ResponseManager
+
+    app = Flask(__name__)
+    with app.app_context():
+        res = ResponseManager.success(data={"serial": 1, "office_serial": 5, "roles": ["admin"]})
+        assert ResponseManager.is_success(res)
+
+        user = ResponseManager.get_data(res)
+        user.pop("office_serial")
+        user["roles"].append("owner")
+
+        assert ResponseManager.get_data(res) == {"serial": 1, "office_serial": 5, "roles": ["admin"]}
+        assert ResponseManager.get_data(res) is not ResponseManager.get_data(res)
+        assert ResponseManager.is_success(res) and ResponseManager.get_status(res) == 200
+
+
+def test_upload_file_content_streams_the_raw_body(monkeypatch):
+    """
+    Test: a server-side upload passes the incoming request.stream on to the
+    S3 service untouched (no form parsing), under the key of the file record,
+    with a Content-Length instead of a chunked body.
+    """
+    import requests
+    from flask import Flask, request
+    from app.managers.response_management import ResponseManager
+    from app.routes import user
+    from app.services import s3_service
+
+    doc = {"serial": 7, "case_serial": 3, "name": "a.pdf", "status": "pending"}
+    sent = []
+
+    def fake_service_request(service_url, method, path, timeout=30, **kwargs):
+        prepared = requests.Request(method, f"{service_url}{path}", **kwargs).prepare()
+        sent.append((path, kwargs["params"], prepared.headers, kwargs["data"].read(), timeout))
+        return ResponseManager.created(data=kwargs["params"]["key"])
+
+    monkeypatch.setattr(user.AuthorizationManager, "get_office_serial", classmethod(lambda cls: 1))
+    monkeypatch.setattr(user.mongodb_service, "search_entities", lambda **kw: ResponseManager.success(data=[dict(doc)]))
+    monkeypatch.setattr(s3_service, "safe_service_request", fake_service_request)
+
+    app = Flask(__name__)
+    app.config["S3_SERVICE_URL"] = "http://s3"
+    body = b"%PDF" + b"x" * 100_000
+    with app.test_request_context(
+        "/upload_file_content?serial=7", method="PUT", content_type="application/pdf",
+        data=body,
+    ):
+        assert not request.stream.seekable()  # what requests can't size by itself
+        res = user.upload_file_content.__wrapped__()
+        assert ResponseManager.is_created(res)
+
+    path, params, headers, data, timeout = sent[0]
+    assert (path, params) == ("/create", {"key": "uploads/1/3/7/a.pdf"})
+    assert headers["Content-Length"] == str(len(body)) and "Transfer-Encoding" not in headers
+    assert headers["Content-Type"] == "application/pdf"
+    assert data == body and timeout == s3_service.UPLOAD_TIMEOUT
+
+    doc["status"] = "available"
+    with app.test_request_context("/upload_file_content?serial=7", method="PUT", data=b"x"):
+        assert ResponseManager.is_conflict(user.upload_file_content.__wrapped__())
@@ -2,12 +2,15 @@
 import os
 from flask import Flask
 
+from .managers.compression_management import CompressionManager
 from .managers.formatter_management import configure_logging, disable_all_logging
 from .managers.mongodb_management import MongoDBManager
+from .managers.json_provider import FastJSONProvider
 
 
 def create_flask_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.secret_key = os.getenv("SECRET_KEY", "fallback-secret-key")
     configure_logging(app)
     disable_all_logging(app)
@@ -19,4 +22,7 @@ def create_flask_app():
 
     app.register_blueprint(bp)
 
+    # gzip large JSON lists on the way back to the gateway
+    CompressionManager.init_app(app)
+
     return app
@@ -0,0 +1,42 @@
+# app/managers/compression_management.py
+import gzip
+import os
+from flask import request
+
+
+class CompressionManager:
+    """
+    gzip for large JSON responses (office cases/files/clients lists).
+
+    The gateway's `requests` calls already send "Accept-Encoding: gzip" and
+    decode transparently, so only the service side needs to opt in.
+    """
+
+    MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    LEVEL = int(os.getenv("COMPRESSION_LEVEL", "1"))  # cheap CPU, big win on JSON
+
+    @classmethod
+    def _should_compress(cls, response) -> bool:
+        return (
+            response.status_code == 200
+            and response.mimetype == "application/json"
+            and not response.direct_passthrough
+            and "Content-Encoding" not in response.headers
+            and "gzip" in request.accept_encodings
+            and (response.content_length or 0) >= cls.MIN_SIZE
+        )
+
+    @classmethod
+    def compress(cls, response):
+        """after_request hook."""
+        response.vary.add("Accept-Encoding")
+        if not cls._should_compress(response):
+            return response
+
+        response.set_data(gzip.compress(response.get_data(), compresslevel=cls.LEVEL))
+        response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    @classmethod
+    def init_app(cls, app):
+        app.after_request(cls.compress)
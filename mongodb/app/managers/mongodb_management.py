@@ -478,6 +478,11 @@ class MongoDBManager:
                 if collection_name == cls.profiles_collection_name:
                     collection.create_index("name", unique=True)
 
+                if collection_name == cls.files_collection_name:
+                    # content-addressed dedup: hash lookups and blob reference counts
+                    collection.create_index("sha256", sparse=True)
+                    collection.create_index("blob_key", sparse=True)
+
                 for idx in collection.list_indexes():
                     created_indexes.append(f"{collection_name}.{idx['name']}")
 
@@ -892,6 +897,71 @@ class MongoDBManager:
         current_app.logger.debug(msg)
         return ResponseManager.created(data=serial, message=msg)
 
+    @classmethod
+    def create_entities(cls, entity: str, office_serial: int, documents: list):
+        """
+        Batch create for one entity type (e.g. several files dropped on a case).
+        Reserves all serials with one counter update and inserts with one insert_many.
+
+        Args:
+            entity (str): Entity type (users, clients, cases, files).
+            office_serial (int): Tenant office serial number.
+            documents (list[dict]): Documents to insert, in order.
+
+        Returns:
+            ResponseManager: created with the new serials (same order as documents), or error response.
+        """
+
+        current_app.logger.debug(f"inside create_entities()")
+
+        if not entity:
+            msg = f"'entity' is required"
+            current_app.logger.warning(msg)
+            return ResponseManager.bad_request(message=msg)
+
+        if not office_serial:
+            msg = f"'office_serial' is required"
+            current_app.logger.warning(msg)
+            return ResponseManager.bad_request(message=msg)
+
+        if not documents or not isinstance(documents, list) or not all(isinstance(d, dict) for d in documents):
+            msg = f"returning bad_request: missing or invalid 'documents'"
+            current_app.logger.warning(msg)
+            return ResponseManager.bad_request(message=msg)
+
+        db_name = str(office_serial)
+
+        counter_res = MongoDBManager.get_entity_counter(entity=entity, db_name=db_name, count=len(documents))
+        if not ResponseManager.is_success(response=counter_res):
+            error_res = ResponseManager.get_error(response=counter_res)
+            msg_res = ResponseManager.get_message(response=counter_res)
+            msg = f"failed to get counter, result details: [error - {error_res}, message - {msg_res}]"
+            current_app.logger.warning(msg)
+            return counter_res
+
+        # counter now points at the last reserved serial
+        last_serial = ResponseManager.get_data(response=counter_res)
+        serials = list(range(last_serial - len(documents) + 1, last_serial + 1))
+        for document, serial in zip(documents, serials):
+            document["serial"] = serial
+
+        create_res = cls._create_records(
+            db_name=db_name,
+            collection_name=entity,
+            documents=documents,
+        )
+
+        if not ResponseManager.is_success(response=create_res):
+            error_res = ResponseManager.get_error(response=create_res)
+            msg_res = ResponseManager.get_message(response=create_res)
+            msg = f"failed to create entities in DB '{db_name}', result details: [error - {error_res}, message - {msg_res}]"
+            current_app.logger.warning(msg)
+            return create_res
+
+        msg = f"created {len(serials)} new {entity} with serials={serials[0]}..{serials[-1]} in DB {db_name}"
+        current_app.logger.debug(msg)
+        return ResponseManager.created(data=serials, message=msg)
+
     @classmethod
     def delete_entities(
         cls, entity: str, office_serial: int = None, filters: dict = None
@@ -1053,15 +1123,18 @@ class MongoDBManager:
     # ------------------------ Counters -------------------------
 
     @classmethod
-    def _get_next_counter(cls, db_name: str, counter_name: str) -> tuple:
+    def _get_next_counter(cls, db_name: str, counter_name: str, count: int = 1) -> tuple:
         """
         Atomically increments and returns the next sequence value for a counter.
 
         Commonly used for generating unique serials (e.g., user IDs, case IDs).
+        With count > 1 a block of serials is reserved in the same single update;
+        the returned value is the last one of the block.
 
         Args:
             db_name (str): The tenant (office) database name.
             counter_name (str): The counter key (e.g., "user_counter").
+            count (int): How many serials to reserve.
 
         Returns:
             ResponseManager: success with new counter value, or error response.
@@ -1088,7 +1161,7 @@ class MongoDBManager:
 
             result = collection.find_one_and_update(
                 {"_id": counter_name},
-                {"$inc": {"value": 1}},
+                {"$inc": {"value": int(count)}},
                 upsert=True,
                 return_document=ReturnDocument.AFTER,
             )
@@ -1114,24 +1187,25 @@ class MongoDBManager:
     # ---------- Tenant ----------
 
     @classmethod
-    def get_entity_counter(cls, entity: str, db_name: str) -> tuple:
-        """Increment and return the user counter for the given tenant DB."""
+    def get_entity_counter(cls, entity: str, db_name: str, count: int = 1) -> tuple:
+        """Increment and return the counter of the entity in the given tenant DB."""
         match entity:
             case cls.users_collection_name:
-                return cls.get_user_counter(db_name)
+                counter_name = cls.user_counter_name
             case cls.clients_collection_name:
-                return cls.get_client_counter(db_name)
+                counter_name = cls.client_counter_name
             case cls.cases_collection_name:
-                return cls.get_case_counter(db_name)
+                counter_name = cls.case_counter_name
             case cls.files_collection_name:
-                return cls.get_file_counter(db_name)
+                counter_name = cls.file_counter_name
             case cls.tasks_collection_name:
-                return cls.get_task_counter(db_name)
+                counter_name = cls.task_counter_name
             case cls.profiles_collection_name:
-                return cls.get_profile_counter(db_name)
+                counter_name = cls.profile_counter_name
             case _:
                 msg = f"Unknown entity: {entity}"
                 return ResponseManager.bad_request(message=msg)
+        return cls._get_next_counter(db_name, counter_name, count)
 
     @classmethod
     def get_user_counter(cls, db_name: str) -> tuple:
@@ -67,6 +67,19 @@ def create_entity():
     )
 
 
+@bp.route("/entities/batch", methods=["POST"])
+def create_entities():
+    data = request.get_json(silent=True) or {}
+
+    entity = data.get("entity")
+    office_serial = data.get("office_serial")
+    documents = data.get("documents")
+
+    return MongoDBManager.create_entities(
+        entity=entity, office_serial=office_serial, documents=documents
+    )
+
+
 @bp.route("/entities/delete", methods=["DELETE"])
 def delete_entities():
     data = request.get_json(silent=True) or {}
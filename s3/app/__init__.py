@@ -6,9 +6,11 @@ from prometheus_client import Counter
 
 from .managers.formatter_management import configure_logging
 from .managers.s3_management import S3Manager
+from .managers.json_provider import FastJSONProvider
 
 def create_flask_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.secret_key = os.getenv("SECRET_KEY", "fallback-secret-key")
     configure_logging(app)
 
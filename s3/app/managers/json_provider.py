@@ -0,0 +1,62 @@
+# app/managers/json_provider.py
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: plain stdlib json without it
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson (jsonify, request.get_json, ...).
+
+    Output matches the default provider: dates, dataclasses, Decimal and
+    __html__ objects still go through Flask's own `default`. Anything orjson
+    rejects (ints beyond 64 bit, custom dumps kwargs) falls back to the
+    stdlib implementation, and so does everything if orjson isn't installed.
+
+        app.json = FastJSONProvider(app)
+    """
+
+    def _options(self, indent: bool = False) -> int:
+        options = (
+            orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def _dumps_bytes(self, obj, indent: bool = False):
+        """orjson bytes, or None if orjson can't handle the object."""
+        if orjson is None:
+            return None
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options(indent))
+        except TypeError:
+            return None
+
+    def dumps(self, obj, **kwargs) -> str:
+        if not kwargs:
+            body = self._dumps_bytes(obj)
+            if body is not None:
+                return body.decode("utf-8")
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+
+        body = self._dumps_bytes(obj, indent=indent)
+        if body is None:
+            return super().response(obj)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
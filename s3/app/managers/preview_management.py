@@ -0,0 +1,214 @@
+# app/managers/preview_management.py
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import botocore.exceptions
+from flask import current_app
+from PIL import Image, ImageOps
+
+from .response_management import ResponseManager
+from .s3_management import S3Manager
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # optional: PDFs get no preview without it
+    pdfium = None
+
+# PDFium is not thread-safe, not even across separate documents: only one
+# thread may be inside it at a time (Pillow-only images render in parallel)
+_pdfium_lock = threading.Lock()
+
+
+class PreviewManager:
+    """
+    Background thumbnail pipeline for uploaded case files.
+
+    After upload the gateway asks for a preview; the file is rendered on a
+    small worker pool (first page for PDFs - one at a time, PDFium is not
+    thread-safe - the image itself for images),
+    shrunk to PREVIEW_SIZE and stored as WebP next to the originals:
+
+        uploads/{office}/{case}/{file}/{name}  ->  previews/{office}/{case}/{file}.webp
+
+    Deduplicated files keep their bytes in a shared blobs/{office}/{sha256}/...
+    object; the preview is still keyed by the file, rendered from that source.
+    """
+
+    PREVIEW_PREFIX = "previews"
+    PREVIEW_CONTENT_TYPE = "image/webp"
+    PREVIEW_SIZE = int(os.getenv("PREVIEW_SIZE", "480"))
+    PREVIEW_QUALITY = int(os.getenv("PREVIEW_QUALITY", "75"))
+    PREVIEW_MAX_SOURCE_MB = int(os.getenv("PREVIEW_MAX_SOURCE_MB", "25"))
+
+    IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "webp", "bmp", "tif", "tiff"}
+    PDF_EXTENSIONS = {"pdf"}
+
+    _executor = ThreadPoolExecutor(
+        max_workers=int(os.getenv("PREVIEW_WORKERS", "2")),
+        thread_name_prefix="preview",
+    )
+
+    # ------------------------ Keys -------------------------
+    @classmethod
+    def preview_key(cls, key: str):
+        """uploads/{office}/{case}/{file}/{name} -> previews/{office}/{case}/{file}.webp"""
+        parts = (key or "").split("/")
+        if len(parts) != 5 or parts[0] != "uploads":
+            return None
+        _, office, case, file_serial, _name = parts
+        return f"{cls.PREVIEW_PREFIX}/{office}/{case}/{file_serial}.webp"
+
+    @classmethod
+    def _kind(cls, key: str, content_type: str = ""):
+        ext = key.rsplit(".", 1)[-1].lower() if "." in key else ""
+        if ext in cls.PDF_EXTENSIONS or content_type == "application/pdf":
+            return "pdf"
+        if ext in cls.IMAGE_EXTENSIONS or content_type.startswith("image/"):
+            return "image"
+        return None
+
+    # ------------------------ Rendering -------------------------
+    @classmethod
+    def render(cls, data: bytes, kind: str):
+        """Render source bytes to WebP thumbnail bytes (None if unsupported)."""
+        if kind == "pdf":
+            if pdfium is None:
+                return None
+            with _pdfium_lock:
+                pdf = pdfium.PdfDocument(data)
+                try:
+                    page = pdf[0]
+                    # scale so the longer side is about PREVIEW_SIZE before the final resize
+                    width, height = page.get_size()
+                    scale = max(cls.PREVIEW_SIZE / max(width, height, 1), 0.1)
+                    image = page.render(scale=scale).to_pil().copy()  # own memory, not PDFium's
+                finally:
+                    pdf.close()
+        elif kind == "image":
+            image = Image.open(io.BytesIO(data))
+            image.seek(0)  # first frame of GIF / multi-page TIFF
+            image = ImageOps.exif_transpose(image)
+        else:
+            return None
+
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        image.thumbnail((cls.PREVIEW_SIZE, cls.PREVIEW_SIZE))
+
+        out = io.BytesIO()
+        image.save(out, format="WEBP", quality=cls.PREVIEW_QUALITY, method=4)
+        return out.getvalue()
+
+    @classmethod
+    def generate(cls, key: str, source: str = None):
+        """Fetch the original, render it and store the preview. Returns the preview key or None."""
+        preview_key = cls.preview_key(key)
+        if not preview_key:
+            current_app.logger.debug(f"no preview for non-upload key: {key}")
+            return None
+        source = source or key
+
+        client, bucket = S3Manager._client, S3Manager._bucket
+        try:
+            head = client.head_object(Bucket=bucket, Key=source)
+            kind = cls._kind(key, head.get("ContentType", ""))
+            if kind is None:
+                current_app.logger.debug(f"no preview for file type: {key}")
+                return None
+            if head.get("ContentLength", 0) > cls.PREVIEW_MAX_SOURCE_MB * 1024 * 1024:
+                current_app.logger.debug(f"file too large for preview: {key}")
+                return None
+
+            data = client.get_object(Bucket=bucket, Key=source)["Body"].read()
+            preview = cls.render(data, kind)
+            if preview is None:
+                return None
+
+            client.put_object(
+                Bucket=bucket,
+                Key=preview_key,
+                Body=preview,
+                ContentType=cls.PREVIEW_CONTENT_TYPE,
+                ServerSideEncryption="AES256",
+            )
+            current_app.logger.debug(f"preview stored: {preview_key} ({len(preview)} bytes)")
+            return preview_key
+
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+            current_app.logger.error(f"S3 preview generation failed for {key}: {e}")
+        except Exception as e:
+            # corrupt / unsupported documents must not kill the worker
+            current_app.logger.error(f"Preview rendering failed for {key}: {e}")
+        return None
+
+    @classmethod
+    def enqueue(cls, key: str, source: str = None):
+        """Queue preview generation in the background (returns immediately)."""
+        if not key:
+            current_app.logger.debug(f"bad_request: 'key' is required")
+            return ResponseManager.bad_request(error="key is required")
+        if not cls.preview_key(key):
+            return ResponseManager.bad_request(error="key is not an uploaded case file")
+
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                cls.generate(key, source)
+
+        cls._executor.submit(run)
+        return ResponseManager.success(
+            data=cls.preview_key(key), message="Preview queued", status=HTTPStatus.ACCEPTED
+        )
+
+    # ------------------------ Lookup / Delete -------------------------
+    @classmethod
+    def get(cls, key: str):
+        """Presigned GET for the preview of an uploaded file; 404 until it exists."""
+        preview_key = cls.preview_key(key)
+        if not preview_key:
+            return ResponseManager.bad_request(error="key is not an uploaded case file")
+
+        try:
+            S3Manager._client.head_object(Bucket=S3Manager._bucket, Key=preview_key)
+        except botocore.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return ResponseManager.not_found(error="Preview not available")
+            current_app.logger.error(f"S3 preview lookup failed: {e}")
+            return ResponseManager.internal(error="Failed to look up preview")
+
+        return S3Manager.generate_presigned_get(key=preview_key)
+
+    @classmethod
+    def delete(cls, key: str):
+        """Best-effort removal of a file's preview together with the file."""
+        preview_key = cls.preview_key(key)
+        if not preview_key:
+            return
+        try:
+            S3Manager._client.delete_object(Bucket=S3Manager._bucket, Key=preview_key)
+        except botocore.exceptions.ClientError as e:
+            current_app.logger.warning(f"S3 preview delete failed for {preview_key}: {e}")
+
+    @classmethod
+    def delete_many(cls, keys: list):
+        """Best-effort removal of the previews of several files."""
+        preview_keys = [p for p in (cls.preview_key(k) for k in keys or []) if p]
+        if not preview_keys:
+            return
+        try:
+            for i in range(0, len(preview_keys), S3Manager.DELETE_BATCH_SIZE):
+                S3Manager._delete_objects(preview_keys[i:i + S3Manager.DELETE_BATCH_SIZE])
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+            current_app.logger.warning(f"S3 preview batch delete failed: {e}")
+
+    @classmethod
+    def preview_prefix(cls, prefix: str):
+        """uploads/{office}/[{case}/] -> previews/{office}/[{case}/] (office or case level only)."""
+        parts = (prefix or "").rstrip("/").split("/")
+        if parts[0] != "uploads" or len(parts) not in (2, 3):
+            return None
+        return "/".join([cls.PREVIEW_PREFIX, *parts[1:]]) + "/"
@@ -0,0 +1,158 @@
+# app/managers/purge_management.py
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+import botocore.exceptions
+from flask import current_app
+
+from .response_management import ResponseManager
+from .s3_management import S3Manager
+from .preview_management import PreviewManager
+
+
+class PurgeManager:
+    """
+    Background purge of everything stored for a case or a whole office.
+
+    list_objects_v2 pages (up to 1000 keys) are fed straight into one
+    delete_objects call each, so purging N objects costs about 2 * N / 1000
+    S3 requests. The matching previews/ prefix is purged in the same job,
+    and an office purge also removes its shared blobs/{office}/ objects.
+
+    Job state is an in-process dict. That holds because the S3 service runs
+    as a single process (python -m app, one container): with more workers
+    or replicas a status poll could land where the job isn't known. Jobs
+    don't survive a restart either - the poll answers 404 and the caller
+    simply starts the purge again (deleting is idempotent).
+
+        uploads/{office}/          -> the whole office
+        uploads/{office}/{case}/   -> one case
+    """
+
+    ROOT_PREFIX = "uploads"
+    BLOB_PREFIX = "blobs"
+    MAX_JOBS = 200  # finished jobs kept around for polling
+
+    _executor = ThreadPoolExecutor(
+        max_workers=int(os.getenv("PURGE_WORKERS", "1")),
+        thread_name_prefix="purge",
+    )
+    _jobs = {}
+    _lock = threading.Lock()
+
+    # ------------------------ Jobs -------------------------
+    @classmethod
+    def _valid_prefix(cls, prefix: str) -> bool:
+        """Only office or case level prefixes; never the whole bucket."""
+        if not prefix or not prefix.endswith("/"):
+            return False
+        parts = prefix.rstrip("/").split("/")
+        return parts[0] == cls.ROOT_PREFIX and len(parts) in (2, 3) and all(parts)
+
+    @classmethod
+    def _update(cls, job_id: str, **fields):
+        with cls._lock:
+            cls._jobs[job_id].update(fields)
+
+    @classmethod
+    def _forget_finished(cls):
+        """Drop the oldest finished jobs once MAX_JOBS is exceeded (caller holds the lock)."""
+        finished = [job_id for job_id, job in cls._jobs.items() if job["status"] != "running"]
+        for job_id in finished[: max(0, len(cls._jobs) - cls.MAX_JOBS)]:
+            del cls._jobs[job_id]
+
+    @classmethod
+    def start(cls, prefix: str):
+        """Queue a purge of the prefix; returns the job to poll (202)."""
+        current_app.logger.debug(f"inside PurgeManager.start(), prefix: {prefix}")
+
+        if not cls._valid_prefix(prefix):
+            current_app.logger.debug(f"bad_request: invalid prefix {prefix!r}")
+            return ResponseManager.bad_request(
+                error="prefix must be uploads/{office}/ or uploads/{office}/{case}/"
+            )
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "prefix": prefix,
+            "status": "running",
+            "pages": 0,
+            "listed": 0,
+            "deleted": 0,
+            "errors": [],
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "finished_at": None,
+        }
+        with cls._lock:
+            cls._forget_finished()
+            cls._jobs[job["job_id"]] = job
+
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                cls._run(job["job_id"], prefix)
+
+        cls._executor.submit(run)
+        return ResponseManager.success(data=dict(job), message="Purge started", status=HTTPStatus.ACCEPTED)
+
+    @classmethod
+    def _purge(cls, job_id: str, prefix: str):
+        paginator = S3Manager._client.get_paginator("list_objects_v2")
+        pages = paginator.paginate(
+            Bucket=S3Manager._bucket,
+            Prefix=prefix,
+            PaginationConfig={"PageSize": S3Manager.DELETE_BATCH_SIZE},
+        )
+        for page in pages:
+            keys = [obj["Key"] for obj in page.get("Contents", [])]
+            if not keys:
+                continue
+            deleted, errors = S3Manager._delete_objects(keys)
+            with cls._lock:
+                job = cls._jobs[job_id]
+                job["pages"] += 1
+                job["listed"] += len(keys)
+                job["deleted"] += deleted
+                job["errors"].extend(errors[:100 - len(job["errors"])])  # keep a sample
+
+    @classmethod
+    def _run(cls, job_id: str, prefix: str):
+        try:
+            cls._purge(job_id, prefix)
+            preview_prefix = PreviewManager.preview_prefix(prefix)
+            if preview_prefix:
+                cls._purge(job_id, preview_prefix)
+            # blobs are shared by the cases of an office; case purges leave them to the gateway
+            parts = prefix.rstrip("/").split("/")
+            if len(parts) == 2:
+                cls._purge(job_id, f"{cls.BLOB_PREFIX}/{parts[1]}/")
+            status = "failed" if cls.get_job(job_id)["errors"] else "done"
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+            current_app.logger.error(f"S3 purge of {prefix} failed: {e}")
+            status = "failed"
+
+        cls._update(job_id, status=status, finished_at=datetime.now(timezone.utc).isoformat())
+        job = cls.get_job(job_id)
+        current_app.logger.info(
+            f"🧹 purge {prefix}: {status}, deleted {job['deleted']}/{job['listed']} in {job['pages']} pages"
+        )
+
+    # ------------------------ Status -------------------------
+    @classmethod
+    def get_job(cls, job_id: str):
+        with cls._lock:
+            job = cls._jobs.get(job_id)
+            return {**job, "errors": list(job["errors"])} if job else None
+
+    @classmethod
+    def status(cls, job_id: str):
+        """Progress of a purge job."""
+        job = cls.get_job(job_id)
+        if not job:
+            return ResponseManager.not_found(error="Purge job not found")
+        return ResponseManager.success(data=job)
@@ -1,7 +1,14 @@
 # app/managers/s3_management.py
+import hashlib
+import math
 import os
+import threading
+import time
+from collections import OrderedDict
 import boto3
 import botocore.exceptions
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
 from werkzeug.utils import secure_filename
 
 from flask import current_app
@@ -13,6 +20,17 @@ class S3Manager:
     _client = None
     MAX_UPLOAD_SIZE_MB = None
 
+    # Multipart: S3 allows 5 MB..5 GB per part and at most 10,000 parts
+    MULTIPART_PART_SIZE_MB = None
+    MAX_MULTIPART_SIZE_MB = None
+    MIN_PART_SIZE = 5 * 1024 * 1024
+    MAX_PARTS = 10_000
+
+    # Server-side uploads (create): managed transfer, parts sent concurrently.
+    # The connection pool must cover max_concurrency for every upload in flight.
+    _transfer_config = None
+    MAX_POOL_CONNECTIONS = None
+
 
     # ------------------------ Connection -------------------------
     @classmethod
@@ -23,40 +41,122 @@ class S3Manager:
         try:
             cls._bucket = os.getenv("S3_BUCKET")
             region_name = os.getenv("AWS_REGION")
-            cls._client = boto3.client("s3", region_name=region_name)
+            # S3_ENDPOINT_URL: local stand-ins (MinIO, moto server) for development/tests
+            endpoint_url = os.getenv("S3_ENDPOINT_URL") or None
+            cls.MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 50))
+            client_config = BotoConfig(
+                max_pool_connections=cls.MAX_POOL_CONNECTIONS,
+                retries={"max_attempts": 5, "mode": "standard"},
+                tcp_keepalive=True,
+            )
+            cls._client = boto3.client(
+                "s3", region_name=region_name, endpoint_url=endpoint_url, config=client_config
+            )
             cls.MAX_UPLOAD_SIZE_MB = int(os.getenv("MAX_UPLOAD_SIZE_MB", 10))
+            cls.MULTIPART_PART_SIZE_MB = int(os.getenv("MULTIPART_PART_SIZE_MB", 8))
+            cls.MAX_MULTIPART_SIZE_MB = int(os.getenv("MAX_MULTIPART_SIZE_MB", 5120))
+            cls._transfer_config = TransferConfig(
+                multipart_threshold=int(os.getenv("S3_TRANSFER_THRESHOLD_MB", 8)) * 1024 * 1024,
+                multipart_chunksize=int(os.getenv("S3_TRANSFER_CHUNK_MB", 8)) * 1024 * 1024,
+                max_concurrency=int(os.getenv("S3_TRANSFER_CONCURRENCY", 10)),
+                use_threads=True,
+            )
             return True
         except Exception as e:
             return False
     
 
     # ------------------------ List Keys -------------------------
+    LIST_MAX_KEYS = 1000  # list_objects_v2 page limit
+
+    @staticmethod
+    def _object_info(obj: dict) -> dict:
+        """Key plus the metadata callers would otherwise HEAD for."""
+        return {
+            "key": obj["Key"],
+            "size": obj.get("Size"),
+            "etag": obj.get("ETag"),
+            "last_modified": obj["LastModified"].isoformat() if obj.get("LastModified") else None,
+        }
+
     @classmethod
-    def all_keys(cls, prefix: str = ""):
-        """Return all keys in the bucket."""
-        current_app.logger.debug(f"inside all_keys()")
-        # debug inputs
-        current_app.logger.debug(f"prefix: {prefix}")
+    def list_keys_page(cls, prefix: str = "", max_keys=None, continuation_token: str = None):
+        """
+        One page of keys under the prefix (a single list_objects_v2 call).
+        Returns {"keys": [{key, size, etag, last_modified}], "next_token": str | None}.
+        """
+        current_app.logger.debug(f"inside list_keys_page()")
+        current_app.logger.debug(f"prefix: {prefix}, max_keys: {max_keys}, continuation_token: {continuation_token}")
 
         try:
-            paginator = cls._client.get_paginator("list_objects_v2")
-            keys = []
-            for page in paginator.paginate(Bucket=cls._bucket, Prefix=prefix):
-                for obj in page.get("Contents", []):
-                    keys.append(obj["Key"])
+            max_keys = int(max_keys or cls.LIST_MAX_KEYS)
+        except (TypeError, ValueError):
+            return ResponseManager.bad_request(error="max_keys must be a number")
+        max_keys = min(max(max_keys, 1), cls.LIST_MAX_KEYS)
+
+        params = {"Bucket": cls._bucket, "Prefix": prefix or "", "MaxKeys": max_keys}
+        if continuation_token:
+            params["ContinuationToken"] = continuation_token
+
+        try:
+            page = cls._client.list_objects_v2(**params)
+            data = {
+                "keys": [cls._object_info(obj) for obj in page.get("Contents", [])],
+                "next_token": page.get("NextContinuationToken") if page.get("IsTruncated") else None,
+            }
+            current_app.logger.debug(f"returning success with {len(data['keys'])} keys")
+            return ResponseManager.success(data=data)
 
-            # debug success
-            current_app.logger.debug(f"returning success with results")
-            return ResponseManager.success(data=keys)
-        
         except botocore.exceptions.ClientError as e:
-            # debug error
-            current_app.logger.error(f"S3 all_keys() failed: {e}")
-            current_app.logger.debug(f"returning internal server error")
+            current_app.logger.error(f"S3 list_keys_page() failed: {e}")
+            if e.response.get("Error", {}).get("Code") == "InvalidArgument":
+                return ResponseManager.bad_request(error="Invalid continuation_token")
             return ResponseManager.internal(error="Failed to list S3 keys")
 
+    @classmethod
+    def iter_keys(cls, prefix: str = ""):
+        """
+        Yield every object under the prefix, page by page, for NDJSON full scans.
+        Only one page is held in memory at a time.
+        """
+        paginator = cls._client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(
+            Bucket=cls._bucket,
+            Prefix=prefix or "",
+            PaginationConfig={"PageSize": cls.LIST_MAX_KEYS},
+        ):
+            for obj in page.get("Contents", []):
+                yield cls._object_info(obj)
+
 
     # ------------------------ Generate Presigned POST -------------------------
+    @classmethod
+    def _validate_upload(cls, file_name: str, file_type: str, file_size: int, key: str):
+        """Return an error string if the upload may not be presigned, else None."""
+        if not file_name:
+            return "file_name is required"
+        if not file_type:
+            return "file_type is required"
+        if not file_size:
+            return "file_size is required"
+        if not key:
+            return "key is required"
+
+        ext = file_name.rsplit(".", 1)[-1].lower()
+        forbidden_extensions = []
+        if ext in forbidden_extensions:
+            return "Invalid file type"
+
+        try:
+            file_size = int(file_size)
+        except (TypeError, ValueError):
+            return "file_size must be a number"
+
+        max_bytes = cls.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+        if file_size > max_bytes:
+            return f"File too large ({file_size} bytes > {max_bytes} bytes)"
+        return None
+
     @classmethod
     def generate_presigned_post(cls, file_name: str, file_type: str, file_size: int, key: str):
         """
@@ -70,37 +170,12 @@ class S3Manager:
         current_app.logger.debug(f"file_size: {file_size}")
         current_app.logger.debug(f"key: {key}")
 
-        if not file_name:
-            # debug bad request
-            current_app.logger.debug(f"bad_request: 'file_name' is required")
-            return ResponseManager.bad_request(error="file_name is required")
-        if not file_type:
-            # debug bad request
-            current_app.logger.debug(f"bad_request: 'file_type' is required")
-            return ResponseManager.bad_request(error="file_type is required")
-        if not file_size:
-            # debug bad request
-            current_app.logger.debug(f"bad_request: 'file_size' is required")
-            return ResponseManager.bad_request(error="file_size is required")
-        if not key:
-            # debug bad request
-            current_app.logger.debug(f"bad_request: 'key' is required")
-            return ResponseManager.bad_request(error="key is required")
-        
-
-        ext = file_name.rsplit(".", 1)[-1].lower()
-        forbidden_extensions = []
-        if ext in forbidden_extensions:
-            # debug bad request
-            current_app.logger.debug(f"bad_request: Invalid file type '{ext}'")
-            return ResponseManager.bad_request(error="Invalid file type")
+        invalid = cls._validate_upload(file_name, file_type, file_size, key)
+        if invalid:
+            current_app.logger.debug(f"bad_request: {invalid}")
+            return ResponseManager.bad_request(error=invalid)
 
         max_bytes = cls.MAX_UPLOAD_SIZE_MB * 1024 * 1024
-        if file_size > max_bytes:
-            # debug bad request
-            current_app.logger.debug(f"bad_request: File too large ({file_size} bytes > {max_bytes} bytes)")
-            return ResponseManager.bad_request(error=f"File too large ({file_size} bytes > {max_bytes} bytes)")
-
         try:
             presigned = cls._client.generate_presigned_post(
                 Bucket=cls._bucket,
@@ -130,21 +205,91 @@ class S3Manager:
 
 
     # ------------------------ Generate Presigned GET -------------------------
+    # Signed URL lifetimes; a request is served from the smallest one that covers it
+    PRESIGN_GET_BUCKETS = (3600, 6 * 3600, 24 * 3600, 7 * 24 * 3600)
+    # Reuse a cached URL only while it stays valid this long past the caller's need
+    PRESIGN_CACHE_MARGIN = int(os.getenv("PRESIGN_CACHE_MARGIN", "30"))
+    # Never reuse a URL signed longer ago than this (temporary credentials rotate)
+    PRESIGN_CACHE_MAX_AGE = int(os.getenv("PRESIGN_CACHE_MAX_AGE", "600"))
+    PRESIGN_CACHE_SIZE = int(os.getenv("PRESIGN_CACHE_SIZE", "4096"))
+
+    _presign_cache = OrderedDict()  # (key, bucket) -> (url, signed_at)
+    _presign_lock = threading.Lock()
+
     @classmethod
-    def generate_presigned_get(cls, key: str):
-        """Return a temporary download URL for a private S3 object."""
+    def _expiry_bucket(cls, expires_in: int) -> int:
+        """Smallest lifetime that still leaves the margin (else a URL could never be reused)."""
+        for bucket in cls.PRESIGN_GET_BUCKETS:
+            if expires_in + cls.PRESIGN_CACHE_MARGIN <= bucket:
+                return bucket
+        return cls.PRESIGN_GET_BUCKETS[-1]
+
+    @classmethod
+    def _cached_presigned_get(cls, key: str, bucket: int, expires_in: int):
+        """LRU lookup: the cached URL if enough of its validity remains, else None."""
+        now = time.monotonic()
+        with cls._presign_lock:
+            entry = cls._presign_cache.get((key, bucket))
+            if entry is None:
+                return None
+            url, signed_at = entry
+            remaining = signed_at + bucket - now
+            if now - signed_at > cls.PRESIGN_CACHE_MAX_AGE or remaining < expires_in + cls.PRESIGN_CACHE_MARGIN:
+                del cls._presign_cache[(key, bucket)]
+                return None
+            cls._presign_cache.move_to_end((key, bucket))
+            return url
+
+    @classmethod
+    def _store_presigned_get(cls, key: str, bucket: int, url: str, signed_at: float):
+        with cls._presign_lock:
+            cls._presign_cache[(key, bucket)] = (url, signed_at)
+            cls._presign_cache.move_to_end((key, bucket))
+            while len(cls._presign_cache) > cls.PRESIGN_CACHE_SIZE:
+                cls._presign_cache.popitem(last=False)
+
+    @classmethod
+    def invalidate_presigned_get(cls, keys):
+        """Forget cached URLs of deleted objects."""
+        keys = set(keys)
+        with cls._presign_lock:
+            for cache_key in [k for k in cls._presign_cache if k[0] in keys]:
+                del cls._presign_cache[cache_key]
+
+    @classmethod
+    def generate_presigned_get(cls, key: str, expires_in=3600):
+        """
+        Return a temporary download URL for a private S3 object, valid for at
+        least expires_in seconds. Popular keys are served from an LRU of
+        already signed URLs instead of signing again.
+        """
         if not key:
             # debug bad request
             current_app.file_download_metrics.labels(action='presign_get', status='bad_request').inc()
             current_app.logger.debug(f"bad_request: 'key' is required")
             return ResponseManager.bad_request(error="key is required")
-        
+
         try:
+            expires_in = max(1, int(expires_in or 3600))
+        except (TypeError, ValueError):
+            return ResponseManager.bad_request(error="expires_in must be a number")
+        bucket = cls._expiry_bucket(expires_in)
+
+        url = cls._cached_presigned_get(key, bucket, expires_in)
+        if url:
+            current_app.file_download_metrics.labels(action='presign_get_cache', status='hit').inc()
+            current_app.file_download_metrics.labels(action='presign_get', status='success').inc()
+            return ResponseManager.success(data=url)
+        current_app.file_download_metrics.labels(action='presign_get_cache', status='miss').inc()
+
+        try:
+            signed_at = time.monotonic()
             url = cls._client.generate_presigned_url(
                 "get_object",
                 Params={"Bucket": cls._bucket, "Key": key},
-                ExpiresIn=3600,
+                ExpiresIn=bucket,
             )
+            cls._store_presigned_get(key, bucket, url, signed_at)
             # debug success
             current_app.file_download_metrics.labels(action='presign_get', status='success').inc()
             current_app.logger.debug(f"returning success with url: {url}")
@@ -158,10 +303,251 @@ class S3Manager:
             return ResponseManager.internal(error="Failed to generate download URL")
 
 
+    # ------------------------ Batch Presigned POST -------------------------
+    @classmethod
+    def generate_presigned_posts(cls, files: list):
+        """
+        Presigned POSTs for several files in one call (multi-file drop on a case).
+        All entries are validated first; if any is invalid nothing is signed and
+        the errors are returned per index. Signing itself is local (no S3 round-trip).
+
+        files = [{"file_name", "file_type", "file_size", "key"}, ...]
+        """
+        current_app.logger.debug(f"inside generate_presigned_posts()")
+
+        if not files or not isinstance(files, list):
+            current_app.logger.debug(f"bad_request: 'files' is required")
+            return ResponseManager.bad_request(error="files is required")
+
+        errors = []
+        for index, f in enumerate(files):
+            f = f if isinstance(f, dict) else {}
+            invalid = cls._validate_upload(f.get("file_name"), f.get("file_type"), f.get("file_size"), f.get("key"))
+            if invalid:
+                errors.append(f"#{index} {f.get('file_name') or ''}: {invalid}")
+        if errors:
+            current_app.logger.debug(f"bad_request: {errors}")
+            return ResponseManager.bad_request(error="; ".join(errors))
+
+        max_bytes = cls.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+        try:
+            data = [
+                {
+                    "presigned": cls._client.generate_presigned_post(
+                        Bucket=cls._bucket,
+                        Key=f["key"],
+                        Fields={"Content-Type": f["file_type"]},
+                        Conditions=[
+                            ["content-length-range", 0, max_bytes],
+                            {"Content-Type": f["file_type"]},
+                        ],
+                        ExpiresIn=3600,  # 1 hour
+                    ),
+                    "key": f["key"],
+                    "safe_name": f["file_name"],
+                }
+                for f in files
+            ]
+            current_app.logger.debug(f"returning success with {len(data)} presigned posts")
+            return ResponseManager.success(data=data)
+
+        except botocore.exceptions.BotoCoreError as e:
+            current_app.logger.error(f"S3 batch presigned URL generation failed: {str(e)}")
+            return ResponseManager.internal(error="Failed to generate presigned URLs")
+
+
+    # ------------------------ Multipart Upload -------------------------
+    @classmethod
+    def _part_size(cls, file_size: int) -> int:
+        """Configured part size, grown (whole MB) when the file would need more than MAX_PARTS."""
+        part_size = max(cls.MULTIPART_PART_SIZE_MB * 1024 * 1024, cls.MIN_PART_SIZE)
+        if math.ceil(file_size / part_size) > cls.MAX_PARTS:
+            mb = 1024 * 1024
+            part_size = math.ceil(file_size / cls.MAX_PARTS / mb) * mb
+        return part_size
+
+    @staticmethod
+    def _is_no_such_upload(e: botocore.exceptions.ClientError) -> bool:
+        return e.response.get("Error", {}).get("Code") == "NoSuchUpload"
+
+    @classmethod
+    def start_multipart_upload(cls, file_name: str, file_type: str, file_size: int, key: str):
+        """
+        Open a multipart upload for a large file.
+        Returns the upload id and the part layout the client should use.
+        """
+        current_app.logger.debug(f"inside start_multipart_upload()")
+        current_app.logger.debug(f"file_name: {file_name}, file_type: {file_type}, file_size: {file_size}, key: {key}")
+
+        if not file_name:
+            current_app.logger.debug(f"bad_request: 'file_name' is required")
+            return ResponseManager.bad_request(error="file_name is required")
+        if not file_type:
+            current_app.logger.debug(f"bad_request: 'file_type' is required")
+            return ResponseManager.bad_request(error="file_type is required")
+        if not file_size:
+            current_app.logger.debug(f"bad_request: 'file_size' is required")
+            return ResponseManager.bad_request(error="file_size is required")
+        if not key:
+            current_app.logger.debug(f"bad_request: 'key' is required")
+            return ResponseManager.bad_request(error="key is required")
+
+        try:
+            file_size = int(file_size)
+        except (TypeError, ValueError):
+            current_app.logger.debug(f"bad_request: file_size must be a number")
+            return ResponseManager.bad_request(error="file_size must be a number")
+        if file_size <= 0:
+            current_app.logger.debug(f"bad_request: file_size must be positive")
+            return ResponseManager.bad_request(error="file_size must be positive")
+
+        max_bytes = cls.MAX_MULTIPART_SIZE_MB * 1024 * 1024
+        if file_size > max_bytes:
+            current_app.logger.debug(f"bad_request: File too large ({file_size} bytes > {max_bytes} bytes)")
+            return ResponseManager.bad_request(error=f"File too large ({file_size} bytes > {max_bytes} bytes)")
+
+        part_size = cls._part_size(file_size)
+
+        try:
+            upload = cls._client.create_multipart_upload(
+                Bucket=cls._bucket,
+                Key=key,
+                ContentType=file_type,
+                ServerSideEncryption="AES256",
+            )
+            data = {
+                "upload_id": upload["UploadId"],
+                "key": key,
+                "safe_name": file_name,
+                "part_size": part_size,
+                "part_count": max(1, math.ceil(file_size / part_size)),
+            }
+            current_app.logger.debug(f"returning success with {data}")
+            return ResponseManager.success(data=data)
+
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+            current_app.logger.error(f"S3 create_multipart_upload failed: {str(e)}")
+            return ResponseManager.internal(error="Failed to start multipart upload")
+
+    @classmethod
+    def presign_multipart_parts(cls, key: str, upload_id: str, part_numbers: list):
+        """
+        Presigned PUT URLs for the given part numbers: {"1": url, "2": url, ...}.
+        Clients ask again for any part that failed and retry only that one.
+        """
+        if not key or not upload_id:
+            current_app.logger.debug(f"bad_request: 'key' and 'upload_id' are required")
+            return ResponseManager.bad_request(error="key and upload_id are required")
+        try:
+            part_numbers = sorted({int(n) for n in part_numbers or []})
+        except (TypeError, ValueError):
+            return ResponseManager.bad_request(error="part_numbers must be integers")
+        if not part_numbers or part_numbers[0] < 1 or part_numbers[-1] > cls.MAX_PARTS:
+            current_app.logger.debug(f"bad_request: invalid part_numbers {part_numbers}")
+            return ResponseManager.bad_request(error=f"part_numbers must be between 1 and {cls.MAX_PARTS}")
+
+        try:
+            urls = {
+                str(n): cls._client.generate_presigned_url(
+                    "upload_part",
+                    Params={"Bucket": cls._bucket, "Key": key, "UploadId": upload_id, "PartNumber": n},
+                    ExpiresIn=3600,
+                )
+                for n in part_numbers
+            }
+            current_app.logger.debug(f"returning success with {len(urls)} part urls")
+            return ResponseManager.success(data=urls)
+
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+            current_app.logger.error(f"S3 presign upload_part failed: {str(e)}")
+            return ResponseManager.internal(error="Failed to generate part URLs")
+
+    @classmethod
+    def _uploaded_parts(cls, key: str, upload_id: str):
+        """Parts S3 already holds for an upload (used when the client lost its ETags)."""
+        paginator = cls._client.get_paginator("list_parts")
+        parts = []
+        for page in paginator.paginate(Bucket=cls._bucket, Key=key, UploadId=upload_id):
+            for part in page.get("Parts", []):
+                parts.append({"PartNumber": part["PartNumber"], "ETag": part["ETag"]})
+        return parts
+
+    @classmethod
+    def complete_multipart_upload(cls, key: str, upload_id: str, parts: list = None):
+        """
+        Assemble the uploaded parts into the final object.
+        parts = [{"part_number": 1, "etag": "..."}, ...]; if omitted, S3 is asked for them.
+        """
+        if not key or not upload_id:
+            current_app.logger.debug(f"bad_request: 'key' and 'upload_id' are required")
+            return ResponseManager.bad_request(error="key and upload_id are required")
+
+        try:
+            if parts:
+                parts = sorted(
+                    ({"PartNumber": int(p["part_number"]), "ETag": p["etag"]} for p in parts),
+                    key=lambda p: p["PartNumber"],
+                )
+            else:
+                parts = cls._uploaded_parts(key, upload_id)
+        except (KeyError, TypeError, ValueError):
+            return ResponseManager.bad_request(error="parts must be a list of {part_number, etag}")
+        except botocore.exceptions.ClientError as e:
+            if cls._is_no_such_upload(e):
+                return ResponseManager.not_found(error="Upload not found")
+            current_app.logger.error(f"S3 list_parts failed: {str(e)}")
+            return ResponseManager.internal(error="Failed to list uploaded parts")
+
+        if not parts:
+            return ResponseManager.bad_request(error="No uploaded parts")
+
+        try:
+            cls._client.complete_multipart_upload(
+                Bucket=cls._bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+            current_app.logger.debug(f"returning success with key: {key} ({len(parts)} parts)")
+            return ResponseManager.success(data=key)
+
+        except botocore.exceptions.ClientError as e:
+            if cls._is_no_such_upload(e):
+                return ResponseManager.not_found(error="Upload not found")
+            current_app.logger.error(f"S3 complete_multipart_upload failed: {str(e)}")
+            return ResponseManager.error(error="Failed to complete multipart upload")
+        except botocore.exceptions.BotoCoreError as e:
+            current_app.logger.error(f"S3 complete_multipart_upload failed: {str(e)}")
+            return ResponseManager.internal(error="Failed to complete multipart upload")
+
+    @classmethod
+    def abort_multipart_upload(cls, key: str, upload_id: str):
+        """Drop an unfinished upload so its parts stop taking storage."""
+        if not key or not upload_id:
+            current_app.logger.debug(f"bad_request: 'key' and 'upload_id' are required")
+            return ResponseManager.bad_request(error="key and upload_id are required")
+
+        try:
+            cls._client.abort_multipart_upload(Bucket=cls._bucket, Key=key, UploadId=upload_id)
+            current_app.logger.debug(f"returning success with key: {key}")
+            return ResponseManager.success(data=key)
+
+        except botocore.exceptions.ClientError as e:
+            if cls._is_no_such_upload(e):
+                return ResponseManager.success(data=key, message="Upload already gone")
+            current_app.logger.error(f"S3 abort_multipart_upload failed: {str(e)}")
+            return ResponseManager.internal(error="Failed to abort multipart upload")
+
+
     # ------------------------ Upload -------------------------
     @classmethod
-    def create(cls, file_obj, key: str):
-        """Upload a file object to S3."""
+    def create(cls, file_obj, key: str, content_type: str = None, content_length: int = None):
+        """
+        Upload a file object to S3 with the managed transfer (_transfer_config):
+        above the threshold it becomes a multipart upload with parts sent in
+        parallel. file_obj may be the raw, non-seekable request stream; it is
+        then read chunk by chunk straight into the parts, never written to disk.
+        """
 
         if not file_obj:
             # debug bad request
@@ -172,8 +558,14 @@ class S3Manager:
             current_app.logger.debug(f"bad_request: 'key' is required")
             return ResponseManager.bad_request(error="key is required")
         
-        mime = getattr(file_obj, "mimetype", "application/octet-stream")
-        file_obj.seek(0)
+        max_bytes = cls.MAX_MULTIPART_SIZE_MB * 1024 * 1024
+        if content_length is not None and content_length > max_bytes:
+            current_app.logger.debug(f"bad_request: {content_length} bytes > {max_bytes} bytes")
+            return ResponseManager.bad_request(error=f"File too large ({content_length} bytes > {max_bytes} bytes)")
+
+        mime = content_type or getattr(file_obj, "mimetype", None) or "application/octet-stream"
+        if getattr(file_obj, "seekable", lambda: False)():
+            file_obj.seek(0)
 
         try:
             cls._client.upload_fileobj(
@@ -183,18 +575,56 @@ class S3Manager:
                 ExtraArgs={
                     "ContentType": mime,
                     "ServerSideEncryption": "AES256"
-                }
+                },
+                Config=cls._transfer_config,
             )
             # debug success
             current_app.logger.debug(f"returning created with key: {key}")
             return ResponseManager.created(data=key)
-        except (botocore.exceptions.BotoCoreError, IOError) as e:
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError, IOError) as e:
             # debug error
             current_app.logger.error(f"S3 upload failed: {str(e)}")
             current_app.logger.debug(f"returning internal server error")
             return ResponseManager.internal(error="File upload failed")
 
 
+    # ------------------------ Content Hash -------------------------
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    @classmethod
+    def verify_sha256(cls, key: str, sha256: str):
+        """
+        Stream an object and compare its SHA-256 with the one the client claimed.
+        Used once per new content-addressed blob, before other files may share it.
+        Returns {"match": bool, "sha256": <actual hex digest>}.
+        """
+        current_app.logger.debug(f"inside verify_sha256(), key: {key}")
+
+        if not key:
+            current_app.logger.debug(f"bad_request: 'key' is required")
+            return ResponseManager.bad_request(error="key is required")
+        if not sha256:
+            current_app.logger.debug(f"bad_request: 'sha256' is required")
+            return ResponseManager.bad_request(error="sha256 is required")
+
+        digest = hashlib.sha256()
+        try:
+            body = cls._client.get_object(Bucket=cls._bucket, Key=key)["Body"]
+            for chunk in body.iter_chunks(chunk_size=cls.HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        except botocore.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return ResponseManager.not_found(error="Object not found")
+            current_app.logger.error(f"S3 verify_sha256 failed: {str(e)}")
+            return ResponseManager.internal(error="Failed to read object from S3")
+        except botocore.exceptions.BotoCoreError as e:
+            current_app.logger.error(f"S3 verify_sha256 failed: {str(e)}")
+            return ResponseManager.internal(error="Failed to read object from S3")
+
+        actual = digest.hexdigest()
+        return ResponseManager.success(data={"match": actual == sha256.lower(), "sha256": actual})
+
+
     # ------------------------ Delete -------------------------
     @classmethod
     def delete(cls, key: str):
@@ -210,6 +640,7 @@ class S3Manager:
                 Bucket=cls._bucket,
                 Key=key
             )
+            cls.invalidate_presigned_get([key])
             # debug success
             current_app.logger.debug(f"returning success with key: {key}")
             return ResponseManager.success(data=key)
@@ -218,3 +649,47 @@ class S3Manager:
             current_app.logger.error(f"S3 delete failed: {str(e)}")
             current_app.logger.debug(f"returning internal server error")
             return ResponseManager.internal(error="Failed to delete file from S3")
+
+
+    # ------------------------ Batch Delete -------------------------
+    DELETE_BATCH_SIZE = 1000  # delete_objects limit per request
+
+    @classmethod
+    def _delete_objects(cls, keys: list):
+        """One delete_objects call (<= 1000 keys). Returns (deleted_count, errors)."""
+        cls.invalidate_presigned_get(keys)
+        res = cls._client.delete_objects(
+            Bucket=cls._bucket,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+        )
+        # Quiet mode: only failures are listed
+        errors = [
+            {"key": e.get("Key"), "code": e.get("Code"), "message": e.get("Message")}
+            for e in res.get("Errors", [])
+        ]
+        return len(keys) - len(errors), errors
+
+    @classmethod
+    def delete_batch(cls, keys: list):
+        """Delete many keys with one delete_objects call per 1000 keys."""
+        current_app.logger.debug(f"inside delete_batch()")
+
+        if not keys or not isinstance(keys, list) or not all(isinstance(k, str) and k for k in keys):
+            current_app.logger.debug(f"bad_request: 'keys' must be a non-empty list of keys")
+            return ResponseManager.bad_request(error="keys must be a non-empty list of keys")
+
+        keys = list(dict.fromkeys(keys))  # dedupe, keep order
+        deleted, errors = 0, []
+        try:
+            for i in range(0, len(keys), cls.DELETE_BATCH_SIZE):
+                count, failed = cls._delete_objects(keys[i:i + cls.DELETE_BATCH_SIZE])
+                deleted += count
+                errors.extend(failed)
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+            current_app.logger.error(f"S3 delete_objects failed after {deleted} keys: {str(e)}")
+            return ResponseManager.internal(error="Failed to delete files from S3")
+
+        if errors:
+            current_app.logger.warning(f"S3 delete_batch: {len(errors)} keys not deleted, first: {errors[0]}")
+        current_app.logger.debug(f"returning success with deleted={deleted}")
+        return ResponseManager.success(data={"deleted": deleted, "errors": errors})
@@ -1,7 +1,10 @@
 # app/routes.py
-from flask import jsonify, request, Blueprint
+import botocore.exceptions
+from flask import jsonify, request, Blueprint, Response, current_app, stream_with_context
 
 from .managers.s3_management import S3Manager
+from .managers.preview_management import PreviewManager
+from .managers.purge_management import PurgeManager
 from .managers.response_management import ResponseManager
 
 
@@ -17,9 +20,36 @@ def healthz():
 # ------------------------ List Keys -------------------------
 @bp.route("/list_keys", methods=["GET"])
 def list_keys():
-    """List all S3 keys (optionally under a prefix)."""
+    """
+    List keys under a prefix, one page at a time:
+        ?prefix=uploads/1/&max_keys=500&continuation_token=...
+    -> { "keys": [{key, size, etag, last_modified}], "next_token": ... }
+
+    ?stream=1 streams every key as NDJSON (one object per line) instead.
+    """
     prefix = request.args.get("prefix", "")
-    return S3Manager.all_keys(prefix=prefix)
+
+    if request.args.get("stream") in ("1", "true"):
+        return Response(
+            stream_with_context(_ndjson_keys(prefix)),
+            mimetype="application/x-ndjson",
+        )
+
+    return S3Manager.list_keys_page(
+        prefix=prefix,
+        max_keys=request.args.get("max_keys"),
+        continuation_token=request.args.get("continuation_token"),
+    )
+
+
+def _ndjson_keys(prefix: str):
+    try:
+        for info in S3Manager.iter_keys(prefix=prefix):
+            yield current_app.json.dumps(info) + "\n"
+    except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+        # headers are already sent; report the failure as the last line
+        current_app.logger.error(f"S3 list_keys stream failed: {e}")
+        yield current_app.json.dumps({"error": "Failed to list S3 keys"}) + "\n"
 
 
 # ------------------------ Generate Presigned POST -------------------------
@@ -40,23 +70,111 @@ def generate_post():
     )
 
 
+@bp.route("/presign/post/batch", methods=["POST"])
+def generate_post_batch():
+    """
+    Generate presigned POSTs for several files at once.
+    Expects JSON: { "files": [{ "file_name": ..., "file_type": ..., "file_size": ..., "key": ... }, ...] }
+    """
+    data = request.get_json(silent=True) or {}
+    return S3Manager.generate_presigned_posts(files=data.get("files"))
+
+
+# ------------------------ Multipart Upload -------------------------
+@bp.route("/presign/multipart/start", methods=["POST"])
+def multipart_start():
+    """
+    Open a multipart upload for a large file.
+    Expects JSON: { "file_name": "...", "file_type": "...", "file_size": 123456789, "key": "uploads/..." }
+    """
+    data = request.get_json(silent=True) or {}
+    return S3Manager.start_multipart_upload(
+        file_name=data.get("file_name"),
+        file_type=data.get("file_type"),
+        file_size=data.get("file_size"),
+        key=data.get("key"),
+    )
+
+
+@bp.route("/presign/multipart/part", methods=["POST"])
+def multipart_part():
+    """
+    Presigned PUT URLs for upload parts.
+    Expects JSON: { "key": "...", "upload_id": "...", "part_numbers": [1, 2, 3] }
+    """
+    data = request.get_json(silent=True) or {}
+    return S3Manager.presign_multipart_parts(
+        key=data.get("key"),
+        upload_id=data.get("upload_id"),
+        part_numbers=data.get("part_numbers"),
+    )
+
+
+@bp.route("/presign/multipart/complete", methods=["POST"])
+def multipart_complete():
+    """
+    Assemble the uploaded parts.
+    Expects JSON: { "key": "...", "upload_id": "...", "parts": [{"part_number": 1, "etag": "..."}] }
+    """
+    data = request.get_json(silent=True) or {}
+    return S3Manager.complete_multipart_upload(
+        key=data.get("key"),
+        upload_id=data.get("upload_id"),
+        parts=data.get("parts"),
+    )
+
+
+@bp.route("/presign/multipart/abort", methods=["POST"])
+def multipart_abort():
+    """
+    Abort an unfinished upload.
+    Expects JSON: { "key": "...", "upload_id": "..." }
+    """
+    data = request.get_json(silent=True) or {}
+    return S3Manager.abort_multipart_upload(key=data.get("key"), upload_id=data.get("upload_id"))
+
+
 # ------------------------ Generate Presigned GET -------------------------
 @bp.route("/presign/get", methods=["GET"])
 def generate_get():
     """Generate a presigned GET (download) URL for a file key."""
     key = request.args.get("key")
+    expires_in = request.args.get("expires_in", 3600)
 
-    return S3Manager.generate_presigned_get(key=key)
+    return S3Manager.generate_presigned_get(key=key, expires_in=expires_in)
 
 
 # ------------------------ Upload -------------------------
 @bp.route("/create", methods=["POST"])
 def create():
-    """Upload a file object to S3."""
-    file_obj = request.files.get("file")
-    key = request.form.get("key")
+    """
+    Upload a file object to S3.
+      raw body:  POST /create?key=...  (Content-Type = file type, Content-Length required)
+                 the body streams straight into the S3 transfer - no temporary file
+      form data: fields "file" + "key" (Werkzeug spools the file first)
+    """
+    if request.mimetype == "multipart/form-data":
+        return S3Manager.create(file_obj=request.files.get("file"), key=request.form.get("key"))
+
+    if request.content_length is None:
+        return ResponseManager.bad_request(error="Content-Length is required")
+    return S3Manager.create(
+        file_obj=request.stream,
+        key=request.args.get("key"),
+        content_type=request.mimetype,
+        content_length=request.content_length,
+    )
+
 
-    return S3Manager.create(file_obj=file_obj, key=key)
+# ------------------------ Content Hash -------------------------
+@bp.route("/verify_sha256", methods=["POST"])
+def verify_sha256():
+    """
+    Check an uploaded object against the SHA-256 the client computed.
+    Expects JSON: { "key": "blobs/{office}/{sha256}/{generation}", "sha256": "<hex>" }
+    """
+    data = request.get_json(silent=True) or {}
+    return S3Manager.verify_sha256(key=data.get("key"), sha256=data.get("sha256"))
 
 
 # ------------------------ Delete -------------------------
@@ -66,4 +184,57 @@ def delete():
     data = request.get_json()
     key = data.get("key")
 
-    return S3Manager.delete(key=key)
+    res = S3Manager.delete(key=key)
+    if ResponseManager.is_success(res):
+        PreviewManager.delete(key=key)
+    return res
+
+
+@bp.route("/delete_batch", methods=["DELETE"])
+def delete_batch():
+    """
+    Delete many objects at once (one delete_objects call per 1000 keys).
+    Expects JSON: { "keys": ["uploads/...", ...] }
+    """
+    data = request.get_json(silent=True) or {}
+    keys = data.get("keys")
+
+    res = S3Manager.delete_batch(keys=keys)
+    if ResponseManager.is_success(res):
+        PreviewManager.delete_many(keys=keys)
+    return res
+
+
+@bp.route("/purge_prefix", methods=["POST"])
+def purge_prefix():
+    """
+    Start a background purge of a case / office prefix (202 + job).
+    Expects JSON: { "prefix": "uploads/{office}/" | "uploads/{office}/{case}/" }
+    """
+    data = request.get_json(silent=True) or {}
+    return PurgeManager.start(prefix=data.get("prefix"))
+
+
+@bp.route("/purge_prefix/<job_id>", methods=["GET"])
+def purge_prefix_status(job_id):
+    """Progress of a purge job: pages, listed, deleted, errors, status."""
+    return PurgeManager.status(job_id=job_id)
+
+
+# ------------------------ Previews -------------------------
+@bp.route("/previews/generate", methods=["POST"])
+def generate_preview():
+    """
+    Queue a thumbnail for an uploaded file (rendered in the background).
+    Expects JSON: { "key": "uploads/{office}/{case}/{file}/{name}", "source": "blobs/..." }
+    "source" is only set for deduplicated files whose bytes live in a shared blob.
+    """
+    data = request.get_json(silent=True) or {}
+    return PreviewManager.enqueue(key=data.get("key"), source=data.get("source"))
+
+
+@bp.route("/preview", methods=["GET"])
+def get_preview():
+    """Presigned GET for a file's preview (404 until it has been rendered)."""
+    key = request.args.get("key")
+    return PreviewManager.get(key=key)
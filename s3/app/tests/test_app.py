@@ -0,0 +1,381 @@
+import io
+import threading
+import time
+from collections import OrderedDict
+
+import botocore.exceptions
+import pytest
+from flask import Flask
+from PIL import Image
+
+from app.managers import preview_management, s3_management
+from app.managers.preview_management import PreviewManager
+from app.managers.purge_management import PurgeManager
+from app.managers.response_management import ResponseManager
+from app.managers.s3_management import S3Manager
+
+
+class FakeCounter:
+    def labels(self, **labels):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+
+@pytest.fixture
+def app():
+    """
+    A bare app context: the managers only need current_app (logger, json,
+    metrics), the S3 client is replaced per test with a fake.
+    """
+    app_instance = Flask(__name__)
+    app_instance.file_download_metrics = FakeCounter()
+    with app_instance.app_context():
+        yield app_instance
+
+
+class FakeS3Client:
+    """Records calls; answers what the managers read from boto3 responses."""
+
+    def __init__(self, stored=(), undeletable=(), objects=None):
+        self.calls = []
+        self.stored = set(stored)
+        self.undeletable = set(undeletable)
+        self.objects = dict(objects or {})  # key -> (body, content_type)
+
+    def head_object(self, Bucket, Key):
+        self.calls.append(("head_object", Key))
+        if Key not in self.objects:
+            raise botocore.exceptions.ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        body, content_type = self.objects[Key]
+        return {"ContentLength": len(body), "ContentType": content_type}
+
+    def get_object(self, Bucket, Key):
+        self.calls.append(("get_object", Key))
+        return {"Body": io.BytesIO(self.objects[Key][0])}
+
+    def put_object(self, Bucket, Key, Body, ContentType, **kwargs):
+        self.calls.append(("put_object", Key, ContentType))
+        self.objects[Key] = (Body, ContentType)
+
+    def create_multipart_upload(self, **kwargs):
+        self.calls.append(("create_multipart_upload", kwargs))
+        return {"UploadId": "upload-1"}
+
+    def upload_fileobj(self, **kwargs):
+        self.calls.append(("upload_fileobj", kwargs))
+        kwargs["Fileobj"].read()
+
+    def delete_objects(self, Bucket, Delete):
+        keys = [obj["Key"] for obj in Delete["Objects"]]
+        self.calls.append(("delete_objects", keys, Delete["Quiet"]))
+        self.stored.difference_update(k for k in keys if k not in self.undeletable)
+        # Quiet: only the failures come back
+        return {"Errors": [
+            {"Key": k, "Code": "AccessDenied", "Message": "Access Denied"} for k in keys if k in self.undeletable
+        ]}
+
+    def get_paginator(self, operation):
+        client = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix, PaginationConfig):
+                keys = sorted(k for k in client.stored if k.startswith(Prefix))
+                size = PaginationConfig["PageSize"]
+                for i in range(0, len(keys), size):
+                    yield {"Contents": [{"Key": k} for k in keys[i:i + size]]}
+
+        return Paginator()
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        self.calls.append(("generate_presigned_url", Params["Key"], ExpiresIn))
+        return f"https://s3/{Params['Key']}?expires={ExpiresIn}&sig={len(self.calls)}"
+
+
+def test_multipart_part_layout(app, monkeypatch):
+    """
+    Test: the part count covers the file with the configured part size,
+    parts grow (whole MB) once a file would need more than MAX_PARTS, and a
+    missing or non-numeric size is a 400, not a crash.
+    """
+    mb = 1024 * 1024
+    monkeypatch.setattr(S3Manager, "_client", FakeS3Client())
+    monkeypatch.setattr(S3Manager, "MULTIPART_PART_SIZE_MB", 8)
+    monkeypatch.setattr(S3Manager, "MAX_MULTIPART_SIZE_MB", 200 * 1024)
+
+    def layout(file_size):
+        res = S3Manager.start_multipart_upload("a.pdf", "application/pdf", file_size, "uploads/1/2/3/a.pdf")
+        assert ResponseManager.is_success(res), ResponseManager.get_error(res)
+        data = ResponseManager.get_data(res)
+        return data["part_size"], data["part_count"]
+
+    assert layout(1) == (8 * mb, 1)
+    assert layout(16 * mb) == (8 * mb, 2)
+    assert layout(str(16 * mb + 1)) == (8 * mb, 3)
+    assert layout(80_000 * mb) == (8 * mb, 10_000)
+    assert layout(100_000 * mb) == (10 * mb, 10_000)
+
+    monkeypatch.setattr(S3Manager, "MULTIPART_PART_SIZE_MB", 1)
+    assert layout(12 * mb) == (S3Manager.MIN_PART_SIZE, 3)  # S3 minimum part size
+
+    for bad in ("12MB", -5, 201 * 1024 * mb):
+        res = S3Manager.start_multipart_upload("a.pdf", "application/pdf", bad, "uploads/1/2/3/a.pdf")
+        assert ResponseManager.is_bad_request(res)
+    assert len(S3Manager._client.calls) == 6
+
+
+def test_presigned_get_cache_buckets_and_margin(app, monkeypatch):
+    """
+    Test (frozen clock): a request is signed for the smallest bucket that
+    covers it, a cached URL is reused within its bucket, and it is never
+    handed out with less than expires_in + PRESIGN_CACHE_MARGIN seconds of
+    validity left (nor once it is older than PRESIGN_CACHE_MAX_AGE).
+    """
+    now = [1000.0]
+    client = FakeS3Client()
+    monkeypatch.setattr(s3_management.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(S3Manager, "_client", client)
+    monkeypatch.setattr(S3Manager, "_presign_cache", OrderedDict())
+    monkeypatch.setattr(S3Manager, "PRESIGN_CACHE_MARGIN", 30)
+    monkeypatch.setattr(S3Manager, "PRESIGN_CACHE_MAX_AGE", 600)
+
+    # the bucket covers the need plus the margin
+    assert [S3Manager._expiry_bucket(s) for s in (1, 3570, 3571, 3600, 10**9)] == [
+        3600, 3600, 6 * 3600, 6 * 3600, 7 * 24 * 3600,
+    ]
+
+    def presign(key, expires_in, at):
+        now[0] = 1000.0 + at
+        signs = len(client.calls)
+        url = ResponseManager.get_data(S3Manager.generate_presigned_get(key, expires_in))
+        return url, len(client.calls) > signs
+
+    first, signed = presign("k", 3000, at=0)
+    assert signed and client.calls[-1] == ("generate_presigned_url", "k", 3600)
+
+    # 3600 - 570 = 3030 = 3000 + margin left: still reused
+    assert presign("k", 3000, at=570) == (first, False)
+    assert presign("k", 60, at=10) == (first, False)  # same bucket, shorter need
+    # one second later only 3029 s would be left: re-signed
+    second, signed = presign("k", 3000, at=571)
+    assert signed and second != first
+
+    # the default hour goes to the 6 h bucket and is reused there
+    hour, signed = presign("k", 3600, at=600)
+    assert signed and client.calls[-1] == ("generate_presigned_url", "k", 6 * 3600)
+    assert presign("k", 4000, at=700) == (hour, False)
+    assert presign("other", 3600, at=700)[1] is True  # keys are separate entries
+
+    # plenty of validity left, but signed longer than MAX_AGE ago: re-signed
+    assert presign("k", 3600, at=1200) == (hour, False)
+    assert presign("k", 3600, at=1201)[1] is True
+
+    # deleted objects are forgotten
+    S3Manager.invalidate_presigned_get(["k"])
+    assert presign("k", 3600, at=1202)[1] is True
+
+
+def test_create_streams_into_the_managed_transfer(app, monkeypatch):
+    """
+    Test: init builds the pooled client and the TransferConfig from the
+    environment, and create hands a raw, non-seekable request stream to
+    upload_fileobj with that config (no seek, no temporary copy).
+    """
+    mb = 1024 * 1024
+    for name, value in {
+        "S3_TRANSFER_THRESHOLD_MB": "16", "S3_TRANSFER_CHUNK_MB": "32",
+        "S3_TRANSFER_CONCURRENCY": "6", "S3_MAX_POOL_CONNECTIONS": "64", "MAX_MULTIPART_SIZE_MB": "1",
+    }.items():
+        monkeypatch.setenv(name, value)
+    for attr in ("_client", "_bucket", "_transfer_config", "MAX_POOL_CONNECTIONS", "MAX_UPLOAD_SIZE_MB",
+                 "MULTIPART_PART_SIZE_MB", "MAX_MULTIPART_SIZE_MB"):
+        monkeypatch.setattr(S3Manager, attr, getattr(S3Manager, attr))  # restored after the test
+
+    client, configs = FakeS3Client(), []
+    monkeypatch.setattr(s3_management.boto3, "client", lambda *args, **kwargs: configs.append(kwargs["config"]) or client)
+    assert S3Manager.init()
+
+    transfer = S3Manager._transfer_config
+    assert (transfer.multipart_threshold, transfer.multipart_chunksize) == (16 * mb, 32 * mb)
+    assert (transfer.max_concurrency, transfer.use_threads) == (6, True)
+    assert configs[0].max_pool_connections == 64
+
+    class RequestStream(io.RawIOBase):
+        """Like the WSGI input: readable once, not seekable."""
+        def __init__(self, data):
+            self._data = io.BytesIO(data)
+
+        def readable(self):
+            return True
+
+        def readinto(self, buffer):
+            return self._data.readinto(buffer)
+
+    stream = RequestStream(b"x" * 1000)
+    res = S3Manager.create(stream, "uploads/1/2/3/a.pdf", content_type="application/pdf", content_length=1000)
+    assert ResponseManager.is_success(res) and ResponseManager.get_status(res) == 201
+
+    name, call = client.calls[-1]
+    assert name == "upload_fileobj" and call["Fileobj"] is stream and call["Config"] is transfer
+    assert call["Key"] == "uploads/1/2/3/a.pdf" and call["ExtraArgs"]["ContentType"] == "application/pdf"
+
+    too_large = S3Manager.create(RequestStream(b""), "uploads/1/2/3/b.pdf", content_length=mb + 1)
+    assert ResponseManager.is_bad_request(too_large) and len(client.calls) == 1
+
+
+def test_delete_batch_chunks_by_1000_and_reports_per_key_errors(app, monkeypatch):
+    """
+    Test: delete_batch sends at most 1000 keys per quiet delete_objects call
+    (duplicates dropped) and reports the keys S3 refused instead of failing.
+    """
+    keys = [f"uploads/1/2/{i}/f.pdf" for i in range(2500)]
+    refused = {keys[5], keys[1999]}
+    client = FakeS3Client(stored=keys, undeletable=refused)
+    monkeypatch.setattr(S3Manager, "_client", client)
+
+    res = S3Manager.delete_batch(keys + keys[:10])
+    assert ResponseManager.is_success(res)
+    assert [(len(batch), quiet) for _, batch, quiet in client.calls] == [(1000, True), (1000, True), (500, True)]
+
+    data = ResponseManager.get_data(res)
+    assert data["deleted"] == 2498
+    assert sorted(e["key"] for e in data["errors"]) == sorted(refused)
+    assert {e["code"] for e in data["errors"]} == {"AccessDenied"}
+    assert client.stored == refused
+
+
+def test_office_purge_pages_uploads_previews_and_blobs(app, monkeypatch):
+    """
+    Test: an office purge deletes its uploads/, previews/ and blobs/ prefixes
+    page by page (<= 1000 keys per delete_objects), leaves other offices
+    alone, and ends "failed" with the refused keys listed.
+    """
+    class InlineExecutor:
+        def submit(self, fn):
+            fn()
+
+    uploads = [f"uploads/1/2/{i}/f.pdf" for i in range(2001)]
+    stored = uploads + ["previews/1/2/7.webp", f"blobs/1/{'a' * 64}/" + "0" * 32, "uploads/10/1/1/x.pdf"]
+    client = FakeS3Client(stored=stored, undeletable={uploads[3]})
+    monkeypatch.setattr(S3Manager, "_client", client)
+    monkeypatch.setattr(PurgeManager, "_executor", InlineExecutor())
+    monkeypatch.setattr(PurgeManager, "_jobs", {})
+
+    assert ResponseManager.is_bad_request(PurgeManager.start("uploads/"))
+    res = PurgeManager.start("uploads/1/")
+    assert ResponseManager.get_status(res) == 202
+
+    job = PurgeManager.get_job(ResponseManager.get_data(res)["job_id"])
+    assert [len(batch) for _, batch, _ in client.calls] == [1000, 1000, 1, 1, 1]
+    assert (job["pages"], job["listed"], job["deleted"]) == (5, 2003, 2002)
+    assert job["status"] == "failed" and [e["key"] for e in job["errors"]] == [uploads[3]]
+    assert client.stored == {uploads[3], "uploads/10/1/1/x.pdf"}
+
+
+def _png(width=800, height=400, mode="RGBA"):
+    out = io.BytesIO()
+    Image.new(mode, (width, height), (200, 30, 30, 255)[: len(mode)]).save(out, format="PNG")
+    return out.getvalue()
+
+
+def test_preview_keys_only_for_uploaded_case_files(app):
+    """
+    Test: previews are keyed by the uploaded file; anything that isn't an
+    uploads/{office}/{case}/{file}/{name} key is refused.
+    """
+    assert PreviewManager.preview_key("uploads/1/2/3/scan.pdf") == "previews/1/2/3.webp"
+    for key in ("", None, "previews/1/2/3.webp", f"blobs/1/{'a' * 64}/" + "0" * 32,
+                "uploads/1/2/scan.pdf", "uploads/1/2/3/4/scan.pdf"):
+        assert PreviewManager.preview_key(key) is None
+        assert ResponseManager.is_bad_request(PreviewManager.enqueue(key))
+
+    assert PreviewManager.preview_prefix("uploads/1/") == "previews/1/"
+    assert PreviewManager.preview_prefix("uploads/1/2/") == "previews/1/2/"
+    assert PreviewManager.preview_prefix("blobs/1/") is None
+
+
+def test_render_image_to_webp_thumbnail(app):
+    """Test: an image renders to a WebP no larger than PREVIEW_SIZE, aspect kept."""
+    preview = PreviewManager.render(_png(800, 400), "image")
+    image = Image.open(io.BytesIO(preview))
+    assert image.format == "WEBP"
+    assert image.size == (PreviewManager.PREVIEW_SIZE, PreviewManager.PREVIEW_SIZE // 2)
+
+    assert Image.open(io.BytesIO(PreviewManager.render(_png(10, 10, "L"), "image"))).size == (10, 10)
+    assert PreviewManager.render(b"text", None) is None
+
+
+def test_generate_reads_dedup_source_and_skips_unsupported(app, monkeypatch):
+    """
+    Test: a deduplicated file renders from its shared blob, the preview is
+    stored under the file's previews/ key, get() is 404 until then, and
+    too-large or non-image/PDF sources are skipped without a write.
+    """
+    blob = f"blobs/1/{'a' * 64}/" + "0" * 32
+    client = FakeS3Client(objects={
+        blob: (_png(), "image/png"),
+        "uploads/1/2/4/notes.txt": (b"plain text", "text/plain"),
+        "uploads/1/2/5/huge.png": (b"x" * 2048, "image/png"),
+    })
+    monkeypatch.setattr(S3Manager, "_client", client)
+    monkeypatch.setattr(S3Manager, "_presign_cache", OrderedDict())
+
+    assert ResponseManager.is_not_found(PreviewManager.get("uploads/1/2/3/a.png"))
+
+    assert PreviewManager.generate("uploads/1/2/3/a.png", source=blob) == "previews/1/2/3.webp"
+    assert ("get_object", blob) in client.calls
+    assert ("put_object", "previews/1/2/3.webp", "image/webp") in client.calls
+    assert Image.open(io.BytesIO(client.objects["previews/1/2/3.webp"][0])).format == "WEBP"
+
+    res = PreviewManager.get("uploads/1/2/3/a.png")
+    assert ResponseManager.is_success(res) and "previews/1/2/3.webp" in ResponseManager.get_data(res)
+
+    monkeypatch.setattr(PreviewManager, "PREVIEW_MAX_SOURCE_MB", 0)
+    client.calls.clear()
+    assert PreviewManager.generate("uploads/1/2/4/notes.txt") is None  # type
+    assert PreviewManager.generate("uploads/1/2/5/huge.png") is None  # size
+    assert PreviewManager.generate("uploads/1/2/6/gone.png") is None  # missing source
+    assert not [c for c in client.calls if c[0] in ("get_object", "put_object")]
+
+
+def test_pdf_rendering_is_serialized(app, monkeypatch):
+    """Test: PDFium is never entered by two preview workers at once (it isn't thread-safe)."""
+    inside, peak, lock = [0], [0], threading.Lock()
+
+    class FakePage:
+        def get_size(self):
+            return 600, 800
+
+        def render(self, scale):
+            with lock:
+                inside[0] += 1
+                peak[0] = max(peak[0], inside[0])
+            time.sleep(0.05)
+            with lock:
+                inside[0] -= 1
+            return self
+
+        def to_pil(self):
+            return Image.new("RGB", (60, 80))
+
+    class FakeDocument:
+        def __init__(self, data):
+            pass
+
+        def __getitem__(self, index):
+            return FakePage()
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(preview_management, "pdfium", type("pdfium", (), {"PdfDocument": FakeDocument}))
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(PreviewManager.render(b"%PDF", "pdf"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 1 and len(results) == 4 and all(results)
@@ -6,10 +6,13 @@ from prometheus_client import Counter
 
 from .managers.formatter_management import configure_logging, disable_all_logging
 from .managers.ses_management import SESManager
+from .managers.outbox_management import OutboxManager
+from .managers.json_provider import FastJSONProvider
 
 
 def create_flask_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.secret_key = os.getenv("SECRET_KEY", "fallback-secret-key")
     configure_logging(app)
     # disable_all_logging(app)
@@ -24,6 +27,8 @@ def create_flask_app():
         'Total number of emails sent via SES',
         ['status', 'type']
     )
+    # Outbox queue gauges (workers are started by __main__)
+    OutboxManager.init(app)
 
     # Register Blueprints
     from .routes import bp
@@ -2,11 +2,13 @@
 import os
 
 from . import create_flask_app
+from .managers.outbox_management import OutboxManager
 
 
 def main() -> None:
     """Create the Flask application and start the server."""
     app = create_flask_app()
+    OutboxManager.start(app)
 
     app.run(
         host="0.0.0.0", 
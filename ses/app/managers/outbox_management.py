@@ -0,0 +1,285 @@
+# app/managers/outbox_management.py
+import os
+import random
+import threading
+import time
+
+from flask import current_app
+from prometheus_client import Gauge
+from redis import Redis
+from redis.exceptions import RedisError
+
+from .response_management import ResponseManager
+from .ses_management import SESManager
+
+
+# Move retries that are due back onto the ready queue, atomically.
+# KEYS: delayed zset, ready list   ARGV: now, max items
+_PROMOTE_DUE_LUA = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, item in ipairs(items) do
+    redis.call('ZREM', KEYS[1], item)
+    redis.call('LPUSH', KEYS[2], item)
+end
+return #items
+"""
+
+# Settle a message taken by a worker: drop it from processing and, for a
+# failure, park it as a retry or a dead letter. Atomic, and a no-op when it
+# was settled already (a settle retried after a lost reply can't duplicate).
+# KEYS: processing list, delayed zset, dead list
+# ARGV: raw message, outcome (sent|retry|dead), new payload, retry due time, dead cap
+_SETTLE_LUA = """
+if redis.call('LREM', KEYS[1], 1, ARGV[1]) == 0 then
+    return 0
+end
+if ARGV[2] == 'retry' then
+    redis.call('ZADD', KEYS[2], ARGV[4], ARGV[3])
+elseif ARGV[2] == 'dead' then
+    redis.call('LPUSH', KEYS[3], ARGV[3])
+    redis.call('LTRIM', KEYS[3], 0, tonumber(ARGV[5]) - 1)
+end
+return 1
+"""
+
+
+class OutboxManager:
+    """
+    Email outbox drained by a worker pool.
+
+    The gateway LPUSHes messages and returns at once; workers here BLMOVE
+    them into a processing list, send through SESManager and either drop
+    them (sent), park them for a retry with exponential backoff, or after
+    MAX_ATTEMPTS move them to the dead-letter list.
+
+        email:outbox               -> list, ready messages (oldest at the right)
+        email:outbox:processing    -> list, being sent right now
+        email:outbox:delayed       -> zset, retries scored by due time
+        email:outbox:dead          -> list, gave up (newest first, capped)
+
+    Message: {"id", "to", "subject", "message", "attempts", "enqueued_at"}.
+    Every message a worker takes is settled: any exception while sending
+    counts as a failed attempt, and while Redis is down the settle is
+    retried until it goes through. The service runs as a single process,
+    so whatever is left in processing at startup was interrupted and goes
+    back to the queue.
+    """
+
+    READY_KEY = "email:outbox"
+    PROCESSING_KEY = "email:outbox:processing"
+    DELAYED_KEY = "email:outbox:delayed"
+    DEAD_KEY = "email:outbox:dead"
+
+    WORKERS = int(os.getenv("OUTBOX_WORKERS", "4"))
+    MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+    BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "2"))  # seconds, doubled per attempt
+    BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "600"))
+    DEAD_MAX = int(os.getenv("OUTBOX_DEAD_MAX", "1000"))
+    POLL_TIMEOUT = 5  # seconds a worker blocks waiting for a message
+    PROMOTE_BATCH = 100
+    SETTLE_RETRY_MAX = 30  # seconds between settle attempts while Redis is down
+
+    _redis = None
+    _promote = None
+    _settle = None
+    _started = False
+    _lock = threading.Lock()
+
+    # ------------------------ Setup -------------------------
+    @classmethod
+    def init(cls, app):
+        """Connect to Redis and register the queue gauges (workers start with start())."""
+        cls._redis = Redis(
+            host=os.getenv("REDIS_HOST", "redis"),
+            port=int(os.getenv("REDIS_PORT", "6379")),
+            db=int(os.getenv("REDIS_DB", "0")),
+        )
+        cls._promote = cls._redis.register_script(_PROMOTE_DUE_LUA)
+        cls._settle = cls._redis.register_script(_SETTLE_LUA)
+
+        app.outbox_depth = Gauge(
+            'app_email_outbox_depth',
+            'Messages in the email outbox per queue',
+            ['queue']
+        )
+        app.outbox_oldest_age = Gauge(
+            'app_email_outbox_oldest_age_seconds',
+            'Age of the oldest message waiting in the ready queue'
+        )
+
+    @classmethod
+    def start(cls, app):
+        """Recover interrupted messages and start the workers + the retry scheduler."""
+        with cls._lock:
+            if cls._started:
+                return
+            cls._started = True
+
+        with app.app_context():
+            try:
+                recovered = cls._recover()
+                if recovered:
+                    current_app.logger.info(f"📬 outbox: {recovered} interrupted messages requeued")
+            except RedisError as e:
+                current_app.logger.error(f"outbox recovery failed: {e}")
+
+        for index in range(cls.WORKERS):
+            threading.Thread(target=cls._worker, args=(app,), name=f"outbox-{index}", daemon=True).start()
+        threading.Thread(target=cls._scheduler, args=(app,), name="outbox-scheduler", daemon=True).start()
+
+    @classmethod
+    def _recover(cls) -> int:
+        count = 0
+        while cls._redis.lmove(cls.PROCESSING_KEY, cls.READY_KEY, src="RIGHT", dest="RIGHT"):
+            count += 1
+        return count
+
+    # ------------------------ Delivery -------------------------
+    @classmethod
+    def backoff(cls, attempts: int) -> float:
+        """Seconds before retry number `attempts`: exponential, capped, with jitter."""
+        delay = min(cls.BACKOFF_BASE * 2 ** (attempts - 1), cls.BACKOFF_MAX)
+        return delay * random.uniform(0.8, 1.2)
+
+    @classmethod
+    def _worker(cls, app):
+        with app.app_context():
+            while True:
+                try:
+                    raw = cls._redis.blmove(
+                        cls.READY_KEY, cls.PROCESSING_KEY, cls.POLL_TIMEOUT, src="RIGHT", dest="LEFT"
+                    )
+                    if raw is not None:
+                        cls.deliver(raw)
+                except RedisError as e:
+                    current_app.logger.error(f"outbox worker: Redis unavailable: {e}")
+                    time.sleep(1)
+                except Exception as e:
+                    # a bad message must not kill the worker
+                    current_app.logger.error(f"outbox worker: unexpected error: {e}")
+
+    @classmethod
+    def deliver(cls, raw):
+        """Send one message taken from the processing list and settle it (always)."""
+        try:
+            message = current_app.json.loads(raw)
+            to_email, subject, body = message["to"], message["subject"], message["message"]
+        except (ValueError, KeyError, TypeError) as e:
+            # unreadable message: straight to the dead-letter list
+            message, error = {"raw": raw.decode() if isinstance(raw, bytes) else raw}, f"invalid message: {e}"
+            message["attempts"] = cls.MAX_ATTEMPTS  # retrying cannot help
+        else:
+            try:
+                res = SESManager.send_email(to_email=to_email, subject=subject, message=body)
+                error = None if ResponseManager.is_success(res) else ResponseManager.get_error(res)
+            except Exception as e:
+                # whatever broke, it is a failed attempt of this message
+                error = f"{type(e).__name__}: {e}"
+
+        if error is None:
+            cls._settle_until_done(raw, "sent")
+            return "sent"
+
+        message["attempts"] = int(message.get("attempts") or 0) + 1
+        message["last_error"] = str(error)[:500]
+
+        if message["attempts"] >= cls.MAX_ATTEMPTS:
+            message["failed_at"] = time.time()
+            cls._settle_until_done(raw, "dead", current_app.json.dumps(message))
+            current_app.email_metrics.labels(status='dead', type='outbox').inc()
+            current_app.logger.error(
+                f"outbox: message {message.get('id')} dead after {message['attempts']} attempts: {error}"
+            )
+            return "dead"
+
+        delay = cls.backoff(message["attempts"])
+        cls._settle_until_done(raw, "retry", current_app.json.dumps(message), time.time() + delay)
+        current_app.email_metrics.labels(status='retry', type='outbox').inc()
+        current_app.logger.warning(
+            f"outbox: message {message.get('id')} failed (attempt {message['attempts']}), retry in {delay:.0f}s"
+        )
+        return "retry"
+
+    @classmethod
+    def _settle_until_done(cls, raw, outcome: str, payload="", due: float = 0):
+        """Run the settle script; while Redis is down keep trying (the message stays in processing)."""
+        wait = 1
+        while True:
+            try:
+                cls._settle(
+                    keys=[cls.PROCESSING_KEY, cls.DELAYED_KEY, cls.DEAD_KEY],
+                    args=[raw, outcome, payload, due, cls.DEAD_MAX],
+                )
+                return
+            except RedisError as e:
+                current_app.logger.error(f"outbox: settling a message failed, retry in {wait}s: {e}")
+                time.sleep(wait)
+                wait = min(wait * 2, cls.SETTLE_RETRY_MAX)
+
+    # ------------------------ Scheduler / Metrics -------------------------
+    @classmethod
+    def _scheduler(cls, app):
+        """Once a second: requeue due retries and refresh the queue gauges."""
+        with app.app_context():
+            while True:
+                try:
+                    cls.promote_due()
+                    cls._export_metrics(cls.stats())
+                except RedisError as e:
+                    current_app.logger.error(f"outbox scheduler: Redis unavailable: {e}")
+                time.sleep(1)
+
+    @classmethod
+    def promote_due(cls) -> int:
+        return int(cls._promote(keys=[cls.DELAYED_KEY, cls.READY_KEY], args=[time.time(), cls.PROMOTE_BATCH]))
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Depth of every queue and the age of the oldest ready message (one round-trip)."""
+        pipe = cls._redis.pipeline(transaction=False)
+        pipe.llen(cls.READY_KEY)
+        pipe.llen(cls.PROCESSING_KEY)
+        pipe.zcard(cls.DELAYED_KEY)
+        pipe.llen(cls.DEAD_KEY)
+        pipe.lindex(cls.READY_KEY, -1)
+        ready, processing, delayed, dead, oldest = pipe.execute()
+
+        oldest_age = 0.0
+        if oldest:
+            try:
+                oldest_age = max(time.time() - float(current_app.json.loads(oldest)["enqueued_at"]), 0.0)
+            except (ValueError, KeyError, TypeError):
+                pass
+
+        return {
+            "ready": ready,
+            "processing": processing,
+            "delayed": delayed,
+            "dead": dead,
+            "oldest_age_seconds": round(oldest_age, 3),
+        }
+
+    @staticmethod
+    def _export_metrics(stats: dict):
+        for queue in ("ready", "processing", "delayed", "dead"):
+            current_app.outbox_depth.labels(queue=queue).set(stats[queue])
+        current_app.outbox_oldest_age.set(stats["oldest_age_seconds"])
+
+    # ------------------------ Dead letters -------------------------
+    @classmethod
+    def requeue_dead(cls, limit: int = 100) -> int:
+        """Give dead messages a fresh set of attempts (after fixing the cause)."""
+        count = 0
+        for _ in range(max(int(limit), 0)):
+            raw = cls._redis.rpop(cls.DEAD_KEY)
+            if raw is None:
+                break
+            message = current_app.json.loads(raw)
+            if "raw" in message:
+                continue  # unreadable from the start, nothing to resend
+            message.update(attempts=0, enqueued_at=time.time())
+            message.pop("last_error", None)
+            message.pop("failed_at", None)
+            cls._redis.lpush(cls.READY_KEY, current_app.json.dumps(message))
+            count += 1
+        return count
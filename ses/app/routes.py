@@ -3,6 +3,7 @@ from flask import Blueprint, request, jsonify
 
 from .managers.response_management import ResponseManager
 from .managers.ses_management import SESManager
+from .managers.outbox_management import OutboxManager
 
 
 bp = Blueprint("main", __name__)
@@ -32,9 +33,27 @@ def send_email():
     if not message:
         return ResponseManager.bad_request(error="Missing email message")
 
-    SESManager.send_email(to_email=to_email, subject=subject, message=message)
+    return SESManager.send_email(to_email=to_email, subject=subject, message=message)
 
-    return ResponseManager.success()
+
+# ---------------------- Outbox ----------------------
+
+
+@bp.route("/outbox/stats", methods=["GET"])
+def outbox_stats():
+    """Queue depths (ready / processing / delayed / dead) and oldest message age."""
+    return ResponseManager.success(data=OutboxManager.stats())
+
+
+@bp.route("/outbox/requeue_dead", methods=["POST"])
+def outbox_requeue_dead():
+    """Send dead-lettered messages again. Optional JSON: { "limit": 100 }"""
+    data = request.get_json(silent=True) or {}
+    try:
+        limit = int(data.get("limit", 100))
+    except (TypeError, ValueError):
+        return ResponseManager.bad_request(error="limit must be a number")
+    return ResponseManager.success(data={"requeued": OutboxManager.requeue_dead(limit)})
 
 
 @bp.route("/send_whatsapp", methods=["POST"])
@@ -0,0 +1,158 @@
+from collections import defaultdict
+
+import pytest
+from flask import Flask
+from redis.exceptions import RedisError
+
+from app.managers import outbox_management
+from app.managers.outbox_management import OutboxManager
+from app.managers.response_management import ResponseManager
+from app.managers.ses_management import SESManager
+
+
+class FakeCounter:
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self._labels = None
+
+    def labels(self, **labels):
+        self._labels = tuple(sorted(labels.items()))
+        return self
+
+    def inc(self, amount=1):
+        self.counts[self._labels] += amount
+
+
+class FakeRedis:
+    """
+    Just the commands the outbox uses; the two Lua scripts are played by
+    Python stand-ins with the same KEYS/ARGV contract. Lists keep the left
+    end at index 0.
+    """
+
+    def __init__(self):
+        self.lists = defaultdict(list)
+        self.zsets = defaultdict(dict)
+        self.fail_next = 0  # script calls that raise like a lost connection
+
+    def lpush(self, key, value):
+        self.lists[key].insert(0, value)
+
+    def rpop(self, key):
+        return self.lists[key].pop() if self.lists[key] else None
+
+    def blmove(self, first, second, timeout, src="RIGHT", dest="LEFT"):
+        if not self.lists[first]:
+            return None
+        value = self.lists[first].pop()
+        self.lists[second].insert(0, value)
+        return value
+
+    def register_script(self, lua):
+        return self._settle if lua == outbox_management._SETTLE_LUA else self._promote_due
+
+    def _settle(self, keys, args):
+        if self.fail_next:
+            self.fail_next -= 1
+            raise RedisError("Connection reset by peer")
+        processing, delayed, dead = keys
+        raw, outcome, payload, due, dead_max = args
+        if raw not in self.lists[processing]:
+            return 0
+        self.lists[processing].remove(raw)
+        if outcome == "retry":
+            self.zsets[delayed][payload] = float(due)
+        elif outcome == "dead":
+            self.lists[dead].insert(0, payload)
+            del self.lists[dead][int(dead_max):]
+        return 1
+
+    def _promote_due(self, keys, args):
+        delayed, ready = keys
+        due = sorted((score, item) for item, score in self.zsets[delayed].items() if score <= float(args[0]))
+        for _, item in due[: int(args[1])]:
+            del self.zsets[delayed][item]
+            self.lists[ready].insert(0, item)
+        return len(due)
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    """OutboxManager on a fake Redis inside a bare app context; returns the fake."""
+    redis = FakeRedis()
+    monkeypatch.setattr(OutboxManager, "_redis", redis)
+    monkeypatch.setattr(OutboxManager, "_settle", redis.register_script(outbox_management._SETTLE_LUA))
+    monkeypatch.setattr(OutboxManager, "_promote", redis.register_script(outbox_management._PROMOTE_DUE_LUA))
+    monkeypatch.setattr(outbox_management.time, "sleep", lambda seconds: None)
+
+    app = Flask(__name__)
+    app.email_metrics = FakeCounter()
+    with app.app_context():
+        yield redis
+
+
+def test_outbox_retries_any_failure_then_dead_letters(outbox, monkeypatch):
+    """
+    Test: every failed send - an error response or an exception SESManager
+    raises - is settled as a retry with backoff, the message never stays in
+    processing (not even when settling hits a Redis error), and after
+    MAX_ATTEMPTS it lands in the dead-letter list until requeued.
+    """
+    from flask import current_app
+
+    failures = iter([
+        RuntimeError("SES endpoint timeout"),
+        ResponseManager.internal(error="Throttling"),
+        OSError("connection reset"),
+    ])
+
+    def failing_send(to_email, subject, message):
+        failure = next(failures)
+        if isinstance(failure, Exception):
+            raise failure
+        return failure
+
+    monkeypatch.setattr(OutboxManager, "MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(OutboxManager, "backoff", classmethod(lambda cls, attempts: 0))
+    monkeypatch.setattr(SESManager, "send_email", staticmethod(failing_send))
+
+    job = {"id": "m1", "to": "a@b.c", "subject": "s", "message": "m", "attempts": 0, "enqueued_at": 1.0}
+    outbox.lpush(OutboxManager.READY_KEY, current_app.json.dumps(job))
+
+    outbox.fail_next = 2  # Redis drops out while settling the first attempt
+    outcomes = []
+    for _ in range(3):
+        assert OutboxManager.promote_due() == (0 if not outcomes else 1)
+        raw = outbox.blmove(OutboxManager.READY_KEY, OutboxManager.PROCESSING_KEY, 0)
+        outcomes.append(OutboxManager.deliver(raw))
+        assert outbox.lists[OutboxManager.PROCESSING_KEY] == []
+
+    assert outcomes == ["retry", "retry", "dead"]
+    assert not outbox.zsets[OutboxManager.DELAYED_KEY] and not outbox.lists[OutboxManager.READY_KEY]
+    dead = current_app.json.loads(outbox.lists[OutboxManager.DEAD_KEY][0])
+    assert (dead["id"], dead["attempts"], dead["last_error"]) == ("m1", 3, "OSError: connection reset")
+    metrics = current_app.email_metrics.counts
+    assert metrics[(("status", "retry"), ("type", "outbox"))] == 2
+    assert metrics[(("status", "dead"), ("type", "outbox"))] == 1
+
+    # settled already (e.g. a retried settle whose first reply was lost): nothing duplicated
+    OutboxManager._settle_until_done("no longer in processing", "dead", "{}")
+    assert len(outbox.lists[OutboxManager.DEAD_KEY]) == 1
+
+    # after fixing the cause the dead letter gets a fresh set of attempts
+    assert OutboxManager.requeue_dead() == 1
+    requeued = current_app.json.loads(outbox.lists[OutboxManager.READY_KEY][0])
+    assert requeued["attempts"] == 0 and "last_error" not in requeued
+
+
+def test_outbox_unreadable_message_goes_straight_to_dead(outbox, monkeypatch):
+    """Test: a message that isn't valid JSON (or lacks fields) is dead at once, never sent."""
+    monkeypatch.setattr(SESManager, "send_email", staticmethod(lambda **kw: pytest.fail("must not send")))
+
+    for raw in (b"not json", b'{"to": "a@b.c"}', b"[1, 2]"):
+        outbox.lpush(OutboxManager.PROCESSING_KEY, raw)
+        assert OutboxManager.deliver(raw) == "dead"
+
+    assert outbox.lists[OutboxManager.PROCESSING_KEY] == []
+    assert len(outbox.lists[OutboxManager.DEAD_KEY]) == 3
+    assert OutboxManager.requeue_dead() == 0  # nothing resendable among them